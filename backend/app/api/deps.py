@@ -1,8 +1,10 @@
-from fastapi import Depends, HTTPException, status
+from typing import Any, Sequence
+
+from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from app.dbrm import Session
+from app.dbrm import Session, next_cursor
 
 from app.core.config import settings
 from app.core.database import get_db
@@ -76,3 +78,10 @@ def get_current_admin(
 def get_audit_context(current_user: User) -> ChangeTrackingContext:
     """Create audit context from current user"""
     return ChangeTrackingContext(user_id=current_user.user_id)
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], fields: Sequence[str], limit: int) -> None:
+    """Expose the keyset cursor for the page after items in the X-Next-Cursor header"""
+    token = next_cursor(items, fields, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
@@ -1,9 +1,9 @@
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from app.dbrm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services import AdminService, OrderService
 from app.api import deps
 from app.schemas import (
@@ -15,6 +15,7 @@ from app.schemas import (
     WorkerProductivityAnalysis,
     WorkerStatistics,
     IncompleteOrderStatistics,
+    RoutePerformance,
 )
 
 router = APIRouter()
@@ -25,6 +26,8 @@ def get_orders(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     status_filter: Optional[int] = Query(None, description="Filter by order status"),
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
@@ -33,14 +36,16 @@ def get_orders(
     """
     skip = (page - 1) * page_size
     
-    return OrderService.get_all_orders(
-        db=db, skip=skip, limit=page_size
+    orders = OrderService.get_all_orders(
+        db=db, skip=skip, limit=page_size, cursor=cursor
     )
+    deps.set_next_cursor(response, orders, OrderService.cursor_fields, page_size)
+    return orders
 
 
 @router.get("/car-statistics", response_model=List[CarTypeStatistics])
 def get_car_statistics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
     """
@@ -52,7 +57,7 @@ def get_car_statistics(
 @router.get("/costs/analysis", response_model=CostAnalysisByPeriod)
 def get_cost_analysis(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     period_type: str = Query("month", description="Period type: month or quarter"),
@@ -69,7 +74,7 @@ def get_cost_analysis(
 @router.get("/feedback/negative", response_model=NegativeFeedbackAnalysis)
 def get_negative_feedback_analysis(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     rating_threshold: int = Query(3, ge=1, le=5, description="Rating threshold (orders below this rating)"),
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
@@ -82,7 +87,7 @@ def get_negative_feedback_analysis(
 @router.get("/workers/productivity", response_model=List[WorkerProductivityAnalysis])
 def get_worker_productivity_analysis(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     current_user: User = Depends(deps.get_current_admin),
@@ -98,7 +103,7 @@ def get_worker_productivity_analysis(
 @router.get("/workers", response_model=List[WorkerStatistics])
 def get_worker_statistics(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_time: str,
     end_time: str,
     current_user: User = Depends(deps.get_current_admin),
@@ -111,10 +116,32 @@ def get_worker_statistics(
 
 @router.get("/incomplete-orders", response_model=List[IncompleteOrderStatistics])
 def get_incomplete_orders_statistics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Get statistics about incomplete orders
     """
     return AdminService.get_incomplete_orders_statistics(db)
+
+
+@router.get("/performance/routes", response_model=List[RoutePerformance])
+def get_route_performance(
+    *,
+    limit: int = Query(10, ge=1, le=100, description="Number of routes to return"),
+    order_by: str = Query(
+        "total_db_ms",
+        description="total_db_ms, avg_db_ms, p95_ms, avg_statements or n_plus_one_requests",
+    ),
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Get the worst routes by rolling database statistics
+    """
+    try:
+        return AdminService.get_route_performance(limit=limit, order_by=order_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
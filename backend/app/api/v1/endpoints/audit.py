@@ -1,6 +1,6 @@
 from typing import List, Any, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query, Body, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response, status
 from app.dbrm import Session
 
 from app.api import deps
@@ -58,13 +58,16 @@ def get_recent_changes(
     hours: int = Query(24, ge=1, le=168, description="Number of hours to look back"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: Admin = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Get recent changes within specified hours (Admin only)
     """
     skip = (page - 1) * page_size
-    recent_changes = AuditService.get_recent_changes(db, hours, skip, page_size)
+    recent_changes = AuditService.get_recent_changes(db, hours, skip, page_size, cursor)
+    deps.set_next_cursor(response, recent_changes, AuditService.cursor_fields, page_size)
     return recent_changes
 
 
@@ -1,4 +1,4 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from app.dbrm import Session
 
@@ -80,6 +80,8 @@ def get_cars(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """
@@ -90,19 +92,21 @@ def get_cars(
     skip = (page - 1) * page_size
     
     if current_user.user_type == "customer":
-        return CarService.get_customer_cars(
+        cars = CarService.get_customer_cars(
             db=db, customer_id=current_user.user_id,
-            skip=skip, limit=page_size
+            skip=skip, limit=page_size, cursor=cursor
         )
     elif current_user.user_type == "administrator":
-        return CarService.get_all_cars(
-            db=db, skip=skip, limit=page_size
+        cars = CarService.get_all_cars(
+            db=db, skip=skip, limit=page_size, cursor=cursor
         )
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to list cars"
         )
+    deps.set_next_cursor(response, cars, CarService.cursor_fields, page_size)
+    return cars
 
 
 @router.get("/{car_id}", response_model=Car)
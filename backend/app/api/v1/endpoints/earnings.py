@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
 from app.dbrm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services.earnings_service import EarningsService
 from app.background.earnings_scheduler import get_scheduler
 from app.api import deps
@@ -18,7 +18,7 @@ router = APIRouter()
 @router.get("/individual/{worker_id}/monthly", response_model=WorkerMonthlyEarnings)
 def get_worker_monthly_earnings(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     worker_id: str = Path(..., description="Worker ID"),
     year: int = Query(..., description="Year"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
@@ -42,7 +42,7 @@ def get_worker_monthly_earnings(
 @router.get("/individual/{worker_id}/history", response_model=List[WorkerMonthlyEarnings])
 def get_worker_earnings_history(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     worker_id: str = Path(..., description="Worker ID"),
     months_back: int = Query(12, ge=1, le=24, description="Number of months back to retrieve"),
     current_user: Admin = Depends(deps.get_current_admin),
@@ -65,7 +65,7 @@ def get_worker_earnings_history(
 @router.get("/all", response_model=List[Union[WorkerMonthlyEarnings, FailedEarningsCalculation]])
 def get_all_workers_monthly_earnings(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     year: int = Query(..., description="Year"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     current_user: Admin = Depends(deps.get_current_admin),
@@ -88,7 +88,7 @@ def get_all_workers_monthly_earnings(
 @router.get("/summary", response_model=EarningsReport)
 def get_earnings_summary_report(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     year: int = Query(..., description="Year"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     current_user: Admin = Depends(deps.get_current_admin),
@@ -1,7 +1,7 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from app.dbrm import Session
 
 from app.core.database import get_db
@@ -36,6 +36,8 @@ def get_worker_logs(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: Worker = Depends(deps.get_current_worker),
 ) -> Any:
     """
@@ -43,6 +45,8 @@ def get_worker_logs(
     """
     skip = (page - 1) * page_size
     # This might need to be refactored to a generic log_service
-    return WorkerService.get_worker_logs(
-        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size
+    logs = WorkerService.get_worker_logs(
+        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size, cursor=cursor
     )
+    deps.set_next_cursor(response, logs, WorkerService.log_cursor_fields, page_size)
+    return logs
@@ -52,6 +52,8 @@ def get_owned_orders(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     status_filter: Optional[int] = Query(None, description="Filter by order status"),
     current_user: User = Depends(deps.get_current_customer),
 ) -> Any:
@@ -60,9 +62,12 @@ def get_owned_orders(
     """
     skip = (page - 1) * page_size
     
-    return OrderService.get_customer_orders(
-        db=db, customer_id=current_user.user_id, skip=skip, limit=page_size, status=status_filter
+    orders = OrderService.get_customer_orders(
+        db=db, customer_id=current_user.user_id, skip=skip, limit=page_size, status=status_filter,
+        cursor=cursor
     )
+    deps.set_next_cursor(response, orders, OrderService.cursor_fields, page_size)
+    return orders
 
 
 @router.get("/all", response_model=List[OrderToAdmin])
@@ -71,6 +76,8 @@ def get_all_orders(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     status_filter: Optional[int] = Query(None, description="Filter by order status"),
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
@@ -79,9 +86,11 @@ def get_all_orders(
     """
     skip = (page - 1) * page_size
     
-    return OrderService.get_all_orders(
-        db=db, skip=skip, limit=page_size, status=status_filter
+    orders = OrderService.get_all_orders(
+        db=db, skip=skip, limit=page_size, status=status_filter, cursor=cursor
     )
+    deps.set_next_cursor(response, orders, OrderService.cursor_fields, page_size)
+    return orders
 
 
 # Order feedback
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from app.dbrm import Session
@@ -107,13 +107,16 @@ def get_users(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: User = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Get all users (admin only) with pagination
     """
     skip = (page - 1) * page_size
-    users = UserService.get_all_users(db, skip=skip, limit=page_size)
+    users = UserService.get_all_users(db, skip=skip, limit=page_size, cursor=cursor)
+    deps.set_next_cursor(response, users, UserService.cursor_fields, page_size)
     return users
 
 
@@ -1,5 +1,5 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from app.dbrm import Session
 
 from app.api import deps
@@ -78,15 +78,19 @@ def get_assigned_orders(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: User = Depends(deps.get_current_worker),
 ) -> Any:
     """
     Get orders assigned to the current worker
     """
     skip = (page - 1) * page_size
-    return WorkerService.get_assigned_orders(
-        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size
+    orders = WorkerService.get_assigned_orders(
+        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size, cursor=cursor
     )
+    deps.set_next_cursor(response, orders, WorkerService.order_cursor_fields, page_size)
+    return orders
 
 @router.get("/orders/all", response_model=List[OrderToWorker])
 def get_all_orders_for_worker(
@@ -94,15 +98,19 @@ def get_all_orders_for_worker(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header; takes precedence over page"),
+    response: Response,
     current_user: User = Depends(deps.get_current_worker),
 ) -> Any:
     """
     Get all orders for the current worker
     """
     skip = (page - 1) * page_size
-    return WorkerService.get_all_orders(
-        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size
+    orders = WorkerService.get_all_orders(
+        db=db, worker_id=current_user.user_id, skip=skip, limit=page_size, cursor=cursor
     )
+    deps.set_next_cursor(response, orders, WorkerService.order_cursor_fields, page_size)
+    return orders
     
 @router.get("/my-earnings/monthly", response_model=WorkerMonthlyEarnings)
 def get_my_monthly_earnings(
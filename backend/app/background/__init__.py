@@ -16,6 +16,14 @@ from .assignment_processor import (
     get_processor_status
 )
 
+from .events import (
+    event_bus,
+    publish_order_created,
+    publish_order_rejected,
+    publish_order_updated,
+    publish_worker_freed
+)
+
 from .earnings_scheduler import (
     start_scheduler,
     stop_scheduler,
@@ -33,6 +41,13 @@ __all__ = [
     'trigger_assignment',
     'get_processor_status',
     
+    # Assignment events
+    'event_bus',
+    'publish_order_created',
+    'publish_order_rejected',
+    'publish_order_updated',
+    'publish_worker_freed',
+    
     # Earnings scheduler functions
     'start_scheduler',
     'stop_scheduler',
@@ -0,0 +1,273 @@
+"""
+In-memory index of assignable work for the assignment processor.
+
+Pending orders sit in one heap keyed by
+
+    (not expedite_flag, start_time, assignment_attempts)
+
+so expedited orders come first, then the oldest, then the ones bounced the
+fewest times. Available workers sit in one heap per worker_type, longest
+idle first. Adding, removing and popping are O(log n); removals are lazy
+(the entry is marked dead and skipped when it reaches the top).
+
+The index mirrors the database only through the transitions the processor
+sees (events, its own assignments, sweeps). The database stays the source
+of truth: an assignment that no longer applies is dropped, and each sweep
+rebuilds the index from scratch.
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Marks a heap entry whose order or worker has since been removed or re-keyed
+_REMOVED = None
+
+
+class IndexedOrder(NamedTuple):
+    """A pending order as popped off the index"""
+    order_id: str
+    key: Tuple
+    worker_type: Optional[str]
+
+    @property
+    def expedited(self) -> bool:
+        return not self.key[0]
+
+    @property
+    def start_time(self) -> datetime:
+        return self.key[1]
+
+    @property
+    def assignment_attempts(self) -> int:
+        return self.key[2]
+
+
+class AssignmentIndex:
+    """Priority queue of pending orders plus per-worker_type pools of available workers"""
+
+    def __init__(self, type_for_order: Optional[Callable] = None):
+        """
+        Args:
+            type_for_order: Callable(order) -> the worker_type it needs, or None
+                            for any type. Orders carry no type of their own, so
+                            by default any available worker can take any order.
+        """
+        self.type_for_order = type_for_order
+        self._orders: List[list] = []
+        self._order_entries: Dict[str, list] = {}
+        self._order_types: Dict[str, Optional[str]] = {}
+        self._pools: Dict[str, List[list]] = {}
+        self._pool_sizes: Dict[str, int] = {}
+        self._worker_entries: Dict[str, list] = {}
+        self._worker_types: Dict[str, str] = {}
+        # Type of every worker seen so far, kept after they leave the pools
+        self._known_types: Dict[str, str] = {}
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+
+    # Orders
+
+    @staticmethod
+    def order_key(order) -> Tuple:
+        return (not order.expedite_flag, order.start_time or datetime.max, order.assignment_attempts or 0)
+
+    def add_order(self, order) -> None:
+        """Insert a pending order, or re-key it if it is already indexed"""
+        with self._lock:
+            self.remove_order(order.order_id)
+            entry = [self.order_key(order), next(self._counter), order.order_id]
+            self._order_entries[order.order_id] = entry
+            self._order_types[order.order_id] = self.type_for_order(order) if self.type_for_order else None
+            heapq.heappush(self._orders, entry)
+
+    def remove_order(self, order_id: str) -> bool:
+        with self._lock:
+            entry = self._order_entries.pop(order_id, None)
+            self._order_types.pop(order_id, None)
+            if entry is None:
+                return False
+            entry[-1] = _REMOVED
+            return True
+
+    def pop_order(self) -> Optional[str]:
+        """Remove and return the highest-priority pending order id"""
+        with self._lock:
+            while self._orders:
+                entry = heapq.heappop(self._orders)
+                order_id = entry[-1]
+                if order_id is not _REMOVED:
+                    del self._order_entries[order_id]
+                    self._order_types.pop(order_id, None)
+                    return order_id
+            return None
+
+    def has_order(self, order_id: str) -> bool:
+        return order_id in self._order_entries
+
+    def order_type(self, order_id: str) -> Optional[str]:
+        """worker_type an indexed order needs, None for any"""
+        return self._order_types.get(order_id)
+
+    # Workers
+
+    def add_worker(self, worker_id: str, worker_type: Optional[str] = None) -> None:
+        """Make a worker available; a worker already indexed keeps its place"""
+        with self._lock:
+            if worker_id in self._worker_entries:
+                return
+            worker_type = worker_type or self._known_types.get(worker_id)
+            if worker_type is None:
+                raise ValueError(f"Worker type of {worker_id} is unknown")
+            self._known_types[worker_id] = worker_type
+            entry = [next(self._counter), worker_id]
+            self._worker_entries[worker_id] = entry
+            self._worker_types[worker_id] = worker_type
+            self._pool_sizes[worker_type] = self._pool_sizes.get(worker_type, 0) + 1
+            heapq.heappush(self._pools.setdefault(worker_type, []), entry)
+
+    def remove_worker(self, worker_id: str) -> bool:
+        with self._lock:
+            entry = self._worker_entries.pop(worker_id, None)
+            if entry is None:
+                return False
+            self._pool_sizes[self._worker_types.pop(worker_id)] -= 1
+            entry[-1] = _REMOVED
+            return True
+
+    def take_worker(self, worker_type: Optional[str] = None, exclude: Optional[Set[str]] = None) -> Optional[str]:
+        """
+        Remove and return the longest-idle worker of worker_type (or of the type
+        with the most available workers). Workers in exclude are passed over
+        unless nobody else is available.
+        """
+        with self._lock:
+            if worker_type is not None:
+                types = [worker_type]
+            else:
+                types = sorted(self._pool_sizes, key=self._pool_sizes.get, reverse=True)
+            fallback = None
+            for pool_type in types:
+                pool = self._pools.get(pool_type)
+                skipped = []
+                chosen = None
+                while pool:
+                    entry = heapq.heappop(pool)
+                    if entry[-1] is _REMOVED:
+                        continue
+                    if exclude and entry[-1] in exclude:
+                        skipped.append(entry)
+                        continue
+                    chosen = entry
+                    break
+                for entry in skipped:
+                    heapq.heappush(pool, entry)
+                if chosen is not None:
+                    worker_id = chosen[-1]
+                    del self._worker_entries[worker_id]
+                    self._pool_sizes[self._worker_types.pop(worker_id)] -= 1
+                    return worker_id
+                if fallback is None and skipped:
+                    fallback = skipped[0][-1]
+            if fallback is not None:
+                self.remove_worker(fallback)
+            return fallback
+
+    def worker_type(self, worker_id: str) -> Optional[str]:
+        return self._worker_types.get(worker_id)
+
+    def has_worker(self, worker_id: str) -> bool:
+        return worker_id in self._worker_entries
+
+    # Matching
+
+    def match(self, limit: int, exclude: Optional[Dict[str, Set[str]]] = None) -> Dict[str, str]:
+        """
+        Pop up to limit (order, worker) pairs in priority order. Orders whose
+        worker_type has nobody free are kept and skipped. Returns order_id -> worker_id.
+        """
+        with self._lock:
+            assignments = {}
+            waiting = []
+            while len(assignments) < limit and self._worker_entries:
+                order_id = self._peek_order()
+                if order_id is None:
+                    break
+                required = self._order_types.get(order_id)
+                excluded = exclude.get(order_id) if exclude else None
+                key = self._order_entries[order_id][0]
+                self.pop_order()
+                worker_id = self.take_worker(required, excluded)
+                if worker_id is None:
+                    waiting.append((key, order_id, required))
+                    continue
+                assignments[order_id] = worker_id
+            for key, order_id, required in waiting:
+                self._restore_order(key, order_id, required)
+            return assignments
+
+    def match_order(self, order_id: str, exclude: Optional[Set[str]] = None) -> Optional[str]:
+        """Take a worker for one indexed order regardless of its place in the queue"""
+        with self._lock:
+            entry = self._order_entries.get(order_id)
+            if entry is None:
+                return None
+            worker_id = self.take_worker(self._order_types.get(order_id), exclude)
+            if worker_id is not None:
+                self.remove_order(order_id)
+            return worker_id
+
+    def pop_orders(self, limit: int) -> List[IndexedOrder]:
+        """Remove and return up to limit orders, highest priority first"""
+        with self._lock:
+            popped = []
+            while len(popped) < limit:
+                order_id = self._peek_order()
+                if order_id is None:
+                    break
+                popped.append(IndexedOrder(order_id, self._order_entries[order_id][0], self._order_types.get(order_id)))
+                self.pop_order()
+            return popped
+
+    def restore_orders(self, orders: Iterable[IndexedOrder]) -> None:
+        """Put popped orders that were not assigned back in the queue"""
+        with self._lock:
+            for item in orders:
+                if item.order_id not in self._order_entries:
+                    self._restore_order(item.key, item.order_id, item.worker_type)
+
+    def workers(self) -> List[Tuple[str, str]]:
+        """(worker_id, worker_type) of every available worker, longest idle first"""
+        with self._lock:
+            entries = sorted(self._worker_entries.values())
+            return [(worker_id, self._worker_types[worker_id]) for _, worker_id in entries]
+
+    def _peek_order(self) -> Optional[str]:
+        while self._orders and self._orders[0][-1] is _REMOVED:
+            heapq.heappop(self._orders)
+        return self._orders[0][-1] if self._orders else None
+
+    def _restore_order(self, key: Tuple, order_id: str, required: Optional[str]) -> None:
+        entry = [key, next(self._counter), order_id]
+        self._order_entries[order_id] = entry
+        self._order_types[order_id] = required
+        heapq.heappush(self._orders, entry)
+
+    def rebuild(self, orders: Iterable, workers: Iterable) -> None:
+        """Replace the whole index with pending orders and available workers read from the database"""
+        with self._lock:
+            self._orders, self._order_entries, self._order_types = [], {}, {}
+            self._pools, self._pool_sizes, self._worker_entries, self._worker_types = {}, {}, {}, {}
+            for order in orders:
+                self.add_order(order)
+            for worker in workers:
+                self.add_worker(worker.user_id, worker.worker_type)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "indexed_orders": len(self._order_entries),
+                "indexed_workers": len(self._worker_entries),
+                "workers_by_type": {t: n for t, n in self._pool_sizes.items() if n},
+            }
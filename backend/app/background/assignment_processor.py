@@ -1,11 +1,18 @@
-import random
 import threading
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
 from app.dbrm import Session
 from app.core.database import get_db
 from app.crud import order, worker
 from app.core.enum import OrderStatus, WorkerAvailabilityStatus
+from app.background.assignment_index import AssignmentIndex
+from app.background.matching import MatchingStrategy, PriorityMatching, get_matching_strategy
+from app.background.events import (
+    AssignmentEvent, EventBus, event_bus, ORDER_REJECTED, WORKER_FREED,
+    publish_order_rejected
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +23,26 @@ _background_processor = None
 class AssignmentProcessor:
     """Unified background processor for automatic order assignment to available workers"""
     
-    def __init__(self, interval_seconds: int = 30):
+    def __init__(self, interval_seconds: int = 300, bus: EventBus = None, batch_size: int = 200,
+                 strategy: MatchingStrategy = None):
+        # Events are matched as they arrive; the sweep over the whole table
+        # only runs every interval_seconds to catch anything the bus missed
         self.interval_seconds = interval_seconds
+        # Orders matched per write (one transaction of compare-and-set claims per batch)
+        self.batch_size = batch_size
+        self.index = AssignmentIndex()
+        self.strategy = strategy or PriorityMatching()
+        # Set until the index has been loaded, and again whenever a write fails
+        self._index_stale = True
+        self.bus = bus or event_bus
         self.running = False
         self.thread = None
+        self.events_handled = 0
+        self.sweeps = 0
+        # The processor thread and request threads (trigger_assignment, the admin
+        # run) share the index, the strategy and _index_stale; one sync/match/apply
+        # runs at a time
+        self._lock = threading.RLock()
         self._stop_event = threading.Event()
     
     def start(self):
@@ -39,6 +62,7 @@ class AssignmentProcessor:
         
         self.running = False
         self._stop_event.set()
+        self.bus.wake()
         if self.thread:
             self.thread.join(timeout=5)
     
@@ -47,27 +71,131 @@ class AssignmentProcessor:
         return self.running
     
     def _run_processor(self):
-        """Main processor loop"""
+        """Main processor loop: handle events as they arrive, sweep on the interval"""
+        # Sweep once on start for anything left pending while no processor ran
+        next_sweep = time.monotonic()
         while self.running and not self._stop_event.is_set():
+            timeout = max(0.0, next_sweep - time.monotonic())
+            events = self.bus.wait(timeout)
+            if self._stop_event.is_set():
+                break
+            
             try:
-                # Use the database session with proper context management
-                for db in get_db():
-                    # Process pending assignments
-                    result = self.process_pending_assignments(db)
-                    
-                    # Log only significant assignment activity (5+ orders)
-                    if result >= 5:
-                        logger.info(f"Assignment processor assigned {result} pending orders")
-                    
-                    # Also handle any stale assignments (assigned but not accepted)
-                    self._handle_stale_assignments(db)
-                    break  # Only process once per iteration
+                if events:
+                    for db in get_db():
+                        self.handle_events(db, events)
+                        break
+                
+                if time.monotonic() >= next_sweep:
+                    for db in get_db():
+                        self._sweep(db)
+                        break
+                    next_sweep = time.monotonic() + self.interval_seconds
                 
             except Exception as e:
                 logger.error(f"Assignment processor error: {e}")
-            
-            # Wait for next interval or stop signal
-            self._stop_event.wait(self.interval_seconds)
+    
+    def _sweep(self, db: Session):
+        """Safety net: match everything pending and reset stale assignments"""
+        with self._lock:
+            self.sweeps += 1
+            result = self.process_pending_assignments(db)
+        
+            # Log only significant assignment activity (5+ orders)
+            if result >= 5:
+                logger.info(f"Assignment processor assigned {result} pending orders")
+        
+            # Also handle any stale assignments (assigned but not accepted)
+            self._handle_stale_assignments(db)
+    
+    def handle_events(self, db: Session, events: List[AssignmentEvent]) -> int:
+        """
+        Apply a burst of events to the index and match what it makes possible.
+        Only the orders and workers named by the events are read. An order that
+        was rejected is kept away from the worker that let it go when anyone
+        else is free.
+        Returns the number of orders assigned.
+        """
+        with self._lock:
+            self.events_handled += len(events)
+            if self._index_stale:
+                self.sync_index(db)
+            order_ids = list(dict.fromkeys(e.order_id for e in events if e.order_id and e.kind != WORKER_FREED))
+            worker_ids = list(dict.fromkeys(e.worker_id for e in events if e.worker_id and e.kind == WORKER_FREED))
+            exclude: Dict[str, Set[str]] = {}
+            for event in events:
+                if event.kind == ORDER_REJECTED and event.order_id and event.worker_id:
+                    exclude.setdefault(event.order_id, set()).add(event.worker_id)
+                    self.strategy.record_rejection(event.worker_id)
+        
+            if order_ids:
+                pending = order.get_pending_orders(db, order_ids=order_ids)
+                for order_obj in pending:
+                    self.index.add_order(order_obj)
+                for order_id in set(order_ids) - {o.order_id for o in pending}:
+                    self.index.remove_order(order_id)
+            if worker_ids:
+                for worker_obj in worker.get_available_workers(db, worker_ids=worker_ids):
+                    self.index.add_worker(worker_obj.user_id, worker_obj.worker_type)
+        
+            assigned_count = self._assign_from_index(db, exclude)
+            if order_ids and self._refill_workers(db, order_ids):
+                assigned_count += self._assign_from_index(db, exclude)
+            return assigned_count
+    
+    def _refill_workers(self, db: Session, order_ids: List[str]) -> bool:
+        """
+        Re-read available workers for indexed orders that found nobody. The index
+        only hears about workers freed in this process, so others can be free in
+        the database. Returns whether any worker was added.
+        """
+        waiting = [order_id for order_id in order_ids if self.index.has_order(order_id)]
+        if not waiting:
+            return False
+        worker_types = {self.index.order_type(order_id) for order_id in waiting}
+        if None in worker_types:
+            available = worker.get_available_workers(db)
+        else:
+            available = [w for worker_type in worker_types for w in worker.get_available_workers(db, worker_type=worker_type)]
+        added = False
+        for worker_obj in available:
+            if not self.index.has_worker(worker_obj.user_id):
+                self.index.add_worker(worker_obj.user_id, worker_obj.worker_type)
+                added = True
+        return added
+    
+    def _assign_from_index(self, db: Session, exclude: Optional[Dict[str, Set[str]]] = None) -> int:
+        """Pop batches of matches off the index and write each with assign_batch"""
+        assigned_count = 0
+        while True:
+            assignments = self.strategy.match(db, self.index, self.batch_size, exclude)
+            if not assignments:
+                break
+            applied = self._apply(db, assignments)
+            assigned_count += len(applied)
+            # A short batch drained the index, unless conflicts put orders or workers back
+            if len(assignments) < self.batch_size and len(applied) == len(assignments):
+                break
+        return assigned_count
+    
+    def _apply(self, db: Session, assignments: Dict[str, str]) -> Dict[str, str]:
+        try:
+            applied = order.assign_batch(db, assignments)
+        except Exception:
+            # Nothing was written; reload the popped orders and workers on next use
+            self._index_stale = True
+            raise
+        # A pair that did not apply lost its order or its worker to someone else
+        # (another process, an accept, a reject); put back whichever is still free
+        failed = {order_id: worker_id for order_id, worker_id in assignments.items() if order_id not in applied}
+        if failed:
+            for order_obj in order.get_pending_orders(db, order_ids=list(failed)):
+                if order_obj.worker_id is None:
+                    self.index.add_order(order_obj)
+            for worker_obj in worker.get_available_workers(db, worker_ids=list(failed.values())):
+                self.index.add_worker(worker_obj.user_id, worker_obj.worker_type)
+        self.strategy.record_assignments(applied)
+        return applied
     
     def _handle_stale_assignments(self, db: Session):
         """Handle orders that have been assigned but not accepted for too long"""
@@ -77,69 +205,64 @@ class AssignmentProcessor:
         try:
             stale_orders = order.get_stale_assigned_orders(db, cutoff_time=stale_cutoff)
             
-            if stale_orders:
-                logger.info(f"Processing {len(stale_orders)} stale assignments")
-                
-            for stale_order in stale_orders:
-                # Reset to pending and let the system reassign
-                order.update_order_assignment(db, order_id=stale_order.order_id, worker_id=None, status=OrderStatus.PENDING_ASSIGNMENT)
-                # Free up the worker if they were marked as busy
-                if stale_order.worker_id:
-                    worker.update_availability(db, worker_id=stale_order.worker_id, status=WorkerAvailabilityStatus.AVAILABLE)
+            if not stale_orders:
+                return
+            logger.info(f"Processing {len(stale_orders)} stale assignments")
+            
+            # Reset to pending and let the system reassign
+            reset_ids = set(order.reset_stale_assignments(db, [o.order_id for o in stale_orders], cutoff_time=stale_cutoff))
+            # Free up the workers of the orders that were actually reset
+            worker_ids = [o.worker_id for o in stale_orders if o.order_id in reset_ids and o.worker_id]
+            if worker_ids:
+                worker.update_availability_many(db, worker_ids, status=WorkerAvailabilityStatus.AVAILABLE)
+            
+            # Reassign right away, away from the worker that let it go stale
+            for o in stale_orders:
+                if o.order_id in reset_ids:
+                    publish_order_rejected(o.order_id, worker_id=o.worker_id)
                 
         except Exception as e:
             logger.error(f"Error handling stale assignments: {e}")
     
-    def trigger_assignment(self, db: Session, order_id: str) -> bool:
-        """Ultra-simple random assignment - no separate tracking needed"""
-        order_obj = order.get_by_order_id(db, order_id)
-        if not order_obj or order_obj.status != OrderStatus.PENDING_ASSIGNMENT:
-            return False
-        
-        # Find all available workers
-        available_workers = worker.get_available_workers(db)
-        
-        if not available_workers:
-            # No workers available - order remains in PENDING_ASSIGNMENT
-            # It will be processed when workers become available or by background processor
-            return False
-        
-        # Random selection
-        selected_worker = random.choice(available_workers)
-        
-        # Update order: assign worker, set status to assigned  
-        order.update_order_assignment(db, order_id=order_id, worker_id=selected_worker.user_id, status=OrderStatus.ASSIGNED)
+    def trigger_assignment(self, db: Session, order_id: str, exclude_worker_ids: Optional[List[str]] = None) -> bool:
+        """Assign one order right away, ahead of its place in the queue"""
+        with self._lock:
+            if self._index_stale:
+                self.sync_index(db)
+            pending = order.get_pending_orders(db, order_ids=[order_id])
+            if not pending:
+                self.index.remove_order(order_id)
+                return False
         
-        # Update worker's availability status
-        worker.update_availability(db, worker_id=selected_worker.user_id, status=WorkerAvailabilityStatus.BUSY)
+            self.index.add_order(pending[0])
+            exclude = set(exclude_worker_ids) if exclude_worker_ids else None
+            worker_id = self.index.match_order(order_id, exclude)
+            if worker_id is None and self._refill_workers(db, [order_id]):
+                worker_id = self.index.match_order(order_id, exclude)
+            if worker_id is None:
+                # No workers available - order remains in PENDING_ASSIGNMENT
+                # It will be processed when workers become available or by background processor
+                return False
         
-        return True
+            # Assign the order and mark the worker busy in one transaction
+            return bool(self._apply(db, {order_id: worker_id}))
+    
+    def sync_index(self, db: Session) -> None:
+        """Rebuild the index from every pending order and available worker"""
+        with self._lock:
+            self.index.rebuild(order.get_pending_orders(db), worker.get_available_workers(db))
+            self._index_stale = False
     
     def process_pending_assignments(self, db: Session) -> int:
         """
         Process all pending order assignments and try to assign them to available workers.
+        Re-reads the index from the database, then matches expedited orders first,
+        oldest start_time next, fewest assignment attempts last.
         Returns the number of orders successfully assigned.
         """
-        # Get all orders in PENDING_ASSIGNMENT status, prioritizing expedited orders
-        pending_orders = order.get_orders_by_status(db, status=OrderStatus.PENDING_ASSIGNMENT)
-        
-        if not pending_orders:
-            return 0
-        
-        # Sort pending orders by start_time
-        sorted_orders = sorted(pending_orders, key=lambda o: o.start_time)
-        
-        assigned_count = 0
-        
-        for order_obj in sorted_orders:
-            # Try to assign each pending order
-            if self.trigger_assignment(db, order_obj.order_id):
-                assigned_count += 1
-            else:
-                # No more available workers, stop processing
-                break
-        
-        return assigned_count
+        with self._lock:
+            self.sync_index(db)
+            return self._assign_from_index(db)
     
     def get_assignment_statistics(self, db: Session) -> dict:
         """
@@ -150,6 +273,8 @@ class AssignmentProcessor:
         busy_workers = worker.get_all_workers(db, status=WorkerAvailabilityStatus.BUSY)
         
         expedited_pending = [o for o in pending_orders if o.expedite_flag]
+        with self._lock:
+            index_status = self.index.status()
         
         return {
             "pending_orders": len(pending_orders),
@@ -157,7 +282,12 @@ class AssignmentProcessor:
             "available_workers": len(available_workers),
             "busy_workers": len(busy_workers),
             "assignment_capacity": len(available_workers) > 0,
-            "background_processor_running": self.is_running()
+            "background_processor_running": self.is_running(),
+            "matching_strategy": self.strategy.name,
+            **index_status,
+            "events_handled": self.events_handled,
+            "sweeps": self.sweeps,
+            **self.bus.status()
         }
 
 
@@ -170,10 +300,15 @@ def get_assignment_processor() -> AssignmentProcessor:
     return _background_processor
 
 
-def start_background_processor(interval_seconds: int = 30):
+def start_background_processor(interval_seconds: int = 300, batch_size: Optional[int] = None,
+                               strategy: Optional[str] = None):
     """Start the global background assignment processor"""
     processor = get_assignment_processor()
     processor.interval_seconds = interval_seconds
+    if batch_size is not None:
+        processor.batch_size = batch_size
+    if strategy is not None and strategy != processor.strategy.name:
+        processor.strategy = get_matching_strategy(strategy)
     processor.start()
 
 
@@ -191,9 +326,9 @@ def is_background_processor_running() -> bool:
 
 
 # Convenience functions for backward compatibility
-def trigger_assignment(db: Session, order_id: str) -> bool:
+def trigger_assignment(db: Session, order_id: str, exclude_worker_ids: Optional[List[str]] = None) -> bool:
     """Trigger assignment for a specific order"""
-    return get_assignment_processor().trigger_assignment(db, order_id)
+    return get_assignment_processor().trigger_assignment(db, order_id, exclude_worker_ids=exclude_worker_ids)
 
 
 def process_pending_assignments(db: Session) -> int:
@@ -219,5 +354,10 @@ def get_processor_status() -> dict:
     return {
         "running": _background_processor.running,
         "interval_seconds": _background_processor.interval_seconds,
-        "initialized": True
+        "batch_size": _background_processor.batch_size,
+        "matching_strategy": _background_processor.strategy.name,
+        "initialized": True,
+        "events_handled": _background_processor.events_handled,
+        "sweeps": _background_processor.sweeps,
+        **_background_processor.bus.status()
     } 
\ No newline at end of file
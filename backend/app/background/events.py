@@ -0,0 +1,116 @@
+"""
+In-process event bus feeding the assignment processor.
+
+Services publish an event once their write is committed; the processor
+thread blocks on the bus and matches as soon as something changes, instead
+of polling the database on a fixed interval:
+
+- ORDER_CREATED:  a new order is waiting for a worker
+- ORDER_REJECTED: an order went back to pending (rejected or stale); the
+                  worker that had it is not offered it again right away
+- ORDER_UPDATED:  a pending order's priority changed (e.g. expedited)
+- WORKER_FREED:   a worker was created or set AVAILABLE (published by the
+                  worker CRUD, so every availability write is seen)
+
+Events live only in this process. An order that finds no indexed worker
+re-reads the available workers from the database, which covers workers
+freed by other processes; anything else lost (a restart, another process's
+orders) is picked up by the processor's periodic sweep.
+"""
+import logging
+import queue
+import time
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order_created"
+ORDER_REJECTED = "order_rejected"
+ORDER_UPDATED = "order_updated"
+WORKER_FREED = "worker_freed"
+
+EVENT_KINDS = (ORDER_CREATED, ORDER_REJECTED, ORDER_UPDATED, WORKER_FREED)
+
+
+class AssignmentEvent(NamedTuple):
+    kind: str
+    order_id: Optional[str] = None
+    worker_id: Optional[str] = None
+    published_at: float = 0.0
+
+
+class EventBus:
+    """Thread-safe queue of assignment events with a single consumer"""
+
+    def __init__(self, maxsize: int = 10000):
+        self._queue: "queue.Queue[Optional[AssignmentEvent]]" = queue.Queue(maxsize=maxsize)
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, kind: str, order_id: Optional[str] = None, worker_id: Optional[str] = None) -> None:
+        """Queue an event; never blocks the publishing request"""
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown assignment event '{kind}', expected one of: {', '.join(EVENT_KINDS)}")
+        event = AssignmentEvent(kind, order_id, worker_id, time.monotonic())
+        try:
+            self._queue.put_nowait(event)
+            self.published += 1
+        except queue.Full:
+            # The sweep still finds the order or worker in the database
+            self.dropped += 1
+            logger.warning(f"Assignment event queue full, dropping {kind} event")
+
+    def wait(self, timeout: Optional[float]) -> List[AssignmentEvent]:
+        """
+        Block until at least one event arrives or timeout passes, then return
+        everything queued so a burst is handled in one pass
+        """
+        try:
+            first = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        events = [first]
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # None is the wake-up sentinel from wake()
+        return [event for event in events if event is not None]
+
+    def wake(self) -> None:
+        """Unblock a waiting consumer without an event"""
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def status(self) -> dict:
+        return {
+            "pending_events": self.pending(),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+# Global bus shared by the services and the assignment processor
+event_bus = EventBus()
+
+
+def publish_order_created(order_id: str) -> None:
+    event_bus.publish(ORDER_CREATED, order_id=order_id)
+
+
+def publish_order_rejected(order_id: str, worker_id: Optional[str] = None) -> None:
+    event_bus.publish(ORDER_REJECTED, order_id=order_id, worker_id=worker_id)
+
+
+def publish_order_updated(order_id: str) -> None:
+    event_bus.publish(ORDER_UPDATED, order_id=order_id)
+
+
+def publish_worker_freed(worker_id: str) -> None:
+    event_bus.publish(WORKER_FREED, worker_id=worker_id)
@@ -0,0 +1,330 @@
+"""
+Matching strategies for the assignment processor.
+
+- priority: pops orders off the AssignmentIndex in priority order and gives
+  each the longest-idle worker of a fitting type. Cheapest, no extra reads.
+- optimal:  takes a batch of top orders and every available worker, builds a
+  NumPy cost matrix and solves it as a linear assignment problem, so the
+  best workers go to the most urgent orders instead of whoever is next.
+
+The optimal cost of giving order i to worker j is
+
+    cost[i, j] = worker_cost[j] - priority[i]  (+ penalties)
+
+    worker_cost = rating_weight * (5 - rating) / 4
+                  + rejection_weight * recent rejection rate
+                  + load_weight * recent assignments / max
+    priority    = expedite_weight * expedited + age_weight * age / max_age
+
+Minimizing the sum picks the best-rated, most reliable, least loaded workers
+when workers outnumber orders, and serves the highest-priority orders when
+orders outnumber workers. A worker of the wrong worker_type is never chosen;
+a worker the order was just taken from is only chosen when nothing else fits.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.dbrm import Session
+from app.crud import order
+from app.background.assignment_index import AssignmentIndex, IndexedOrder
+
+# Cost of a pair that must not be assigned; dropped from the solution
+FORBIDDEN = 1e9
+
+
+def _augment(cost: np.ndarray, v: np.ndarray, tol: float, col4row: np.ndarray, row4col: np.ndarray) -> None:
+    """
+    Match every unmatched row of a wide cost matrix by a shortest augmenting
+    path, updating the column potentials v and the matching in place
+    """
+    n_cols = cost.shape[1]
+    u = (cost - v).min(axis=1)
+    path = np.full(n_cols, -1, dtype=np.int64)
+
+    for cur_row in np.nonzero(col4row == -1)[0]:
+        shortest = np.full(n_cols, np.inf)
+        remaining = np.arange(n_cols)
+        visited_rows: List[int] = []
+        visited_cols: List[int] = []
+        min_val = 0.0
+        i = cur_row
+        sink = -1
+        while sink == -1:
+            visited_rows.append(i)
+            reduced = min_val + cost[i, remaining] - u[i] - v[remaining]
+            current = shortest[remaining]
+            better = reduced < current
+            if better.any():
+                shortest[remaining[better]] = reduced[better]
+                path[remaining[better]] = i
+                current = np.where(better, reduced, current)
+            k = int(np.argmin(current))
+            lowest = current[k]
+            j = remaining[k]
+            if row4col[j] != -1:
+                # Among (near) equally short columns a free one ends the search now
+                ties = np.nonzero(current <= lowest + tol)[0]
+                free = ties[row4col[remaining[ties]] == -1]
+                if free.size:
+                    k = int(free[0])
+                    j = remaining[k]
+            min_val = lowest
+            visited_cols.append(j)
+            remaining = np.delete(remaining, k)
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = row4col[j]
+
+        # Update the potentials of everything the search touched, then flip the path
+        u[cur_row] += min_val
+        rows = np.array(visited_rows[1:], dtype=np.int64)
+        if rows.size:
+            u[rows] += min_val - shortest[col4row[rows]]
+        cols = np.array(visited_cols, dtype=np.int64)
+        v[cols] -= min_val - shortest[cols]
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+
+def linear_assignment(cost) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-cost assignment of rows to columns of a (possibly rectangular)
+    cost matrix: min(n_rows, n_cols) pairs, each row and column used once.
+    Returns (rows, cols) sorted by row.
+
+    Shortest augmenting paths with dual potentials (Jonker-Volgenant style,
+    as in scipy.optimize.linear_sum_assignment); each step of a path search
+    relaxes all remaining columns at once with NumPy.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError("Cost matrix must be two-dimensional")
+    if not np.isfinite(cost).all():
+        raise ValueError("Cost matrix must be finite")
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n_rows, n_cols = cost.shape
+    if n_rows == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    colmin = cost.min(axis=0)
+    # Ties are judged on the scale of the feasible costs; FORBIDDEN entries would
+    # inflate it until real cost differences passed for ties
+    feasible = np.abs(cost[cost < FORBIDDEN])
+    tol = 1e-12 * max(1.0, float(feasible.max(initial=0.0)))
+
+    # Column reduction: the n_rows cheapest columns start with a negative
+    # potential, so rows spread over them instead of all chasing the same few
+    threshold = np.partition(colmin, n_rows - 1)[n_rows - 1]
+    v = np.minimum(colmin - threshold, 0.0)
+    col4row = np.full(n_rows, -1, dtype=np.int64)
+    row4col = np.full(n_cols, -1, dtype=np.int64)
+    _augment(cost, v, tol, col4row, row4col)
+
+    # The matching is optimal once every unused column has the highest potential.
+    # Otherwise cap the potentials there and rematch the rows that lost their column;
+    # unused columns are never touched by a search, so one pass settles it.
+    unused = row4col == -1
+    if unused.any():
+        floor = v[unused].min()
+        lowered = v > floor
+        if lowered.any():
+            v[lowered] = floor
+            col4row[row4col[lowered & ~unused]] = -1
+            row4col[lowered] = -1
+            _augment(cost, v, tol, col4row, row4col)
+
+    rows, cols = np.arange(n_rows), col4row
+    if transposed:
+        order_by_row = np.argsort(cols)
+        rows, cols = cols[order_by_row], rows[order_by_row]
+    return rows, cols
+
+
+class RejectionTracker:
+    """Assignments offered to and given back by each worker over a rolling window"""
+
+    def __init__(self, window_seconds: float = 7 * 24 * 3600):
+        self.window_seconds = window_seconds
+        self._offers: Dict[str, Deque[float]] = {}
+        self._rejections: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, table: Dict[str, Deque[float]], worker_id: str) -> None:
+        with self._lock:
+            table.setdefault(worker_id, deque()).append(time.monotonic())
+
+    def record_offer(self, worker_id: str) -> None:
+        self._record(self._offers, worker_id)
+
+    def record_rejection(self, worker_id: str) -> None:
+        self._record(self._rejections, worker_id)
+
+    def _count(self, table: Dict[str, Deque[float]], worker_id: str, cutoff: float) -> int:
+        events = table.get(worker_id)
+        if not events:
+            return 0
+        while events and events[0] < cutoff:
+            events.popleft()
+        return len(events)
+
+    def rates(self, worker_ids: List[str]) -> np.ndarray:
+        """Share of recent offers each worker gave back, 0 for workers without offers"""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            counts = np.array([
+                (self._count(self._rejections, worker_id, cutoff), self._count(self._offers, worker_id, cutoff))
+                for worker_id in worker_ids
+            ], dtype=np.float64).reshape(-1, 2)
+        rejected, offered = counts[:, 0], counts[:, 1]
+        return np.divide(rejected, np.maximum(offered, rejected), out=np.zeros(len(worker_ids)),
+                         where=rejected > 0)
+
+
+class MatchingStrategy:
+    """Chooses which indexed orders go to which indexed workers"""
+
+    name = ""
+
+    def __init__(self):
+        self.rejections = RejectionTracker()
+
+    def match(self, db: Session, index: AssignmentIndex, limit: int,
+              exclude: Optional[Dict[str, Set[str]]] = None) -> Dict[str, str]:
+        """Take up to limit assignments out of the index; returns order_id -> worker_id"""
+        raise NotImplementedError
+
+    def record_assignments(self, assignments: Dict[str, str]) -> None:
+        for worker_id in assignments.values():
+            self.rejections.record_offer(worker_id)
+
+    def record_rejection(self, worker_id: str) -> None:
+        self.rejections.record_rejection(worker_id)
+
+
+class PriorityMatching(MatchingStrategy):
+    """Greedy: highest-priority order first, longest-idle fitting worker"""
+
+    name = "priority"
+
+    def match(self, db, index, limit, exclude=None):
+        return index.match(limit, exclude)
+
+
+class CostMatrixMatching(MatchingStrategy):
+    """Optimal batch assignment over an order priority / worker cost matrix"""
+
+    name = "optimal"
+
+    def __init__(self, rating_weight: float = 1.0, rejection_weight: float = 1.0, load_weight: float = 0.5,
+                 expedite_weight: float = 2.0, age_weight: float = 1.0, exclude_penalty: float = 1e4,
+                 load_window_hours: float = 24.0, stats_ttl: float = 60.0):
+        """
+        Args:
+            rating_weight, rejection_weight, load_weight: Share of each in a worker's cost
+            expedite_weight, age_weight: Share of each in an order's priority
+            exclude_penalty: Added to an order's pairing with a worker it was taken from
+            load_window_hours: Assignments counted as current load
+            stats_ttl: Seconds ratings and loads are reused before they are read again
+        """
+        super().__init__()
+        self.rating_weight = rating_weight
+        self.rejection_weight = rejection_weight
+        self.load_weight = load_weight
+        self.expedite_weight = expedite_weight
+        self.age_weight = age_weight
+        self.exclude_penalty = exclude_penalty
+        self.load_window = timedelta(hours=load_window_hours)
+        self.stats_ttl = stats_ttl
+        self._stats: Tuple[Dict[str, float], Dict[str, int]] = ({}, {})
+        self._stats_read_at: Optional[float] = None
+
+    def worker_stats(self, db: Session) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """(average rating, recent assignments) per worker, from two grouped queries"""
+        now = time.monotonic()
+        if self._stats_read_at is None or now - self._stats_read_at >= self.stats_ttl:
+            self._stats = (
+                order.get_average_ratings_by_worker(db),
+                order.count_assignments_by_worker(db, since=datetime.now() - self.load_window),
+            )
+            self._stats_read_at = now
+        return self._stats
+
+    def worker_costs(self, worker_ids: List[str], ratings: Dict[str, float], loads: Dict[str, int]) -> np.ndarray:
+        """Cost of using each worker; lower is better"""
+        # Workers without ratings count as average
+        rating = np.array([ratings.get(worker_id, 3.0) for worker_id in worker_ids], dtype=np.float64)
+        load = np.array([loads.get(worker_id, 0) for worker_id in worker_ids], dtype=np.float64)
+        rating_cost = np.clip((5.0 - rating) / 4.0, 0.0, 1.0)
+        load_cost = load / load.max() if load.size and load.max() > 0 else np.zeros(len(worker_ids))
+        return (self.rating_weight * rating_cost
+                + self.rejection_weight * self.rejections.rates(worker_ids)
+                + self.load_weight * load_cost)
+
+    def order_priorities(self, orders: List[IndexedOrder], now: datetime) -> np.ndarray:
+        expedited = np.array([item.expedited for item in orders], dtype=np.float64)
+        age = np.array([max((now - item.start_time).total_seconds(), 0.0) if item.start_time != datetime.max else 0.0
+                        for item in orders], dtype=np.float64)
+        age_norm = age / age.max() if age.size and age.max() > 0 else np.zeros(len(orders))
+        return self.expedite_weight * expedited + self.age_weight * age_norm
+
+    def cost_matrix(self, orders: List[IndexedOrder], workers: List[Tuple[str, str]], worker_costs: np.ndarray,
+                    exclude: Optional[Dict[str, Set[str]]] = None, now: Optional[datetime] = None) -> np.ndarray:
+        priorities = self.order_priorities(orders, now or datetime.now())
+        cost = worker_costs[None, :] - priorities[:, None]
+
+        worker_types = np.array([worker_type for _, worker_type in workers], dtype=object)
+        for row, item in enumerate(orders):
+            if item.worker_type is not None:
+                cost[row, worker_types != item.worker_type] = FORBIDDEN
+        if exclude:
+            column = {worker_id: col for col, (worker_id, _) in enumerate(workers)}
+            for row, item in enumerate(orders):
+                for worker_id in exclude.get(item.order_id, ()):
+                    col = column.get(worker_id)
+                    if col is not None and cost[row, col] < FORBIDDEN:
+                        cost[row, col] += self.exclude_penalty
+        return cost
+
+    def match(self, db, index, limit, exclude=None):
+        orders = index.pop_orders(limit)
+        workers = index.workers()
+        if not orders or not workers:
+            index.restore_orders(orders)
+            return {}
+
+        ratings, loads = self.worker_stats(db)
+        worker_ids = [worker_id for worker_id, _ in workers]
+        cost = self.cost_matrix(orders, workers, self.worker_costs(worker_ids, ratings, loads), exclude)
+        rows, cols = linear_assignment(cost)
+
+        assignments = {}
+        for row, col in zip(rows, cols):
+            if cost[row, col] < FORBIDDEN:
+                assignments[orders[row].order_id] = worker_ids[col]
+                index.remove_worker(worker_ids[col])
+        index.restore_orders(item for item in orders if item.order_id not in assignments)
+        return assignments
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (PriorityMatching, CostMatrixMatching)}
+
+
+def get_matching_strategy(name: str) -> MatchingStrategy:
+    """A new matching strategy by name"""
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        raise ValueError(f"Unknown matching strategy '{name}', expected one of: {', '.join(STRATEGIES)}")
+    return strategy()
@@ -21,4 +21,13 @@ class Settings(BaseSettings):
     DB_UID: str = os.getenv("UID", "")
     DB_PWD: str = os.getenv("PWD", "")
 
+    # Seconds reference-data queries (car types, wage rates) may be served from the result cache
+    REFERENCE_CACHE_TTL: int = int(os.getenv("REFERENCE_CACHE_TTL", "600"))
+
+    # Request instrumentation
+    # Warn when one statement shape runs more than this many times in a request
+    DB_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+    # Most recent requests per route kept for the rolling route statistics
+    ROUTE_STATS_WINDOW: int = int(os.getenv("ROUTE_STATS_WINDOW", "500"))
+
 settings = Settings()
@@ -5,5 +5,12 @@ from app.dbrm import Session, Engine
 engine = Engine.from_env()
 
 def get_db() -> Generator:
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+    # Request-scoped unit of work: writes flush at commit, lookups reuse loaded objects
+    with Session(engine, unit_of_work=True) as session:
+        yield session
+
+def get_read_db() -> Generator:
+    # Reports and analytics: served by a read replica when one is configured and
+    # caught up, by the primary otherwise; writes raise ValueError
+    with Session(engine, unit_of_work=True, readonly=True) as session:
+        yield session
@@ -10,6 +10,8 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
+from app.dbrm.pagination import InvalidCursor
+
 logger = logging.getLogger(__name__)
 
 # Standard error response models with Pydantic for better validation and docs
@@ -59,6 +61,17 @@ def add_exception_handlers(app):
             ).dict(),
         )
 
+    @app.exception_handler(InvalidCursor)
+    async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+        """Handle malformed or tampered pagination cursors"""
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=ErrorResponse(
+                error=str(exc),
+                path=request.url.path
+            ).dict(),
+        )
+
     @app.exception_handler(HTTPException)
     async def http_exception_handler(request: Request, exc: HTTPException):
         """Handle standard HTTP exceptions"""
@@ -0,0 +1,165 @@
+"""
+Per-request database instrumentation middleware.
+
+Every HTTP request gets a fresh dbrm RequestStats. When the response starts,
+the totals are added as a Server-Timing header:
+
+    Server-Timing: db;dur=12.4;desc="7 queries, 130 rows", hydrate;dur=1.9, app;dur=25.0
+
+When the request finishes they are folded into rolling per-route aggregates
+(route_stats, keyed on method and route template), and any statement shape
+run more than DB_N_PLUS_ONE_THRESHOLD times is logged as a likely N+1.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.dbrm import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class RequestSample(NamedTuple):
+    duration_ms: float
+    db_ms: float
+    statements: int
+    rows: int
+    hydration_ms: float
+    n_plus_one: bool
+    error: bool
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)]
+
+
+class RouteStats:
+    """Rolling window of request samples per route"""
+
+    SORT_KEYS = ("total_db_ms", "avg_db_ms", "p95_ms", "avg_statements", "n_plus_one_requests")
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, Deque[RequestSample]] = {}
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, sample: RequestSample) -> None:
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self.window)
+            samples.append(sample)
+            self._requests[route] = self._requests.get(route, 0) + 1
+
+    def summary(self) -> List[Dict]:
+        """Aggregates for every route seen, over each route's window"""
+        with self._lock:
+            snapshot = {route: list(samples) for route, samples in self._samples.items()}
+            requests = dict(self._requests)
+        summaries = []
+        for route, samples in snapshot.items():
+            count = len(samples)
+            db_ms = [sample.db_ms for sample in samples]
+            summaries.append({
+                "route": route,
+                "requests": requests[route],
+                "window": count,
+                "avg_ms": round(sum(sample.duration_ms for sample in samples) / count, 2),
+                "p95_ms": round(_p95([sample.duration_ms for sample in samples]), 2),
+                "avg_db_ms": round(sum(db_ms) / count, 2),
+                "p95_db_ms": round(_p95(db_ms), 2),
+                "total_db_ms": round(sum(db_ms), 2),
+                "avg_statements": round(sum(sample.statements for sample in samples) / count, 2),
+                "max_statements": max(sample.statements for sample in samples),
+                "avg_rows": round(sum(sample.rows for sample in samples) / count, 2),
+                "avg_hydration_ms": round(sum(sample.hydration_ms for sample in samples) / count, 2),
+                "n_plus_one_requests": sum(1 for sample in samples if sample.n_plus_one),
+                "error_requests": sum(1 for sample in samples if sample.error),
+            })
+        return summaries
+
+    def worst(self, limit: int = 10, order_by: str = "total_db_ms") -> List[Dict]:
+        """The limit routes with the highest order_by aggregate"""
+        if order_by not in self.SORT_KEYS:
+            raise ValueError(f"order_by must be one of: {', '.join(self.SORT_KEYS)}")
+        return sorted(self.summary(), key=lambda item: item[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+
+
+route_stats = RouteStats(window=settings.ROUTE_STATS_WINDOW)
+
+
+def server_timing(stats: "instrumentation.RequestStats", elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} queries, {stats.rows} rows", '
+        f'hydrate;dur={stats.hydration_time * 1000:.1f}, '
+        f'app;dur={elapsed * 1000:.1f}'
+    )
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting database stats for each HTTP request"""
+
+    def __init__(self, app, threshold: int = None, stats: RouteStats = None):
+        self.app = app
+        self.threshold = settings.DB_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        self.stats = stats or route_stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = instrumentation.begin()
+        stats = instrumentation.current()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            instrumentation.end(token)
+            self._finish(scope, stats, elapsed, status_code)
+
+    def _finish(self, scope, stats, elapsed: float, status_code: int) -> None:
+        # Only matched routes are aggregated, so arbitrary paths cannot grow the table
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return
+        route_key = f"{scope['method']} {path}"
+
+        repeated = stats.repeated(self.threshold) if self.threshold > 0 else []
+        for sql, count in repeated[:3]:
+            logger.warning(f"Possible N+1 on {route_key}: statement ran {count} times: {sql}")
+
+        self.stats.add(route_key, RequestSample(
+            duration_ms=elapsed * 1000,
+            db_ms=stats.db_time * 1000,
+            statements=stats.statements,
+            rows=stats.rows,
+            hydration_ms=stats.hydration_time * 1000,
+            n_plus_one=bool(repeated),
+            error=status_code >= 500,
+        ))
@@ -27,12 +27,17 @@ def startup_background_services():
         logger.error(f"Failed to start earnings scheduler: {e}")
     
     # Start assignment processor
-    # Get interval from environment variable or default to 30 seconds
-    interval = int(os.getenv("ASSIGNMENT_PROCESSOR_INTERVAL", "30"))
+    # Orders are matched from events as they happen; the interval only sets how
+    # often the safety-net sweep re-reads every pending order (default 5 minutes)
+    interval = int(os.getenv("ASSIGNMENT_PROCESSOR_INTERVAL", "300"))
+    # Pending orders matched per read/write round
+    batch_size = int(os.getenv("ASSIGNMENT_BATCH_SIZE", "200"))
+    # "priority" (greedy) or "optimal" (cost-matrix assignment per batch)
+    strategy = os.getenv("ASSIGNMENT_STRATEGY", "priority")
     
     try:
-        result = start_background_assignment_processor(interval_seconds=interval)
-        logger.info(f"Assignment processor started with {interval}s interval - {result.get('pending_orders', 0)} pending orders, {result.get('available_workers', 0)} available workers")
+        result = start_background_assignment_processor(interval_seconds=interval, batch_size=batch_size, strategy=strategy)
+        logger.info(f"Assignment processor started with {interval}s sweep interval - {result.get('pending_orders', 0)} pending orders, {result.get('available_workers', 0)} available workers")
     except Exception as e:
         logger.error(f"Failed to start assignment processor: {e}")
 
@@ -57,17 +62,18 @@ def shutdown_background_services():
 
 
 # Assignment system management functions
-def start_background_assignment_processor(interval_seconds: int = 30) -> dict:
+def start_background_assignment_processor(interval_seconds: int = 300, batch_size: int = 200,
+                                          strategy: str = "priority") -> dict:
     """
     Start the background assignment processor.
     Returns current assignment statistics.
     """
-    start_background_processor(interval_seconds)
+    start_background_processor(interval_seconds, batch_size=batch_size, strategy=strategy)
     
     # Return current status
     for db in get_db():
         stats = get_assignment_statistics(db)
-        stats["message"] = f"Assignment processor started with {interval_seconds}s interval"
+        stats["message"] = f"Assignment processor started with {interval_seconds}s sweep interval"
         return stats
 
 
@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from app.dbrm import Session, Condition
+from app.dbrm import Session, Condition, paginate
 
 from app.models import AuditLog as AuditLogModel
 from app.schemas import AuditLog, AuditLogSummary
@@ -10,6 +10,9 @@ import json
 
 
 class CRUDAuditLog:
+    # Keyset pagination columns for the cursor-aware list methods
+    cursor_fields = ('timestamp', 'audit_id')
+
     def create_audit_entry(
         self,
         db: Session,
@@ -46,34 +49,35 @@ class CRUDAuditLog:
         
         db.add(audit_entry)
         db.commit()
-        db.refresh(audit_entry)
 
         audit_entry.old_values = json.loads(audit_entry.old_values) if audit_entry.old_values else None
         audit_entry.new_values = json.loads(audit_entry.new_values) if audit_entry.new_values else None
         return AuditLog.model_validate(audit_entry)
     
     def get_audit_trail_for_record(
-        self, db: Session, record_id: str, skip: int = 0, limit: int = 100
+        self, db: Session, record_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[AuditLog]:
         """Get audit trail for a specific record"""
-        objs = db.query(AuditLogModel).filter_by(
-            record_id=record_id
-        ).order_by_desc(AuditLogModel.timestamp).offset(skip).limit(limit).all()
+        query = db.query(AuditLogModel).filter_by(record_id=record_id)
+        objs = paginate(
+            query, (AuditLogModel.timestamp, AuditLogModel.audit_id), cursor, skip, limit, descending=True
+        ).all()
         
         if not objs:
             return []
         return [AuditLog.model_validate(obj) for obj in objs]
 
     def get_recent_changes(
-        self, db: Session, hours: int = 24, skip: int = 0, limit: int = 100
+        self, db: Session, hours: int = 24, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[AuditLog]:
         """Get recent changes within specified hours"""
         from datetime import timedelta
         since = datetime.now() - timedelta(hours=hours)
         
-        objs = db.query(AuditLogModel).filter(
-            Condition.gte(AuditLogModel.timestamp, since)
-        ).order_by_desc(AuditLogModel.timestamp).offset(skip).limit(limit).all()
+        query = db.query(AuditLogModel).filter(Condition.gte(AuditLogModel.timestamp, since))
+        objs = paginate(
+            query, (AuditLogModel.timestamp, AuditLogModel.audit_id), cursor, skip, limit, descending=True
+        ).all()
         
         if not objs:
             return []
@@ -104,19 +108,22 @@ class CRUDAuditLog:
         self, db: Session, start_date: datetime, end_date: datetime
     ) -> AuditLogSummary:
         """Get summary of changes in a date range"""
+        # Stream the rows so large date ranges don't load every audit entry at once
         objs = db.query(AuditLogModel).filter(
             Condition.gte(AuditLogModel.timestamp, start_date),
             Condition.lte(AuditLogModel.timestamp, end_date)
-        ).all()
+        ).yield_per(1000)
         
         summary = {
-            "total_changes": len(objs),
+            "total_changes": 0,
             "by_table": {},
             "by_operation": {},
             "by_user": {}
         }
         
         for obj in objs:
+            summary["total_changes"] += 1
+            
             # By table
             if obj.table_name not in summary["by_table"]:
                 summary["by_table"][obj.table_name] = 0
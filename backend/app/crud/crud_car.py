@@ -1,42 +1,44 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from app.dbrm import Session, func
+from app.dbrm import Session, func, paginate
+
+from app.core.config import settings
 
 from app.models import Car as CarModel, CarType as CarTypeModel
 from app.schemas import CarCreate, Car, CarUpdate, CarType
 
 
 class CRUDCar:
+    # Keyset pagination columns for the cursor-aware list methods
+    cursor_fields = ('car_id',)
+
     def get_by_car_id(self, db: Session, car_id: str) -> Optional[Car]:
         obj = db.query(CarModel).filter_by(car_id=car_id).first()
         if not obj:
             return None
         return Car.model_validate(obj)
 
-    def get_cars_by_customer(self, db: Session, customer_id: str, skip: int = 0, limit: int = 100) -> List[Car]:
-        objs = db.query(CarModel).filter_by(customer_id=customer_id).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Car.model_validate(obj) for obj in objs]
+    def prefetch(self, db: Session, car_ids: Iterable[str]) -> None:
+        """Queue cars so the get_by_car_id calls that follow share one batched query"""
+        db.prefetch(CarModel, car_ids)
+
+    def get_cars_by_customer(
+        self, db: Session, customer_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[Car]:
+        query = db.query(CarModel).filter_by(customer_id=customer_id)
+        return paginate(query, (CarModel.car_id,), cursor, skip, limit).all(schema=Car)
         
     def get_cars_by_type(self, db: Session, car_type: str, skip: int = 0, limit: int = 100) -> List[Car]:
-        objs = db.query(CarModel).filter_by(car_type=car_type).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Car.model_validate(obj) for obj in objs]
+        return db.query(CarModel).filter_by(car_type=car_type).offset(skip).limit(limit).all(schema=Car)
     
     def create_car_type(self, db: Session, obj_in: CarType) -> CarType:
         db_obj = CarTypeModel(car_type=obj_in.car_type)
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return CarType.model_validate(db_obj)
     
-    def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[Car]:
-        objs = db.query(CarModel).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Car.model_validate(obj) for obj in objs]
+    def get_multi(self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Car]:
+        return paginate(db.query(CarModel), (CarModel.car_id,), cursor, skip, limit).all(schema=Car)
     
     def create_car_with_owner(
         self, db: Session, *, obj_in: CarCreate, customer_id: str
@@ -48,7 +50,6 @@ class CRUDCar:
         )
         db.add(car)
         db.commit()
-        db.refresh(car)
         return Car.model_validate(car)
     
     def update(
@@ -57,23 +58,21 @@ class CRUDCar:
         """
         Update a car
         """
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            if hasattr(obj_old, field):
-                setattr(obj_old, field, value)
+        db_obj = db.query(CarModel).filter_by(car_id=obj_old.car_id).first()
+        if not db_obj:
+            raise ValueError("Car not found")
         
-        db_obj = CarModel(
-            car_id=obj_old.car_id,
-            customer_id=obj_old.customer_id,
-            car_type=obj_old.car_type
-        )
+        # Only the assigned columns that actually change are written
+        for field, value in obj_in.model_dump(exclude_unset=True).items():
+            if field in CarModel._columns:
+                setattr(db_obj, field, value)
         
         db.add(db_obj)
         db.commit()
-        db.refresh(obj_old)
         return Car.model_validate(db_obj)
     
     def get_all_car_types(self, db: Session) -> List[str]:
-        objs = db.query(CarTypeModel).all()
+        objs = db.query(CarTypeModel).cached(settings.REFERENCE_CACHE_TTL).all()
         if not objs:
             return []
         return [obj.car_type for obj in objs]
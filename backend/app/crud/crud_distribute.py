@@ -18,10 +18,7 @@ class CRUDDistribute:
     def get_distributions_by_worker(
         self, db: Session, worker_id: str, skip: int = 0, limit: int = 100
     ) -> List[Distribute]:
-        objs = db.query(DistributeModel).filter_by(worker_id=worker_id).order_by_desc(DistributeModel.distribute_time).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Distribute.model_validate(obj) for obj in objs]
+        return db.query(DistributeModel).filter_by(worker_id=worker_id).order_by_desc(DistributeModel.distribute_time).offset(skip).limit(limit).all(schema=Distribute)
     
     def get_distributions_by_worker_period(
         self, db: Session, worker_id: str, start_date: datetime, end_date: datetime
@@ -48,19 +45,32 @@ class CRUDDistribute:
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return Distribute.model_validate(db_obj)
     
+    def create_distributions(
+        self, db: Session, *, obj_in_list: List[DistributeCreate]
+    ) -> int:
+        """Record many distributions in one batched insert"""
+        from datetime import datetime
+        
+        now = datetime.now()
+        db_objs = [
+            DistributeModel(
+                amount=obj_in.amount,
+                worker_id=obj_in.worker_id,
+                distribute_time=now
+            )
+            for obj_in in obj_in_list
+        ]
+        return db.bulk_insert(DistributeModel, db_objs)
+    
     def get_total_payment_for_worker(self, db: Session, worker_id: str) -> Decimal:
         """Get total payment amount for a worker"""
         result = db.query(func.sum(DistributeModel.amount)).filter_by(worker_id=worker_id).scalar()
         return result if result else Decimal('0.0')
     
     def get_all_distributions(self, db: Session, skip: int = 0, limit: int = 100) -> List[Distribute]:
-        objs = db.query(DistributeModel).order_by(DistributeModel.distribute_time).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Distribute.model_validate(obj) for obj in objs]
+        return db.query(DistributeModel).order_by(DistributeModel.distribute_time).offset(skip).limit(limit).all(schema=Distribute)
 
     def get_labor_cost_breakdown_by_period(self, db: Session, start_date: datetime, end_date: datetime, period_type: str = "month") -> dict:
         """Get labor cost breakdown by period from distribute payments"""
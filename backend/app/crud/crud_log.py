@@ -1,14 +1,17 @@
-from typing import List
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
 
-from app.dbrm import Session, func
+from app.dbrm import Session, func, paginate
 
 from app.models import Log as LogModel
 from app.schemas import LogCreate, Log
 
 
 class CRUDLog:
+    # Keyset pagination columns for the cursor-aware list methods
+    cursor_fields = ('log_time', 'order_id')
+
     def get_logs_by_order(
         self, db: Session, order_id: str, skip: int = 0, limit: int = 100
     ) -> List[Log]:
@@ -20,11 +23,12 @@ class CRUDLog:
         return [Log.model_validate(obj) for obj in objs]
     
     def get_logs_by_worker(
-        self, db: Session, worker_id: str, skip: int = 0, limit: int = 100
+        self, db: Session, worker_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Log]:
-        objs = db.query(LogModel).filter_by(
-            worker_id=worker_id
-        ).order_by_desc(LogModel.log_time).offset(skip).limit(limit).all()
+        query = db.query(LogModel).filter_by(worker_id=worker_id)
+        objs = paginate(
+            query, (LogModel.log_time, LogModel.order_id), cursor, skip, limit, descending=True
+        ).all()
         if not objs:
             return []
         return [Log.model_validate(obj) for obj in objs]
@@ -101,7 +105,6 @@ class CRUDLog:
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         
         return Log.model_validate(db_obj)
     
@@ -1,20 +1,65 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 from decimal import Decimal
 
-from app.dbrm import Session, func
+import numpy as np
 
-from app.models import ServiceOrder as ServiceOrderModel
+from app.dbrm import Session, Update, func, paginate, selectin, joined
+
+from app.models import ServiceOrder as ServiceOrderModel, Worker as WorkerModel
 from app.schemas import OrderCreate, Order
-from app.core.enum import OrderStatus
+from app.core.enum import OrderStatus, WorkerAvailabilityStatus
+
+# Each assigned order binds three parameters (CASE WHEN/THEN plus IN), kept under SQL Server's 2100
+ASSIGN_CHUNK_SIZE = 600
+# SQL Server hints for assignment: claims take update locks, and claims and the
+# reads feeding them skip rows another processor is claiming instead of waiting
+CLAIM_HINTS = ("UPDLOCK", "READPAST")
+SKIP_LOCKED_HINTS = ("READPAST",)
+
+
+def claim_hints(db: Session) -> tuple:
+    return CLAIM_HINTS if db.dialect == "mssql" else ()
+
+
+def skip_locked_hints(db: Session) -> tuple:
+    return SKIP_LOCKED_HINTS if db.dialect == "mssql" else ()
+
+
+def claim_rows(db: Session, model, key, keys: List[str], values: dict, *conditions) -> Set[str]:
+    """
+    Compare-and-set UPDATE: write values to the rows whose key is in keys and
+    that still match conditions. Returns the keys actually written, so rows
+    changed by someone else in the meantime are left out.
+    """
+    from app.dbrm import Condition
+    if db.supports_returning:
+        update = Update(model, dialect=db.dialect).set_(**values).with_hint(*claim_hints(db))
+        update.where(Condition.in_(key, keys))
+        for condition in conditions:
+            update.where(condition)
+        cursor = db.execute(update.returning_(key.name))
+        return {row[0] for row in cursor.fetchall()}
+    # Written rows cannot be read back: one statement per row, each with its own row count
+    with db.batch() as batch:
+        statements = []
+        for value in keys:
+            update = Update(model).set_(**values).where(Condition.eq(key, value))
+            for condition in conditions:
+                update.where(condition)
+            statements.append(batch.add(update))
+    return {value for value, statement in zip(keys, statements) if statement.rowcount}
 
 
 class CRUDOrder:
-    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Order]:
-        objs = db.query(ServiceOrderModel).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+    # Keyset pagination columns for the cursor-aware list methods
+    cursor_fields = ('order_id',)
+
+    def get_multi(
+        self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[Order]:
+        query = db.query(ServiceOrderModel)
+        return paginate(query, (ServiceOrderModel.order_id,), cursor, skip, limit).all(schema=Order)
 
     def get_by_order_id(self, db: Session, order_id: str) -> Optional[Order]:
         obj = db.query(ServiceOrderModel).filter_by(order_id=order_id).first()
@@ -23,26 +68,22 @@ class CRUDOrder:
         return Order.model_validate(obj)
         
     def get_orders_by_customer(
-        self, db: Session, customer_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None
+        self, db: Session, customer_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Order]:
         query = db.query(ServiceOrderModel).filter_by(customer_id=customer_id)
         if status is not None:
             query = query.filter_by(status=status)
-        objs = query.offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return paginate(query, (ServiceOrderModel.order_id,), cursor, skip, limit).all(schema=Order)
     
     def get_orders_by_worker(
-        self, db: Session, worker_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None
+        self, db: Session, worker_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Order]:
         query = db.query(ServiceOrderModel).filter_by(worker_id=worker_id)
         if status is not None:
             query = query.filter_by(status=status)
-        objs = query.offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return paginate(query, (ServiceOrderModel.order_id,), cursor, skip, limit).all(schema=Order)
     
     def get_orders_by_worker_type(
         self, db: Session, worker_type: int, skip: int = 0, limit: int = 100, status: Optional[int] = None
@@ -50,29 +91,44 @@ class CRUDOrder:
         query = db.query(ServiceOrderModel).filter_by(worker_type=worker_type)
         if status is not None:
             query = query.filter_by(status=status)
-        objs = query.offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return query.offset(skip).limit(limit).all(schema=Order)
 
     def get_orders_by_car(
-        self, db: Session, car_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None
+        self, db: Session, car_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Order]:
         query = db.query(ServiceOrderModel).filter_by(car_id=car_id)
         if status is not None:
             query = query.filter_by(status=status)
-        objs = query.offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return paginate(query, (ServiceOrderModel.order_id,), cursor, skip, limit).all(schema=Order)
         
     def get_orders_by_status(
         self, db: Session, status: int, skip: int = 0, limit: int = 100
     ) -> List[Order]:
-        objs = db.query(ServiceOrderModel).filter_by(status=status).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return db.query(ServiceOrderModel).filter_by(status=status).offset(skip).limit(limit).all(schema=Order)
+    
+    def get_pending_orders(
+        self, db: Session, limit: Optional[int] = None, order_ids: Optional[List[str]] = None
+    ) -> List[Order]:
+        """Orders waiting for a worker, oldest start_time first, optionally only among order_ids"""
+        from app.dbrm import Condition
+        # Rows another processor is claiming are skipped, not waited on
+        query = db.query(ServiceOrderModel).with_hint(*skip_locked_hints(db))
+        query = query.filter_by(status=OrderStatus.PENDING_ASSIGNMENT)
+        if order_ids is not None:
+            query = query.filter(Condition.in_(ServiceOrderModel.order_id, order_ids))
+        query = query.order_by(ServiceOrderModel.start_time)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all(schema=Order)
+    
+    def get_orders_with_logs_by_car(
+        self, db: Session, car_id: str, skip: int = 0, limit: int = 100
+    ) -> List[ServiceOrderModel]:
+        """Orders for a car with their logs loaded in one extra query"""
+        return db.query(ServiceOrderModel).filter_by(car_id=car_id).options(
+            selectin("logs")
+        ).offset(skip).limit(limit).all()
     
     def get_multi_with_details(
         self, db: Session, skip: int = 0, limit: int = 100, status: Optional[int] = None
@@ -81,10 +137,7 @@ class CRUDOrder:
         query = db.query(ServiceOrderModel)
         if status is not None:
             query = query.filter_by(status=status)
-        objs = query.offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [Order.model_validate(obj) for obj in objs]
+        return query.offset(skip).limit(limit).all(schema=Order)
     
     def create_order_for_customer(
         self, db: Session, *, obj_in: OrderCreate, customer_id: str
@@ -111,7 +164,6 @@ class CRUDOrder:
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         
         return Order.model_validate(db_obj)
     
@@ -124,7 +176,6 @@ class CRUDOrder:
                 db_obj.end_time = datetime.now()
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
             return Order.model_validate(db_obj)
         else:
             raise ValueError("Order not found")
@@ -144,7 +195,6 @@ class CRUDOrder:
 
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
         return Order.model_validate(db_obj)
     
     def add_customer_feedback(
@@ -157,7 +207,6 @@ class CRUDOrder:
                 db_obj.comment = comment
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
             return Order.model_validate(db_obj)
         else:
             raise ValueError("Order not found")
@@ -205,6 +254,15 @@ class CRUDOrder:
             return []
         return [Order.model_validate(obj) for obj in objs]
 
+    def get_incomplete_orders_with_progress(
+        self, db: Session, skip: int = 0, limit: int = 100
+    ) -> List[ServiceOrderModel]:
+        """Incomplete orders with their car joined and procedures loaded in one extra query"""
+        from app.dbrm import Condition
+        return db.query(ServiceOrderModel).filter(
+            Condition.lt(ServiceOrderModel.status, OrderStatus.COMPLETED)
+        ).options(joined("car"), selectin("procedures")).offset(skip).limit(limit).all()
+
     def set_expedite_flag(self, db: Session, order_id: str) -> Order:
         """Set expedite flag and timestamp for an order"""
         db_obj = db.query(ServiceOrderModel).filter_by(order_id=order_id).first()
@@ -212,7 +270,6 @@ class CRUDOrder:
             db_obj.expedite_flag = True
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
             return Order.model_validate(db_obj)
         else:
             raise ValueError("Order not found")
@@ -226,7 +283,6 @@ class CRUDOrder:
             db_obj.last_assignment_at = datetime.now()
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
         return Order.model_validate(db_obj)
     
     def complete_order(self, db: Session, order_id: str, total_cost: Decimal) -> Order:
@@ -238,7 +294,6 @@ class CRUDOrder:
             db_obj.total_cost = total_cost
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
         return Order.model_validate(db_obj)
     
     def count_completed_orders_by_worker(self, db: Session, worker_id: str) -> int:
@@ -287,6 +342,25 @@ class CRUDOrder:
         
         return float(result) if result else None
 
+    def get_average_ratings_by_worker(self, db: Session) -> Dict[str, float]:
+        """Average rating of completed orders for every worker that has one, in one grouped query"""
+        from app.dbrm import Select, Condition
+        rows = Select(ServiceOrderModel.worker_id, func.avg(ServiceOrderModel.rating)).from_(ServiceOrderModel).filter(
+            Condition.eq(ServiceOrderModel.status, OrderStatus.COMPLETED),
+            Condition.not_null(ServiceOrderModel.worker_id),
+            Condition.not_null(ServiceOrderModel.rating)
+        ).group_by(ServiceOrderModel.worker_id).all(to_model=False, session=db)
+        return {worker_id: float(average) for worker_id, average in rows if average is not None}
+
+    def count_assignments_by_worker(self, db: Session, since: datetime) -> Dict[str, int]:
+        """Orders assigned to each worker since a point in time (by last_assignment_at)"""
+        from app.dbrm import Select, Condition
+        rows = Select(ServiceOrderModel.worker_id, func.count(ServiceOrderModel.order_id)).from_(ServiceOrderModel).filter(
+            Condition.gte(ServiceOrderModel.last_assignment_at, since),
+            Condition.not_null(ServiceOrderModel.worker_id)
+        ).group_by(ServiceOrderModel.worker_id).all(to_model=False, session=db)
+        return {worker_id: int(count) for worker_id, count in rows}
+
     def get_material_cost_breakdown_by_period(self, db: Session, start_date: datetime, end_date: datetime, period_type: str = "month") -> dict:
         """Get material cost breakdown by period from order total_cost"""
         from app.dbrm import Condition, func, Select
@@ -323,6 +397,78 @@ class CRUDOrder:
             return []
         return [Order.model_validate(obj) for obj in objs]
 
+    def reset_stale_assignments(
+        self, db: Session, order_ids: List[str], cutoff_time: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Put orders still in ASSIGNED back to PENDING_ASSIGNMENT, in one batched
+        round trip. Returns the ids actually reset; an order accepted in the
+        meantime no longer matches and is left alone, and with cutoff_time so
+        is one reassigned since (by another process) after the cutoff.
+        """
+        from app.dbrm import Condition
+        with db.batch() as batch:
+            statements = []
+            for order_id in order_ids:
+                update = (
+                    Update(ServiceOrderModel)
+                    .set_(worker_id=None, status=OrderStatus.PENDING_ASSIGNMENT)
+                    .filter_by(order_id=order_id, status=OrderStatus.ASSIGNED)
+                )
+                if cutoff_time is not None:
+                    update.where(Condition.lte(ServiceOrderModel.last_assignment_at, cutoff_time))
+                statements.append(batch.add(update))
+        db.commit()
+        return [order_id for order_id, statement in zip(order_ids, statements) if statement.rowcount]
+
+    def assign_batch(self, db: Session, assignments: Dict[str, str]) -> Dict[str, str]:
+        """
+        Apply order_id -> worker_id assignments in one transaction, safe against
+        other processes assigning at the same time. Workers are claimed only while
+        still AVAILABLE, then orders only while still PENDING_ASSIGNMENT with no
+        worker; a worker claimed for an order someone else took is released.
+        Returns the assignments actually applied.
+        """
+        if not assignments:
+            return {}
+        if len(set(assignments.values())) != len(assignments):
+            raise ValueError("Each worker can take only one order per batch")
+        from app.dbrm import Condition
+        applied = {}
+        now = datetime.now()
+        items = list(assignments.items())
+        with db.begin():
+            for start in range(0, len(items), ASSIGN_CHUNK_SIZE):
+                chunk = dict(items[start:start + ASSIGN_CHUNK_SIZE])
+                claimed_workers = claim_rows(
+                    db, WorkerModel, WorkerModel.user_id, list(chunk.values()),
+                    {"availability_status": WorkerAvailabilityStatus.BUSY},
+                    Condition.eq(WorkerModel.availability_status, WorkerAvailabilityStatus.AVAILABLE)
+                )
+                chunk = {order_id: worker_id for order_id, worker_id in chunk.items() if worker_id in claimed_workers}
+                if not chunk:
+                    continue
+                claimed_orders = claim_rows(
+                    db, ServiceOrderModel, ServiceOrderModel.order_id, list(chunk),
+                    {
+                        "worker_id": Condition.case(ServiceOrderModel.order_id, chunk),
+                        "status": OrderStatus.ASSIGNED,
+                        "assignment_attempts": Condition.increment(ServiceOrderModel.assignment_attempts),
+                        "last_assignment_at": now,
+                    },
+                    Condition.eq(ServiceOrderModel.status, OrderStatus.PENDING_ASSIGNMENT),
+                    Condition.is_null(ServiceOrderModel.worker_id)
+                )
+                released = [worker_id for order_id, worker_id in chunk.items() if order_id not in claimed_orders]
+                if released:
+                    # This transaction still holds these rows, so nobody else changed them
+                    db.execute(
+                        Update(WorkerModel).set_(availability_status=WorkerAvailabilityStatus.AVAILABLE)
+                        .where(Condition.in_(WorkerModel.user_id, released))
+                    )
+                applied.update({order_id: worker_id for order_id, worker_id in chunk.items() if order_id in claimed_orders})
+        return applied
+
     def remove(self, db: Session, order_id: str) -> bool:
         db_obj = db.query(ServiceOrderModel).filter_by(order_id=order_id).first()
         if db_obj:
@@ -340,6 +486,13 @@ class CRUDOrder:
         if not objs:
             return []
         return [Order.model_validate(obj) for obj in objs]
+
+    def get_low_rated_orders_with_workers(self, db: Session, rating_threshold: int) -> List[ServiceOrderModel]:
+        """Orders rated below a threshold with their worker joined"""
+        from app.dbrm import Condition
+        return db.query(ServiceOrderModel).filter(
+            Condition.lt(ServiceOrderModel.rating, rating_threshold)
+        ).options(joined("worker")).all()
     
     def get_orders_by_worker_type_period(
         self, db: Session, worker_type: str, start_date: datetime, end_date: datetime
@@ -363,5 +516,25 @@ class CRUDOrder:
             return []
         return [Order.model_validate(obj) for obj in objs]
 
+    def get_order_columns_by_period(
+        self, db: Session, start_date: datetime, end_date: datetime
+    ) -> Dict[str, np.ndarray]:
+        """
+        Worker type, status, start/end time and rating of every assigned order
+        started within a date range, as NumPy columns for vectorized analytics.
+        """
+        from app.models import Worker
+        from app.dbrm import Condition, Select
+
+        return Select(
+            Worker.worker_type, ServiceOrderModel.status, ServiceOrderModel.start_time,
+            ServiceOrderModel.end_time, ServiceOrderModel.rating, session=db,
+        ).from_(ServiceOrderModel).join(
+            Worker, on=(Worker.user_id, ServiceOrderModel.worker_id)
+        ).filter(
+            Condition.gte(ServiceOrderModel.start_time, start_date),
+            Condition.lte(ServiceOrderModel.start_time, end_date)
+        ).to_columns()
+
 
 order = CRUDOrder()
@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict
 
-from app.dbrm import Session
+from app.dbrm import Session, Update, Condition
 
 from app.models import ServiceProcedure as ServiceProcedureModel
 from app.schemas import ProcedureCreate, ProcedureUpdate, Procedure
@@ -18,10 +18,7 @@ class CRUDProcedure:
     def get_procedures_by_order(
         self, db: Session, order_id: str
     ) -> List[Procedure]:
-        objs = db.query(ServiceProcedureModel).filter_by(order_id=order_id).order_by(ServiceProcedureModel.procedure_id).all()
-        if not objs:
-            return []
-        return [Procedure.model_validate(obj) for obj in objs]
+        return db.query(ServiceProcedureModel).filter_by(order_id=order_id).order_by(ServiceProcedureModel.procedure_id).all(schema=Procedure)
     
 
     def create_procedures(
@@ -39,37 +36,38 @@ class CRUDProcedure:
                 current_status=ProcedureStatus.PENDING,
                 procedure_id=last_procedure_id + i + 1
             )
-            db.add(db_obj)
             db_objs.append(db_obj)
         
-        db.commit()
-        
-        for obj in db_objs:
-            db.refresh(obj)
+        db.bulk_insert(ServiceProcedureModel, db_objs)
                 
-        return db_objs
+        return [Procedure.model_validate(obj) for obj in db_objs]
     
 
     def update_procedure_status(
         self, db: Session, obj_ins: List[ProcedureUpdate]
     ) -> List[Procedure]:
-        db_objs = []
-        
-        for obj_in in obj_ins:
-            db_obj = ServiceProcedureModel(
-                order_id=obj_in.order_id,
-                procedure_id=obj_in.procedure_id,
-                current_status=obj_in.current_status
-            )
-            db.add(db_obj)
-            db_objs.append(db_obj)
+        if not obj_ins:
+            return []
         
+        # One batched round trip for all status changes instead of one per procedure
+        with db.batch() as batch:
+            for obj_in in obj_ins:
+                batch.add(
+                    Update(ServiceProcedureModel)
+                    .set_(current_status=obj_in.current_status)
+                    .filter_by(order_id=obj_in.order_id, procedure_id=obj_in.procedure_id)
+                )
         db.commit()
         
-        for obj in db_objs:
-            db.refresh(obj)
-                
-        return [Procedure.model_validate(obj) for obj in db_objs]
+        updated = [(obj_in.order_id, obj_in.procedure_id) for obj_in, statement in zip(obj_ins, batch.statements)
+                   if statement.rowcount]
+        if not updated:
+            return []
+        procedures = db.query(ServiceProcedureModel).filter(
+            Condition.in_(ServiceProcedureModel.order_id, list({order_id for order_id, _ in updated}))
+        ).all(schema=Procedure)
+        by_key = {(p.order_id.rstrip(), p.procedure_id): p for p in procedures}
+        return [by_key[key] for key in updated if key in by_key]
     
 
     def get_procedure_progress(self, db: Session, order_id: str) -> Dict[str, int]:
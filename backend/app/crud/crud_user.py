@@ -1,9 +1,9 @@
-from typing import Optional, List
+from typing import Optional, List, Iterable
 import time
 import random
 import string
 
-from app.dbrm import Session, func
+from app.dbrm import Session, Update, Condition, func, paginate
 
 from app.core.security import get_password_hash, verify_password
 from app.models import User as UserModel, Customer as CustomerModel, Worker as WorkerModel, Administrator as AdministratorModel
@@ -31,11 +31,13 @@ def generate_unique_id(db: Session, user_type: str) -> str:
     return user_id
 
 class CRUDUser:
-    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[User]:
-        objs = db.query(UserModel).offset(skip).limit(limit).all()
-        if not objs:
-            return []
-        return [User.model_validate(obj) for obj in objs]
+    # Keyset pagination columns for the cursor-aware list methods
+    cursor_fields = ('user_id',)
+
+    def get_multi(
+        self, db: Session, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[User]:
+        return paginate(db.query(UserModel), (UserModel.user_id,), cursor, skip, limit).all(schema=User)
 
     def get_by_id(self, db: Session, user_id: str) -> Optional[User]:
         obj = db.query(UserModel).filter_by(user_id=user_id).first()
@@ -43,6 +45,10 @@ class CRUDUser:
             return None
         return User.model_validate(obj)
     
+    def prefetch(self, db: Session, user_ids: Iterable[str]) -> None:
+        """Queue users so the get_by_id calls that follow share one batched query"""
+        db.prefetch(UserModel, user_ids)
+    
     def get_by_name(self, db: Session, user_name: str) -> Optional[User]:
         obj = db.query(UserModel).filter_by(user_name=user_name).first()
         if not obj:
@@ -60,33 +66,25 @@ class CRUDUser:
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return User.model_validate(db_obj)
 
     def update(
         self, db: Session, *, obj_old: User, obj_in: UserUpdate
     ) -> User:
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            if hasattr(obj_old, field):
-                setattr(obj_old, field, value)
+        db_obj = db.query(UserModel).filter_by(user_id=obj_old.user_id).first()
+        if not db_obj:
+            raise ValueError("User not found")
         
-        if hasattr(obj_in, "user_pwd"):
-            db_obj = UserModel(
-                user_id=obj_old.user_id,
-                user_name=obj_old.user_name,
-                user_pwd=get_password_hash(obj_in.user_pwd),
-                user_type=obj_old.user_type
-            )
-        else:
-            db_obj = UserModel(
-                user_id=obj_old.user_id,
-                user_name=obj_old.user_name,
-                user_type=obj_old.user_type
-            )
+        # Only the assigned columns that actually change are written
+        for field, value in obj_in.model_dump(exclude_unset=True).items():
+            if field == "user_pwd":
+                if value:
+                    db_obj.user_pwd = get_password_hash(value)
+            elif field in UserModel._columns:
+                setattr(db_obj, field, value)
         
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return User.model_validate(db_obj)
     
     def remove(self, db: Session, *, user_id: str) -> bool:
@@ -133,7 +131,6 @@ class CRUDCustomer:
         db.add(customer_obj)
         db.commit()
 
-        db.refresh(user_obj)
         return User.model_validate(user_obj)
 
 
@@ -144,6 +141,10 @@ class CRUDWorker:
             return None
         return User.model_validate(obj)
     
+    def prefetch(self, db: Session, worker_ids: Iterable[str]) -> None:
+        """Queue workers so the get_by_id calls that follow share one batched query"""
+        db.prefetch(WorkerModel, worker_ids)
+    
     def get_by_name(self, db: Session, user_name: str) -> Optional[User]:
         obj = db.query(WorkerModel).filter_by(user_name=user_name).first()
         if not obj:
@@ -167,9 +168,10 @@ class CRUDWorker:
         )
         db.add(worker_obj)
         db.commit()
+        # New workers start out available; imported here since app.background imports app.crud
+        from app.background.events import publish_worker_freed
+        publish_worker_freed(unique_id)
 
-        db.refresh(user_obj)
-        db.refresh(worker_obj)
         return User(
             user_id=user_obj.user_id,
             user_name=user_obj.user_name,
@@ -178,19 +180,20 @@ class CRUDWorker:
         )
         
     def get_workers_by_type(self, db: Session, *, worker_type: str) -> List[User]:
-        objs = db.query(WorkerModel).filter_by(worker_type=worker_type).all()
-        if not objs:
-            return []
-        return [User.model_validate(obj) for obj in objs]
+        return db.query(WorkerModel).filter_by(worker_type=worker_type).all(schema=User)
     
-    def get_available_workers(self, db: Session, worker_type: Optional[str] = None) -> List[User]:
-        query = db.query(WorkerModel).filter_by(availability_status=WorkerAvailabilityStatus.AVAILABLE)
+    def get_available_workers(
+        self, db: Session, worker_type: Optional[str] = None, worker_ids: Optional[List[str]] = None
+    ) -> List[User]:
+        from app.crud.crud_order import skip_locked_hints
+        # Rows another processor is claiming are skipped, not waited on
+        query = db.query(WorkerModel).with_hint(*skip_locked_hints(db))
+        query = query.filter_by(availability_status=WorkerAvailabilityStatus.AVAILABLE)
         if worker_type is not None:
             query = query.filter_by(worker_type=worker_type)
-        objs = query.all()
-        if not objs:
-            return []
-        return [User.model_validate(obj) for obj in objs]
+        if worker_ids is not None:
+            query = query.filter(Condition.in_(WorkerModel.user_id, worker_ids))
+        return query.all(schema=User)
     
     def get_all_worker_types(self, db: Session) -> List[str]:
         objs = db.query(func.distinct(WorkerModel.worker_type)).all()
@@ -201,24 +204,33 @@ class CRUDWorker:
     def count_workers_by_type(self, db: Session, worker_type: str) -> int:
         return db.query(func.count(WorkerModel.user_id)).filter_by(worker_type=worker_type).scalar() or 0
     
-    def update_availability(self, db: Session, worker_id: str, status: int) -> User:
-        worker = self.get_by_id(db, worker_id)
-        if worker:
-            worker.availability_status = status
-            db.add(worker)
-            db.commit()
-            db.refresh(worker)
-        return User.model_validate(worker)
+    def update_availability(self, db: Session, worker_id: str, status: int) -> Optional[User]:
+        """Set a worker's availability; a worker made AVAILABLE is announced to the assignment processor"""
+        db.execute(Update(WorkerModel).set_(availability_status=status).filter_by(user_id=worker_id))
+        db.commit()
+        if status == WorkerAvailabilityStatus.AVAILABLE:
+            from app.background.events import publish_worker_freed
+            publish_worker_freed(worker_id)
+        return self.get_by_id(db, worker_id)
+    
+    def update_availability_many(self, db: Session, worker_ids: List[str], status: int) -> None:
+        """Set the availability of several workers, batched into as few round trips as possible"""
+        worker_ids = list(dict.fromkeys(worker_ids))
+        with db.batch(rowcounts=False) as batch:
+            for worker_id in worker_ids:
+                batch.add(Update(WorkerModel).set_(availability_status=status).filter_by(user_id=worker_id))
+        db.commit()
+        if status == WorkerAvailabilityStatus.AVAILABLE:
+            from app.background.events import publish_worker_freed
+            for worker_id in worker_ids:
+                publish_worker_freed(worker_id)
     
     def get_all_workers(self, db: Session, status: Optional[int] = None) -> List[User]:
         """Get workers by availability status"""
-        if status is None:
-            objs = db.query(WorkerModel).all()
-        else:
-            objs = db.query(WorkerModel).filter_by(availability_status=status).all()
-        if not objs:
-            return []
-        return [User.model_validate(obj) for obj in objs] 
+        query = db.query(WorkerModel)
+        if status is not None:
+            query = query.filter_by(availability_status=status)
+        return query.all(schema=User)
 
 
 class CRUDAdmin:
@@ -245,7 +257,6 @@ class CRUDAdmin:
         db.add(admin_obj)
         db.commit()
 
-        db.refresh(user_obj)
         return User.model_validate(user_obj)
 
 
@@ -1,26 +1,29 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 from app.dbrm import Session
 
+from app.core.config import settings
+
 from app.models import Wage as WageModel
 from app.schemas import WageCreate, Wage
 
 
 class CRUDWage:
     def get_by_type(self, db: Session, worker_type: str) -> Optional[Wage]:
-        obj = db.query(WageModel).filter_by(worker_type=worker_type).first()
+        obj = db.query(WageModel).filter_by(worker_type=worker_type).cached(settings.REFERENCE_CACHE_TTL).first()
         if not obj:
             return None
         return Wage.model_validate(obj)
     
+    def prefetch(self, db: Session, worker_types: Iterable[str]) -> None:
+        """Queue wage rates so the get_by_type calls that follow share one batched query"""
+        db.prefetch(WageModel, worker_types)
+    
     def get_multi(self, db: Session) -> List[Wage]:
-        objs = db.query(WageModel).all()
-        if not objs:
-            return []
-        return [Wage.model_validate(obj) for obj in objs]
+        return db.query(WageModel).cached(settings.REFERENCE_CACHE_TTL).all(schema=Wage)
     
     def get_all_types(self, db: Session) -> List[str]:
-        objs = db.query(WageModel).all()
+        objs = db.query(WageModel).cached(settings.REFERENCE_CACHE_TTL).all()
         if not objs:
             return []
         return [obj.worker_type for obj in objs]
@@ -32,7 +35,6 @@ class CRUDWage:
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return Wage.model_validate(db_obj)
     
     def update_wage_rate(
@@ -43,7 +45,6 @@ class CRUDWage:
             db_obj.wage_per_hour = new_wage_per_hour
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
         return Wage.model_validate(db_obj)
 
 
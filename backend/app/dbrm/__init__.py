@@ -1,10 +1,16 @@
 from .engine import Engine
+from .pool import ConnectionPool, PooledConnection, PoolTimeout
+from .replicas import ReplicaSet
 from .session import Session
-from .schema import Table, Column
-from .query import Select, Insert, Update, Delete, Condition
+from .schema import Table, Column, Relationship, Index
+from .query import Select, Insert, Update, Delete, Upsert, Condition, Clause
+from .cache import StatementCache, statement_cache, ResultCache, result_cache
+from .hydration import Row
+from .loading import selectin, joined
+from .pagination import paginate, encode_cursor, decode_cursor, next_cursor, InvalidCursor
 from .functions import func
 from .utils import (
-    format_value_for_sql, parse_sql_value, export_to_csv, import_from_csv, get_table_info
+    format_value_for_sql, parse_sql_value, export_to_csv, export_query_to_csv, import_from_csv, get_table_info
 )
 from .types import (
     Integer, String, Float, Double, Boolean, Text, DateTime, Date, Time, Timestamp, TinyText,
@@ -20,16 +26,38 @@ __all__ = [
     # Core components
     'Engine', 
     'Session',
+    'ConnectionPool',
+    'PooledConnection',
+    'PoolTimeout',
+    'ReplicaSet',
     'Table', 
     'Column',
+    'Relationship',
+    'Index',
 
     # Query builders
     'Select',
     'Insert',
     'Update',
     'Delete',
+    'Upsert',
     'Condition',
+    'Clause',
     'func',
+    'StatementCache',
+    'statement_cache',
+    'ResultCache',
+    'result_cache',
+    'Row',
+    'selectin',
+    'joined',
+
+    # Keyset pagination
+    'paginate',
+    'encode_cursor',
+    'decode_cursor',
+    'next_cursor',
+    'InvalidCursor',
     
     # Data transfer
     'transfer_csv',
@@ -0,0 +1,320 @@
+"""
+Offline index advisor driven by the SQL query logs.
+
+Statement shapes are read back from logs/sql_queries.log (DEBUG entries, with
+parameters rendered inline) and logs/slow_queries.log (parameterized SQL plus
+its params), grouped, and replayed against the database for their plans only:
+
+- SQLite: EXPLAIN QUERY PLAN. A "SCAN <table>" step, or a temporary B-tree
+  for ORDER BY, on a registered model's table yields a suggestion built from
+  the statement's equality, range and ORDER BY columns on that table.
+- SQL Server: SET SHOWPLAN_XML ON. The optimizer's own MissingIndex entries
+  become suggestions (equality, then inequality key columns, INCLUDE columns).
+
+Nothing is executed for real. Suggestions already covered by a primary key
+or a declared index are dropped. Run from the backend directory:
+
+    python -m app.dbrm.advisor logs/slow_queries.log logs/sql_queries.log
+"""
+import ast
+import logging
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHOWPLAN_NS = {'sp': 'http://schemas.microsoft.com/sqlserver/2004/07/showplan'}
+
+# "<asctime> - <logger> - <LEVEL> - <message>"; lines without it continue the previous entry
+_ENTRY = re.compile(r'^\d{4}-\d\d-\d\d [\d:,]+ - (SQLQueryLogger|SQLSlowQueryLogger) - \w+ - (.*)$')
+_TIMED = re.compile(r'^(?P<ms>\d+(?:\.\d+)?) ms (?:rows=\S+ )?(?P<sql>.*)$', re.S)
+_PARAMS = re.compile(r'^(?P<sql>.*) params=(?P<params>\(.*\))$', re.S)
+_LITERALS = re.compile(r"N?'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ADVISABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.I)
+
+
+class QueryShape:
+    """One statement shape seen in the logs, with a replayable sample"""
+
+    __slots__ = ('sql', 'params', 'count', 'total_ms')
+
+    def __init__(self, sql: str, params: Sequence = ()):
+        self.sql = sql
+        self.params = tuple(params)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def __repr__(self):
+        return f"QueryShape({self.sql[:60]!r}, count={self.count}, total_ms={self.total_ms:.1f})"
+
+
+class IndexSuggestion:
+    """A missing index and the statement shapes that would use it"""
+
+    def __init__(self, table: str, columns: Sequence[str], include: Sequence[str] = (), reason: str = ""):
+        self.table = table
+        self.columns = tuple(columns)
+        self.include = tuple(column for column in include if column not in self.columns)
+        self.reason = reason
+        self.statements: List[QueryShape] = []
+
+    @property
+    def count(self) -> int:
+        return sum(shape.count for shape in self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(shape.total_ms for shape in self.statements)
+
+    def as_index(self):
+        from .schema import Index
+        return Index(*self.columns, include=self.include).bind(self.table)
+
+    def declaration(self) -> str:
+        """The line to add to the model's __indexes__"""
+        return repr(self.as_index())
+
+    def ddl(self, dialect: str = 'mssql') -> str:
+        return self.as_index().create_sql(self.table, dialect)
+
+    def __repr__(self):
+        return f"IndexSuggestion({self.table}, {self.declaration()}, statements={len(self.statements)})"
+
+
+def _shape_key(sql: str) -> str:
+    # Literal-rendered DEBUG entries group with each other regardless of values
+    return _LITERALS.sub('?', ' '.join(sql.split()))
+
+
+def _parse_params(text: str, sql: str) -> Tuple:
+    try:
+        return tuple(ast.literal_eval(text))
+    except (ValueError, SyntaxError):
+        # Values such as Decimal(...) or datetime(...) are not literals; the plan
+        # does not depend on them, so bind NULLs of the right count instead
+        return (None,) * sql.count('?')
+
+
+def read_log(paths: Iterable) -> List[QueryShape]:
+    """Statement shapes in the given query log files, most total time first"""
+    entries: List[str] = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as handle:
+            for line in handle:
+                line = line.rstrip('\n')
+                match = _ENTRY.match(line)
+                if match:
+                    entries.append(match.group(2))
+                elif entries:
+                    entries[-1] += '\n' + line
+
+    shapes: Dict[str, QueryShape] = {}
+    for entry in entries:
+        elapsed = 0.0
+        timed = _TIMED.match(entry)
+        if timed:
+            elapsed = float(timed.group('ms'))
+            entry = timed.group('sql')
+        params = ()
+        with_params = _PARAMS.match(entry)
+        if with_params:
+            entry = with_params.group('sql')
+            params = _parse_params(with_params.group('params'), entry)
+        sql = entry.strip()
+        if not _ADVISABLE.match(sql):
+            continue
+        key = _shape_key(sql)
+        shape = shapes.get(key)
+        if shape is None:
+            shape = shapes[key] = QueryShape(sql, params)
+        shape.count += 1
+        shape.total_ms += elapsed
+    return sorted(shapes.values(), key=lambda shape: (shape.total_ms, shape.count), reverse=True)
+
+
+def explain_sqlite(session, sql: str, params: Sequence = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines"""
+    session.execute(f"EXPLAIN QUERY PLAN {sql}", list(params) or None)
+    return [row[-1] for row in session.fetchall()]
+
+
+def showplan_xml(session, sql: str, params: Sequence = ()) -> str:
+    """Estimated plan XML; the statement is compiled but not executed"""
+    session.execute("SET SHOWPLAN_XML ON")
+    try:
+        session.execute(sql, list(params) or None)
+        row = session.fetchone()
+        return row[0] if row else ""
+    finally:
+        session.execute("SET SHOWPLAN_XML OFF")
+
+
+def _bare(name: str) -> str:
+    return name.strip('[]"` ')
+
+
+def missing_indexes_from_showplan(plan_xml: str) -> List[IndexSuggestion]:
+    """SQL Server's MissingIndex entries from a showplan as suggestions"""
+    suggestions = []
+    if not plan_xml:
+        return suggestions
+    root = ET.fromstring(plan_xml)
+    for group in root.iterfind('.//sp:MissingIndexGroup', SHOWPLAN_NS):
+        impact = group.get('Impact')
+        for missing in group.iterfind('sp:MissingIndex', SHOWPLAN_NS):
+            usage: Dict[str, List[str]] = {'EQUALITY': [], 'INEQUALITY': [], 'INCLUDE': []}
+            for column_group in missing.iterfind('sp:ColumnGroup', SHOWPLAN_NS):
+                names = [_bare(column.get('Name')) for column in column_group.iterfind('sp:Column', SHOWPLAN_NS)]
+                usage.setdefault(column_group.get('Usage'), []).extend(names)
+            columns = usage['EQUALITY'] + usage['INEQUALITY']
+            if columns:
+                suggestions.append(IndexSuggestion(
+                    _bare(missing.get('Table')), columns, usage['INCLUDE'],
+                    reason=f"showplan missing index, estimated impact {impact}%",
+                ))
+    return suggestions
+
+
+def _column_pattern(columns: Iterable[str]) -> str:
+    return '|'.join(re.escape(column) for column in sorted(columns, key=len, reverse=True))
+
+
+def _predicate_columns(sql: str, table: str, columns: Sequence[str]) -> Tuple[List[str], List[str], List[str]]:
+    """(equality, range, order by) columns of table referenced by the statement"""
+    names = _column_pattern(columns)
+    qualifier = rf'(?:(?:{re.escape(table)}|\w+)\.)?'
+    where = re.split(r'\bORDER\s+BY\b', sql, flags=re.I)
+    predicates = where[0]
+    equality = re.findall(rf'\b{qualifier}({names})\s*(?:=|\bIN\b|\bIS\s+NULL\b)', predicates, re.I)
+    ranges = re.findall(rf'\b{qualifier}({names})\s*(?:<|>|\bBETWEEN\b|\bLIKE\b)', predicates, re.I)
+    order = []
+    if len(where) > 1:
+        order = re.findall(rf'\b{qualifier}({names})\b', re.split(r'\b(?:LIMIT|OFFSET|FETCH)\b', where[1], flags=re.I)[0], re.I)
+    canonical = {column.lower(): column for column in columns}
+
+    def unique(found):
+        return list(dict.fromkeys(canonical[name.lower()] for name in found))
+
+    equality = unique(equality)
+    ranges = [column for column in unique(ranges) if column not in equality]
+    order = [column for column in unique(order) if column not in equality]
+    return equality, ranges, order
+
+
+def _suggest_from_sqlite_plan(sql: str, plan: List[str], models: Dict[str, type]) -> List[IndexSuggestion]:
+    suggestions = []
+    for detail in plan:
+        scan = re.match(r'SCAN (?:TABLE )?(\w+)', detail)
+        if scan and 'INDEX' not in detail:
+            reason = "full table scan"
+        elif 'USE TEMP B-TREE FOR ORDER BY' in detail:
+            scan = re.search(r'\bFROM\s+(\w+)', sql, re.I)
+            reason = "sort in a temporary B-tree"
+        else:
+            continue
+        model = models.get(scan.group(1).lower()) if scan else None
+        if model is None:
+            continue
+        equality, ranges, order = _predicate_columns(sql, model.__tablename__, model._column_names)
+        # Equality columns lead, then one range column or the sort order
+        columns = equality + (ranges[:1] if ranges else order)
+        if columns:
+            suggestions.append(IndexSuggestion(model.__tablename__, columns, reason=reason))
+    return suggestions
+
+
+def _covered(suggestion: IndexSuggestion, model) -> bool:
+    """Whether an existing primary key or declared index starts with the suggested key"""
+    wanted = tuple(column.lower() for column in suggestion.columns)
+    existing = [tuple(model._get_primary_key_info())]
+    existing.extend(index.column_names for index in getattr(model, '_indexes', ()))
+    for columns in existing:
+        prefix = tuple(column.lower() for column in columns[:len(wanted)])
+        if prefix == wanted:
+            return True
+    return False
+
+
+def advise(session, shapes: Iterable[QueryShape], models: Optional[Dict[str, type]] = None) -> List[IndexSuggestion]:
+    """
+    Replay each shape for its plan and return proposed indexes, the ones
+    backing the most logged statement time first.
+    """
+    from .decorators import get_registered_models
+
+    registered = models if models is not None else get_registered_models()
+    by_table = {model.__tablename__.lower(): model for model in registered.values()}
+    suggestions: Dict[Tuple, IndexSuggestion] = {}
+
+    for shape in shapes:
+        try:
+            if session.dialect == 'sqlite':
+                found = _suggest_from_sqlite_plan(shape.sql, explain_sqlite(session, shape.sql, shape.params), by_table)
+            elif session.dialect == 'mssql':
+                found = missing_indexes_from_showplan(showplan_xml(session, shape.sql, shape.params))
+            else:
+                raise ValueError(f"Index advisor does not support dialect '{session.dialect}'")
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not get a plan for {shape.sql[:80]!r}: {e}")
+            continue
+        for suggestion in found:
+            model = by_table.get(suggestion.table.lower())
+            if model is not None and _covered(suggestion, model):
+                continue
+            key = (suggestion.table.lower(), tuple(column.lower() for column in suggestion.columns))
+            merged = suggestions.setdefault(key, suggestion)
+            if merged is not suggestion:
+                merged.include = merged.include + tuple(
+                    column for column in suggestion.include
+                    if column not in merged.include and column not in merged.columns
+                )
+            if shape not in merged.statements:
+                merged.statements.append(shape)
+
+    return sorted(suggestions.values(), key=lambda item: (item.total_ms, item.count), reverse=True)
+
+
+def report(suggestions: List[IndexSuggestion], dialect: str = 'mssql') -> str:
+    """Human-readable advisor output"""
+    if not suggestions:
+        return "No missing indexes found."
+    lines = []
+    for suggestion in suggestions:
+        lines.append(
+            f"{suggestion.table}: {suggestion.declaration()}  "
+            f"[{suggestion.reason}; {suggestion.count} statements, {suggestion.total_ms:.1f} ms logged]"
+        )
+        lines.append(f"    {suggestion.ddl(dialect)}")
+        for shape in suggestion.statements[:3]:
+            lines.append(f"    - {' '.join(shape.sql.split())[:160]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(description="Propose missing indexes from the SQL query logs")
+    parser.add_argument('logs', nargs='*', help="query log files (default: logs/slow_queries.log and logs/sql_queries.log)")
+    parser.add_argument('--models', default='app.models', help="module that registers the models")
+    parser.add_argument('--limit', type=int, default=200, help="most expensive shapes to replay")
+    args = parser.parse_args(argv)
+
+    from .engine import Engine
+    from .querylog import logs_dir
+    from .session import Session
+
+    importlib.import_module(args.models)
+    paths = args.logs or [path for path in (logs_dir / 'slow_queries.log', logs_dir / 'sql_queries.log')
+                          if Path(path).exists()]
+    shapes = read_log(paths)[:args.limit]
+    with Session(Engine.from_env()) as session:
+        print(report(advise(session, shapes), session.dialect))
+
+
+if __name__ == "__main__":
+    main()
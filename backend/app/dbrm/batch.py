@@ -0,0 +1,211 @@
+"""
+Batched round trips for many small, independent write statements.
+
+    with db.batch() as batch:
+        for order_id in order_ids:
+            batch.add(Update().table_(ServiceOrder).set_(status=0).filter_by(order_id=order_id))
+    counts = batch.rowcounts
+
+Statements are collected and sent when the block exits (or on flush()):
+
+- SQL Server: a single multi-statement batch per chunk (under the 2100
+  parameter cap), each statement followed by SELECT @@ROWCOUNT, so every
+  statement still gets its own row count from one round trip.
+- rowcounts=False: adjacent statements with the same SQL go out as one
+  executemany (fast_executemany on pyodbc); their rowcount stays None, since
+  drivers only report a total for the run.
+- Other dialects with rowcounts=True run statements one by one on the
+  session's cursor, still inside the session's transaction.
+
+Statements must not return rows. Nothing is committed; the caller commits.
+"""
+import logging
+import time
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose drivers accept several parameterized statements in one execute()
+MULTI_STATEMENT_DIALECTS = ("mssql",)
+
+
+class BatchStatement:
+    """A statement queued in a batch; rowcount is filled in when the batch is sent"""
+
+    __slots__ = ('sql', 'params', 'query', 'rowcount')
+
+    def __init__(self, sql: str, params: Optional[List], query):
+        self.sql = sql
+        self.params = params or []
+        self.query = query
+        self.rowcount: Optional[int] = None
+
+    def __repr__(self):
+        return f"BatchStatement({self.sql[:60]!r}, rowcount={self.rowcount})"
+
+
+class StatementBatch:
+    """Statements collected by Session.batch()"""
+
+    def __init__(self, session, rowcounts: bool = True):
+        from .session import MAX_BATCH_PARAMETERS, MAX_BATCH_ROWS
+
+        self.session = session
+        self.want_rowcounts = rowcounts
+        self.statements: List[BatchStatement] = []
+        self.round_trips = 0
+        self._pending: List[BatchStatement] = []
+        self._max_parameters = MAX_BATCH_PARAMETERS
+        self._max_statements = MAX_BATCH_ROWS
+
+    def add(self, query, params: Optional[Sequence] = None) -> BatchStatement:
+        """Queue a write builder (Insert, Update, Delete, Upsert) or raw SQL with ? parameters"""
+        sql, params = self.session._prepare(query, params)
+        if sql.lstrip().upper().startswith('SELECT'):
+            raise ValueError("Batches take statements that write; run SELECTs on their own")
+        if len(params or ()) > self._max_parameters:
+            raise ValueError(f"Statement has more than {self._max_parameters} parameters")
+        statement = BatchStatement(sql, params, query)
+        self._pending.append(statement)
+        self.statements.append(statement)
+        return statement
+
+    @property
+    def rowcounts(self) -> List[Optional[int]]:
+        """Rows affected per statement, in the order they were added"""
+        return [statement.rowcount for statement in self.statements]
+
+    def flush(self) -> None:
+        """Send every queued statement"""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        session = self.session
+        for statement in pending:
+            # Autoflush, identity map and cache invalidation, read-only guard
+            session._before_execute(statement.query)
+
+        if self.want_rowcounts:
+            self._send_individually(pending)
+            return
+        # Statements still go out in the order they were added
+        singles: List[BatchStatement] = []
+        for run in self._same_shape_runs(pending):
+            if len(run) == 1:
+                singles.extend(run)
+                continue
+            self._send_individually(singles)
+            singles = []
+            self._send_many(run)
+        self._send_individually(singles)
+
+    def _send_individually(self, statements: List[BatchStatement]) -> None:
+        """Statements with their own row counts: multi-statement batches where supported"""
+        if self.session.dialect in MULTI_STATEMENT_DIALECTS:
+            for chunk in self._chunks(statements):
+                self._send_multi(chunk)
+        else:
+            for statement in statements:
+                self._send_one(statement)
+
+    @staticmethod
+    def _same_shape_runs(statements: List[BatchStatement]) -> List[List[BatchStatement]]:
+        runs: List[List[BatchStatement]] = []
+        for statement in statements:
+            if runs and runs[-1][0].sql == statement.sql and len(runs[-1][0].params) == len(statement.params):
+                runs[-1].append(statement)
+            else:
+                runs.append([statement])
+        return runs
+
+    def _chunks(self, statements: List[BatchStatement]):
+        chunk, parameters = [], 0
+        for statement in statements:
+            if chunk and (parameters + len(statement.params) > self._max_parameters
+                          or len(chunk) >= self._max_statements):
+                yield chunk
+                chunk, parameters = [], 0
+            chunk.append(statement)
+            parameters += len(statement.params)
+        if chunk:
+            yield chunk
+
+    def _run(self, sql: str, execute):
+        started = time.perf_counter()
+        try:
+            result = execute()
+        except Exception as e:
+            logger.error(f"Failed to execute batch: {e}")
+            logger.error(f"Query: {sql}")
+            raise
+        self.round_trips += 1
+        return result, time.perf_counter() - started
+
+    def _send_one(self, statement: BatchStatement) -> None:
+        cursor = self.session._cursor
+        params = statement.params
+
+        def execute():
+            if params:
+                cursor.execute(statement.sql, params)
+            else:
+                cursor.execute(statement.sql)
+            return cursor.rowcount
+
+        rowcount, elapsed = self._run(statement.sql, execute)
+        statement.rowcount = rowcount if rowcount is not None and rowcount >= 0 else None
+        self.session.log_query(statement.sql, params, elapsed, rowcount)
+
+    def _send_many(self, run: List[BatchStatement]) -> None:
+        cursor = self.session._cursor
+        sql = run[0].sql
+        if hasattr(cursor, 'fast_executemany'):
+            cursor.fast_executemany = True
+        _, elapsed = self._run(sql, lambda: cursor.executemany(sql, [statement.params for statement in run]))
+        self.session.log_query(sql, None, elapsed, len(run))
+
+    def _send_multi(self, chunk: List[BatchStatement]) -> None:
+        if len(chunk) == 1:
+            self._send_one(chunk[0])
+            return
+        cursor = self.session._cursor
+        # NOCOUNT keeps the per-statement DONE messages out of the result sets; it is
+        # switched back off so later statements on this connection report rowcount again
+        sql = ("SET NOCOUNT ON;\n"
+               + "\n".join(f"{statement.sql};\nSELECT @@ROWCOUNT;" for statement in chunk)
+               + "\nSET NOCOUNT OFF;")
+        params = [value for statement in chunk for value in statement.params]
+
+        def execute():
+            if params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+            counts = []
+            while True:
+                if cursor.description is not None:
+                    row = cursor.fetchone()
+                    counts.append(row[0] if row else None)
+                if not cursor.nextset():
+                    break
+            return counts
+
+        try:
+            counts, elapsed = self._run(sql, execute)
+        except Exception:
+            self._reset_nocount(cursor)
+            raise
+        if len(counts) != len(chunk):
+            counts = [None] * len(chunk)
+        for statement, count in zip(chunk, counts):
+            statement.rowcount = count
+        self.session.log_query(sql, params, elapsed, sum(count or 0 for count in counts))
+
+    @staticmethod
+    def _reset_nocount(cursor) -> None:
+        """A failed batch never reaches its SET NOCOUNT OFF; the connection goes back
+        to the pool, so switch it off here or later rowcounts on it read -1"""
+        try:
+            cursor.execute("SET NOCOUNT OFF")
+        except Exception as e:
+            logger.warning(f"Could not reset NOCOUNT after a failed batch: {e}")
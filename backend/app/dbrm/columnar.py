@@ -0,0 +1,109 @@
+"""
+Columnar query results as NumPy arrays.
+
+Select.to_columns() reads a result in fetchmany batches and converts each
+batch straight into per-column arrays, so analytics can aggregate with
+vectorized NumPy operations instead of building an object per row. A
+column's kind comes from its declared dbrm type when the query selects model
+columns, otherwise from its first non-NULL value:
+
+- DATE / DATETIME / TIMESTAMP -> datetime64[us]
+- integer types               -> int64
+- FLOAT / DOUBLE / DECIMAL    -> float64
+- BOOLEAN / BIT               -> bool
+- anything else               -> object
+
+Columns with NULLs come back as numpy.ma.MaskedArray, masked on the NULL
+rows (which hold NaT, NaN, 0, False or None underneath).
+"""
+import datetime
+import decimal
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+KIND_DTYPES = {
+    'datetime': np.dtype('datetime64[us]'),
+    'int': np.dtype(np.int64),
+    'float': np.dtype(np.float64),
+    'bool': np.dtype(np.bool_),
+    'object': np.dtype(object),
+}
+
+_FILL = {'datetime': None, 'int': 0, 'float': np.nan, 'bool': False, 'object': None}
+
+_TYPE_PREFIXES = (
+    (('DATETIME', 'TIMESTAMP', 'DATE'), 'datetime'),
+    (('INT', 'TINYINT', 'SMALLINT', 'BIGINT'), 'int'),
+    (('FLOAT', 'DOUBLE', 'DECIMAL', 'NUMERIC', 'REAL'), 'float'),
+    (('BOOLEAN', 'BIT'), 'bool'),
+)
+
+
+def sql_kind(sql_type) -> str:
+    """Array kind for a dbrm column type"""
+    name = str(sql_type).upper()
+    for prefixes, kind in _TYPE_PREFIXES:
+        if name.startswith(prefixes):
+            return kind
+    return 'object'
+
+
+def value_kind(value) -> str:
+    """Array kind for a Python value returned by the driver"""
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, (float, decimal.Decimal)):
+        return 'float'
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return 'datetime'
+    return 'object'
+
+
+class ColumnBuilder:
+    """Accumulates one column's batches as typed arrays plus a NULL mask"""
+
+    __slots__ = ('kind', 'chunks', 'masks', 'leading_nulls')
+
+    def __init__(self, kind: Optional[str] = None):
+        if kind is not None and kind not in KIND_DTYPES:
+            raise ValueError(f"Unknown column kind '{kind}', expected one of: {', '.join(KIND_DTYPES)}")
+        self.kind = kind
+        self.chunks: List[np.ndarray] = []
+        self.masks: List[np.ndarray] = []
+        # NULLs seen before the first value of a column whose kind is inferred
+        self.leading_nulls = 0
+
+    def extend(self, values: Sequence) -> None:
+        if self.kind is None:
+            first = next((value for value in values if value is not None), None)
+            if first is None:
+                self.leading_nulls += len(values)
+                return
+            self.kind = value_kind(first)
+        mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        if mask.any() and self.kind != 'datetime':
+            fill = _FILL[self.kind]
+            values = [fill if value is None else value for value in values]
+        if self.kind == 'object':
+            data = np.empty(len(values), dtype=object)
+            data[:] = values
+        else:
+            # datetime64 takes None as NaT, and ISO strings (SQLite) as well as datetimes
+            data = np.array(values, dtype=KIND_DTYPES[self.kind])
+        self.chunks.append(data)
+        self.masks.append(mask)
+
+    def finish(self):
+        kind = self.kind or 'object'
+        dtype = KIND_DTYPES[kind]
+        chunks, masks = self.chunks, self.masks
+        if self.leading_nulls:
+            filler = np.full(self.leading_nulls, np.datetime64('NaT') if kind == 'datetime' else _FILL[kind], dtype=dtype)
+            chunks = [filler] + chunks
+            masks = [np.ones(self.leading_nulls, dtype=bool)] + masks
+        data = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+        return np.ma.MaskedArray(data, mask=mask) if mask.any() else data
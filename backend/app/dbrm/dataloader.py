@@ -0,0 +1,134 @@
+"""
+Request-scoped batching of primary-key lookups.
+
+Code that is about to look up many rows by key, one at a time, first queues
+the keys with Session.prefetch(). The first lookup that misses then resolves
+every queued key of that model with a single WHERE pk IN (...) query.
+Session.load_many() does both steps at once. Results, including keys with no
+row, are cached until the session writes to that table, so repeated
+get_by_id() calls within a request hit the database at most once per key.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .loading import MAX_IN_PARAMETERS
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value):
+    # CHAR keys come back blank-padded on SQL Server
+    return value.rstrip() if isinstance(value, str) else value
+
+
+class BatchLoader:
+    """Per-session cache and batch queue of primary-key lookups"""
+
+    def __init__(self, session):
+        self.session = session
+        # model -> {normalized key: key values as given}
+        self._pending: Dict[type, Dict[Tuple, Tuple]] = {}
+        # model -> {normalized key: instance, or None when no row exists}
+        self._results: Dict[type, Dict[Tuple, Any]] = {}
+        self.batches = 0
+        self.hits = 0
+
+    @staticmethod
+    def _key_tuple(model, key) -> Tuple:
+        pk_names = model._get_primary_key_info()
+        values = key if isinstance(key, tuple) else (key,)
+        if len(values) != len(pk_names):
+            raise ValueError(f"{model.__name__} key needs {len(pk_names)} values, got {len(values)}")
+        return values
+
+    def prefetch(self, model, keys: Iterable) -> None:
+        """Queue keys to be fetched together by the next lookup on model"""
+        results = self._results.get(model, {})
+        pending = self._pending.setdefault(model, {})
+        for key in keys:
+            if key is None:
+                continue
+            values = self._key_tuple(model, key)
+            normalized = tuple(_normalize(value) for value in values)
+            if normalized not in results:
+                pending.setdefault(normalized, values)
+
+    def load_many(self, model, keys: Iterable) -> List[Any]:
+        """Instances for keys in the given order (None where no row exists), fetched in one batch"""
+        keys = list(keys)
+        self.prefetch(model, keys)
+        self.dispatch(model)
+        results = self._results.get(model, {})
+        found = []
+        for key in keys:
+            if key is None:
+                found.append(None)
+                continue
+            normalized = tuple(_normalize(value) for value in self._key_tuple(model, key))
+            found.append(results.get(normalized))
+        return found
+
+    def lookup(self, model, pk_values: Tuple) -> Tuple[bool, Any]:
+        """
+        (found, instance) for a primary-key lookup.
+
+        A queued key triggers the batch for all of model's queued keys; a key
+        that was never queued or loaded returns (False, None) so the caller
+        queries it on its own.
+        """
+        normalized = tuple(_normalize(value) for value in pk_values)
+        results = self._results.get(model)
+        if results is not None and normalized in results:
+            self.hits += 1
+            return True, results[normalized]
+        if normalized in self._pending.get(model, {}):
+            self.dispatch(model)
+            return True, self._results[model].get(normalized)
+        return False, None
+
+    def dispatch(self, model=None) -> None:
+        """Resolve queued keys, for one model or all of them"""
+        models = [model] if model is not None else list(self._pending)
+        for target in models:
+            pending = self._pending.pop(target, None)
+            if pending:
+                self._fetch(target, pending)
+
+    def _fetch(self, model, pending: Dict[Tuple, Tuple]) -> None:
+        from .query import Select, Condition
+
+        pk_names = model._get_primary_key_info()
+        results = self._results.setdefault(model, {})
+        keys = list(pending.values())
+        chunk_size = max(1, MAX_IN_PARAMETERS // len(pk_names))
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            query = Select(session=self.session).from_(model)
+            if len(pk_names) == 1:
+                query.filter(Condition.in_(pk_names[0], [values[0] for values in chunk]))
+            else:
+                query.filter(Condition.or_(*[
+                    Condition.and_(*[Condition.eq(name, value) for name, value in zip(pk_names, values)])
+                    for values in chunk
+                ]))
+            for obj in query.all():
+                results[tuple(_normalize(obj.__dict__.get(name)) for name in pk_names)] = obj
+            self.batches += 1
+        # Remember keys with no row so they are not queried again
+        for normalized in pending:
+            results.setdefault(normalized, None)
+        logger.debug(f"Batch-loaded {len(pending)} {model.__name__} keys in {self.batches} batches so far")
+
+    def invalidate(self, table: str = None) -> None:
+        """Forget cached lookups for a table name, or for everything when table is None"""
+        if table is None:
+            self._results.clear()
+            return
+        table = table.lower()
+        for model in [m for m in self._results if m.__tablename__.lower() == table]:
+            del self._results[model]
+
+    def clear(self) -> None:
+        """Drop cached results and queued keys"""
+        self._results.clear()
+        self._pending.clear()
@@ -1,38 +1,143 @@
-import pyodbc
 import os
 from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from .pool import ConnectionPool
+from .replicas import ReplicaSet
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
 class Engine:
     """Database engine that manages connections."""
-    
-    def __init__(self, connection_string=None, **kwargs):
+
+    def __init__(self, connection_string=None, creator=None, pool_size=5, max_overflow=10,
+                 pool_min_size=0, pool_timeout=30.0, pool_recycle=3600, pool_idle_timeout=600,
+                 pool_pre_ping=True, pool_reset_on_return=True, dialect="mssql",
+                 replicas=None, replica_strategy="round_robin", max_replica_lag=None,
+                 replica_lag_probe=None, **kwargs):
+        """
+        Args:
+            connection_string: ODBC connection string
+            creator: Optional callable returning a new DBAPI connection; defaults to pyodbc.
+                     Lets a pyodbc-compatible stand-in (see dbrm.testing) replace the driver.
+            pool_size: Connections kept open between requests
+            max_overflow: Extra connections allowed under load, closed when returned
+            pool_min_size: Idle connections never pruned by the idle timeout
+            pool_timeout: Seconds to wait for a free connection before PoolTimeout
+            pool_recycle: Maximum connection age in seconds (None disables)
+            pool_idle_timeout: Seconds an idle connection may sit above pool_min_size (None disables)
+            pool_pre_ping: Validate connections with a cheap query on checkout
+            pool_reset_on_return: Roll back uncommitted work when a connection is returned
+            dialect: SQL dialect of the target database ("mssql", "sqlite", "postgresql" or "mysql")
+            replicas: Read replicas for Session(engine, readonly=True), as Engines or
+                      connection strings (pooled like the primary)
+            replica_strategy: "round_robin" or "least_loaded"
+            max_replica_lag: Seconds behind the primary a replica may be before reads
+                             skip it (None disables the check)
+            replica_lag_probe: Callable(engine) -> lag in seconds, replacing the dialect query
+        """
         self.connection_string = connection_string
+        self.dialect = dialect
         self._connection_params = kwargs
-        
+        self._creator = creator or self._raw_connect
+        self.pool = ConnectionPool(
+            self._creator,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            min_size=pool_min_size,
+            timeout=pool_timeout,
+            recycle=pool_recycle,
+            idle_timeout=pool_idle_timeout,
+            pre_ping=pool_pre_ping,
+            reset_on_return=pool_reset_on_return,
+        )
+        self.replicas = None
+        if replicas:
+            engines = [
+                replica if isinstance(replica, Engine) else Engine(
+                    replica, pool_size=pool_size, max_overflow=max_overflow, pool_min_size=pool_min_size,
+                    pool_timeout=pool_timeout, pool_recycle=pool_recycle, pool_idle_timeout=pool_idle_timeout,
+                    pool_pre_ping=pool_pre_ping, dialect=dialect, **kwargs,
+                )
+                for replica in replicas
+            ]
+            options = {'lag_probe': replica_lag_probe} if replica_lag_probe else {}
+            self.replicas = ReplicaSet(engines, strategy=replica_strategy, max_lag=max_replica_lag, **options)
+
     @classmethod
     def from_env(cls):
         """Create engine from environment variables."""
         load_dotenv()
-        
-        connection_string = (
-            f'DRIVER={{{os.getenv("DRIVER", "ODBC Driver 17 for SQL Server")}}};'
-            f'SERVER={os.getenv("SERVER")};'
-            f'DATABASE={os.getenv("DATABASE")};'
-            f'UID={os.getenv("UID")};'
-            f'PWD={os.getenv("PWD")};'
-            'charset=utf8mb4;'
+
+        def connection_string(server, extra=''):
+            return (
+                f'DRIVER={{{os.getenv("DRIVER", "ODBC Driver 17 for SQL Server")}}};'
+                f'SERVER={server};'
+                f'DATABASE={os.getenv("DATABASE")};'
+                f'UID={os.getenv("UID")};'
+                f'PWD={os.getenv("PWD")};'
+                'charset=utf8mb4;'
+                f'{extra}'
+            )
+
+        replica_servers = [server.strip() for server in os.getenv("DB_REPLICA_SERVERS", "").split(",") if server.strip()]
+        return cls(
+            connection_string(os.getenv("SERVER")),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+            pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "0")),
+            pool_timeout=_env_float("DB_POOL_TIMEOUT", 30.0),
+            pool_recycle=_env_float("DB_POOL_RECYCLE", 3600),
+            pool_idle_timeout=_env_float("DB_POOL_IDLE_TIMEOUT", 600),
+            pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+            dialect=os.getenv("DB_DIALECT", "mssql"),
+            replicas=[connection_string(server, 'ApplicationIntent=ReadOnly;') for server in replica_servers],
+            replica_strategy=os.getenv("DB_REPLICA_STRATEGY", "round_robin"),
+            max_replica_lag=_env_float("DB_REPLICA_MAX_LAG", None),
         )
-        return cls(connection_string)
-    
-    def connect(self):
-        """Get a connection."""
-        conn = pyodbc.connect(self.connection_string)
+
+    def _raw_connect(self):
+        """Open a new physical pyodbc connection."""
+        import pyodbc
+        conn = pyodbc.connect(self.connection_string, **self._connection_params)
         conn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
         conn.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-8')
         conn.setencoding(encoding='utf-8')
         return conn
-    
+
+    def connect(self, readonly=False):
+        """
+        Borrow a pooled connection. Closing it returns it to the pool.
+
+        readonly connections come from a replica when one is configured and
+        usable, otherwise from the primary.
+        """
+        if readonly and self.replicas is not None:
+            conn = self.replicas.connect()
+            if conn is not None:
+                return conn
+        return self.pool.connect()
+
+    def pool_status(self):
+        """Pool sizing and checkout metrics."""
+        return self.pool.status()
+
+    def replica_status(self):
+        """Replica health and read counts, None without replicas."""
+        return self.replicas.status() if self.replicas is not None else None
+
+    def dispose(self):
+        """Close all idle pooled connections."""
+        self.pool.dispose()
+        if self.replicas is not None:
+            self.replicas.dispose()
+
     @contextmanager
     def begin(self):
         """Get a connection as a context manager."""
@@ -41,7 +146,7 @@ class Engine:
             yield conn
         finally:
             conn.close()
-            
+
     def execute_raw(self, sql, params=None):
         with self.begin() as conn:
             cursor = conn.cursor()
@@ -50,7 +155,7 @@ class Engine:
                     cursor.execute(sql, params)
                 else:
                     cursor.execute(sql)
-                    
+
                 if sql.strip().upper().startswith(("SELECT", "SHOW", "DESC")):
                     return cursor.fetchall()
                 else:
@@ -61,7 +166,7 @@ class Engine:
                 raise
             finally:
                 cursor.close()
-                
+
     def create_session(self):
         from .session import Session
         return Session(self)
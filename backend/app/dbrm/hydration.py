@@ -0,0 +1,138 @@
+"""
+Row hydration: turning cursor rows into model instances, slotted row
+objects or pydantic schemas.
+
+Column-to-attribute mappings are computed once per (target, cursor
+description) and cached, so hydrating a result only costs one dict write
+per column per row.
+"""
+import keyword
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+_cache_lock = threading.Lock()
+_column_maps: Dict[Tuple, Tuple[Tuple[int, str], ...]] = {}
+_row_classes: Dict[Tuple[str, ...], type] = {}
+
+
+def description_names(description) -> Tuple[str, ...]:
+    """Column labels from a DBAPI cursor.description"""
+    return tuple(column[0] for column in description) if description else ()
+
+
+def column_map(target: Any, names: Tuple[str, ...], fields) -> Tuple[Tuple[int, str], ...]:
+    """(row index, attribute) pairs for the result columns that target knows about"""
+    key = (target, names)
+    mapping = _column_maps.get(key)
+    if mapping is None:
+        mapping = tuple((index, name) for index, name in enumerate(names) if name in fields)
+        with _cache_lock:
+            _column_maps[key] = mapping
+    return mapping
+
+
+def model_hydrator(model, description) -> Callable[[Sequence], Any]:
+    """Return a function building model instances from rows of this description"""
+    mapping = column_map(model, description_names(description), model._columns)
+    new = model.__new__
+
+    def hydrate(row):
+        instance = new(model)
+        values = {name: row[index] for index, name in mapping}
+        state = instance.__dict__
+        state.update(values)
+        # Persisted snapshot for dirty tracking, written without the __setattr__ hook
+        state['_loaded_state'] = values
+        state['_modified'] = set()
+        return instance
+
+    return hydrate
+
+
+def schema_hydrator(schema, description) -> Callable[[Sequence], Any]:
+    """Return a function building pydantic schema instances straight from rows of this description"""
+    mapping = column_map(schema, description_names(description), schema.model_fields)
+    validate = schema.model_validate
+
+    def hydrate(row):
+        return validate({name: row[index] for index, name in mapping})
+
+    return hydrate
+
+
+class Row:
+    """Base for compact, slotted result rows; supports attribute, index and mapping access"""
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            return getattr(self, index)
+        return getattr(self, self.__slots__[index])
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def keys(self) -> List[str]:
+        return list(self.__slots__)
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Row({values})"
+
+
+def _slot_names(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Attribute names for result labels; labels that are not identifiers become _<index>"""
+    slots, seen = [], set()
+    for index, name in enumerate(names):
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith('_') or name in seen:
+            name = f"_{index}"
+        seen.add(name)
+        slots.append(name)
+    return tuple(slots)
+
+
+def row_class(names: Tuple[str, ...]) -> type:
+    """Slotted Row subclass for a result shape, generated once and cached"""
+    cls = _row_classes.get(names)
+    if cls is None:
+        slots = _slot_names(names)
+        args = ", ".join(f"v{index}" for index in range(len(slots)))
+        body = "".join(f"\n    self.{name} = v{index}" for index, name in enumerate(slots)) or "\n    pass"
+        namespace = {}
+        exec(f"def __init__(self, {args}):{body}", namespace)
+        cls = type("Row", (Row,), {'__slots__': slots, '__init__': namespace['__init__']})
+        with _cache_lock:
+            _row_classes[names] = cls
+    return cls
+
+
+def row_hydrator(description) -> Callable[[Sequence], Row]:
+    """Return a function building slotted Row objects from rows of this description"""
+    cls = row_class(description_names(description))
+
+    def hydrate(row):
+        return cls(*row)
+
+    return hydrate
+
+
+def clear_caches() -> None:
+    """Drop cached column maps and row classes (e.g. after a schema change)"""
+    with _cache_lock:
+        _column_maps.clear()
+        _row_classes.clear()
@@ -0,0 +1,87 @@
+"""
+Per-request database instrumentation.
+
+A web middleware calls begin() when a request starts and end() when it
+finishes. In between, every Session running in that request's context adds
+to the same RequestStats: statements executed, time spent in the driver,
+rows fetched and time spent hydrating rows into objects, plus a count per
+statement shape (the parameterized SQL text) used to spot N+1 patterns.
+Outside a request (background jobs, scripts) the hooks do nothing.
+"""
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, List, Optional, Tuple
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("dbrm_request_stats", default=None)
+
+
+class RequestStats:
+    """Database work done while serving one request"""
+
+    __slots__ = ('statements', 'db_time', 'rows', 'hydration_time', 'shapes')
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.hydration_time = 0.0
+        # parameterized SQL -> times executed
+        self.shapes: Dict[str, int] = {}
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than threshold times, most frequent first"""
+        found = [(sql, count) for sql, count in self.shapes.items() if count > threshold]
+        return sorted(found, key=lambda item: item[1], reverse=True)
+
+
+def begin() -> Token:
+    """Start collecting stats for the current context"""
+    return _current.set(RequestStats())
+
+
+def end(token: Token) -> RequestStats:
+    """Stop collecting and return what was gathered since begin()"""
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def record_statement(sql: str, elapsed: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+        stats.shapes[sql] = stats.shapes.get(sql, 0) + 1
+
+
+def record_rows(count: int) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += count
+
+
+def record_hydration(elapsed: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.hydration_time += elapsed
+
+
+def timed(hydrate: Callable) -> Callable:
+    """Wrap a per-row hydrator so its time is counted, when a request is being instrumented"""
+    stats = _current.get()
+    if stats is None:
+        return hydrate
+    clock = time.perf_counter
+
+    def hydrate_timed(row):
+        started = clock()
+        try:
+            return hydrate(row)
+        finally:
+            stats.hydration_time += clock() - started
+
+    return hydrate_timed
@@ -0,0 +1,169 @@
+"""
+Eager loading of declared relationships.
+
+selectin(path) fetches the related rows for a whole parent result with one
+IN (...) query per relationship (chunked to stay under the parameter limit)
+and stitches them onto the parents in memory. joined(name) pulls a
+many-to-one relationship into the parent query itself with a LEFT JOIN.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .hydration import model_hydrator
+
+# SQL Server rejects statements with more bound parameters than this
+MAX_IN_PARAMETERS = 2000
+
+
+class LoaderOption:
+    """A relationship path and the strategy used to load it"""
+
+    __slots__ = ('path', 'strategy')
+
+    def __init__(self, path: str, strategy: str):
+        if not path:
+            raise ValueError("Loader option needs a relationship name")
+        self.path = tuple(path.split('.'))
+        self.strategy = strategy
+
+    def __repr__(self):
+        return f"{self.strategy}({'.'.join(self.path)!r})"
+
+
+def selectin(path: str) -> LoaderOption:
+    """
+    Load a relationship for every parent in a result with one IN query.
+
+    Dotted paths ("logs.worker") load nested relationships level by level.
+    """
+    return LoaderOption(path, 'selectin')
+
+
+def joined(name: str) -> LoaderOption:
+    """Load a many-to-one relationship in the parent query through a LEFT JOIN"""
+    if '.' in name:
+        raise ValueError("joined() takes a single relationship; use selectin() for nested paths")
+    return LoaderOption(name, 'joined')
+
+
+def _normalize(value):
+    # CHAR keys come back blank-padded on SQL Server
+    return value.rstrip() if isinstance(value, str) else value
+
+
+def _key(obj, columns: Sequence[str]) -> Tuple:
+    return tuple(_normalize(obj.__dict__.get(name)) for name in columns)
+
+
+def get_relationship(model, name: str):
+    """Resolved Relationship called name on model"""
+    relationship = getattr(model, '_relationships', {}).get(name)
+    if relationship is None:
+        raise ValueError(f"{model.__name__} has no relationship '{name}'")
+    return relationship.resolve()
+
+
+def load_selectin(session, parents: List[Any], path: Tuple[str, ...]) -> None:
+    """Load path onto parents, one IN query per relationship level"""
+    if not parents:
+        return
+    relationship = get_relationship(type(parents[0]), path[0])
+    children = _select_related(session, relationship, parents)
+    if len(path) > 1:
+        load_selectin(session, children, path[1:])
+
+
+def _select_related(session, relationship, parents: List[Any]) -> List[Any]:
+    from .query import Select, Condition
+
+    target = relationship.target
+    local, remote = relationship.local, relationship.remote
+    keys = list(dict.fromkeys(key for key in (_key(parent, local) for parent in parents)
+                              if None not in key))
+
+    children = []
+    chunk_size = max(1, MAX_IN_PARAMETERS // len(remote))
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        query = Select(session=session).from_(target)
+        if len(remote) == 1:
+            query.filter(Condition.in_(remote[0], [key[0] for key in chunk]))
+        else:
+            query.filter(Condition.or_(*[
+                Condition.and_(*[Condition.eq(name, value) for name, value in zip(remote, key)])
+                for key in chunk
+            ]))
+        if relationship.order_by:
+            query.order_by_columns.append(relationship.order_by)
+        children.extend(query.all())
+
+    by_key: Dict[Tuple, List[Any]] = {}
+    for child in children:
+        by_key.setdefault(_key(child, remote), []).append(child)
+
+    name = relationship.name
+    for parent in parents:
+        matched = by_key.get(_key(parent, local), [])
+        if relationship.uselist:
+            parent.__dict__[name] = list(matched)
+        else:
+            parent.__dict__[name] = matched[0] if matched else None
+    return children
+
+
+def joined_alias(name: str) -> str:
+    return f"j_{name}"
+
+
+def joined_prefix(name: str) -> str:
+    return f"{name}__"
+
+
+def joined_sql(from_table: str, relationship) -> str:
+    """
+    LEFT JOIN clause for a joined() relationship.
+
+    The related table is wrapped in a derived table whose columns are renamed
+    with a "<name>__" prefix, so they can never clash with (or make ambiguous)
+    the parent's unqualified column references in WHERE and ORDER BY.
+    """
+    target = relationship.target
+    name = relationship.name
+    alias = joined_alias(name)
+    prefix = joined_prefix(name)
+    columns = ", ".join(f"{column} AS {prefix}{column}" for column in target._column_names)
+    on = " AND ".join(
+        f"{alias}.{prefix}{remote} = {from_table}.{local}"
+        for local, remote in zip(relationship.local, relationship.remote)
+    )
+    return f" LEFT JOIN (SELECT {columns} FROM {target.__tablename__}) {alias} ON {on}"
+
+
+def joined_hydrator(session, relationship, description):
+    """Return a function attaching the joined related object built from a combined row"""
+    target = relationship.target
+    name = relationship.name
+    prefix = joined_prefix(name)
+    positions = []
+    sub_description = []
+    for index, column in enumerate(description):
+        if column[0].startswith(prefix):
+            positions.append(index)
+            sub_description.append((column[0][len(prefix):],) + tuple(column[1:]))
+    key_positions = [positions[i] for i, column in enumerate(sub_description)
+                     if column[0] in relationship.remote]
+    hydrate = model_hydrator(target, sub_description)
+    if getattr(session, 'unit_of_work', False):
+        load = session._identity_load
+        build = lambda values: load(hydrate(values))
+    else:
+        build = hydrate
+
+    def attach(parent, row):
+        if all(row[index] is None for index in key_positions):
+            related = None
+        else:
+            related = build(tuple(row[index] for index in positions))
+        parent.__dict__[name] = related
+        return parent
+
+    return attach
@@ -0,0 +1,96 @@
+"""
+Keyset pagination helpers: opaque cursor tokens and query wiring.
+
+A cursor token is the URL-safe base64 of a JSON array holding the cursor
+column values of the last row on a page. Datetimes, dates and Decimals are
+tagged so they round-trip with their original types.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor token cannot be decoded."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    if isinstance(value, str):
+        # CHAR keys come back blank-padded on SQL Server
+        return value.rstrip()
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise InvalidCursor("Unknown cursor value type")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token for the given cursor column values."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """Cursor column values from a token produced by encode_cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list):
+            raise InvalidCursor("Malformed pagination cursor")
+        return [_decode_value(value) for value in values]
+    except InvalidCursor:
+        raise
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed pagination cursor: {e}")
+
+
+def paginate(query, cursor_columns, cursor: Optional[str] = None, skip: int = 0, limit: int = 100,
+             descending: bool = False):
+    """
+    Apply keyset pagination to a Select.
+    
+    With a cursor the query seeks past the encoded row and skip is ignored;
+    without one it returns the first page (offset by skip, for clients still
+    paging by number) in the same order, so its last row yields the next cursor.
+    """
+    if cursor:
+        query.after(cursor_columns, decode_cursor(cursor), descending=descending)
+    else:
+        query.after(cursor_columns, descending=descending)
+        if skip:
+            query.offset(skip)
+    return query.limit(limit)
+
+
+def next_cursor(items: Sequence[Any], fields: Sequence[str], limit: int) -> Optional[str]:
+    """
+    Token for the page after items, or None when items is the last page.
+    
+    items may be objects or dicts; fields name the cursor columns on them.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        values = [last[field] for field in fields]
+    else:
+        values = [getattr(last, field) for field in fields]
+    return encode_cursor(values)
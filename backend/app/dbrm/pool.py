@@ -0,0 +1,303 @@
+"""
+Thread-safe connection pool used by the Engine.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class _PoolEntry:
+    """Bookkeeping for one physical connection owned by the pool."""
+
+    __slots__ = ('connection', 'created_at', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled DBAPI connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, entry):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+
+    @property
+    def connection(self):
+        """The underlying DBAPI connection (None once returned)."""
+        entry = self._entry
+        return entry.connection if entry else None
+
+    def __getattr__(self, name):
+        entry = self._entry
+        if entry is None:
+            raise RuntimeError("Connection has already been returned to the pool")
+        return getattr(entry.connection, name)
+
+    def __setattr__(self, name, value):
+        entry = self._entry
+        if entry is None:
+            raise RuntimeError("Connection has already been returned to the pool")
+        setattr(entry.connection, name, value)
+
+    def invalidate(self):
+        """Discard the underlying connection instead of returning it to the pool."""
+        entry = self._entry
+        if entry is not None:
+            object.__setattr__(self, '_entry', None)
+            self._pool._discard(entry, checked_out=True)
+
+    def close(self):
+        """Return the connection to the pool."""
+        entry = self._entry
+        if entry is not None:
+            object.__setattr__(self, '_entry', None)
+            self._pool._checkin(entry)
+
+    @property
+    def closed(self) -> bool:
+        return self._entry is None
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DBAPI connections.
+
+    Up to pool_size connections are kept open between checkouts; up to
+    max_overflow additional connections may be opened under load and are
+    closed again when returned. Connections older than recycle seconds,
+    or idle for longer than idle_timeout seconds (above min_size), are
+    replaced. With pre_ping enabled every checkout is validated with a
+    cheap statement, and with reset_on_return every checkin rolls back
+    whatever the borrower left open.
+    """
+
+    def __init__(self, creator: Callable[[], Any], pool_size: int = 5, max_overflow: int = 10,
+                 min_size: int = 0, timeout: float = 30.0, recycle: Optional[float] = 3600,
+                 idle_timeout: Optional[float] = 600, pre_ping: bool = True,
+                 reset_on_return: bool = True, ping_query: str = "SELECT 1"):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if min_size > pool_size:
+            raise ValueError("min_size cannot exceed pool_size")
+
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max(max_overflow, 0)
+        self.min_size = max(min_size, 0)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.reset_on_return = reset_on_return
+        self.ping_query = ping_query
+
+        self._idle = deque()
+        self._total = 0
+        self._checked_out = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'recycled': 0,
+            'invalidated': 0,
+            'ping_failures': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'timeouts': 0,
+        }
+
+    @property
+    def max_size(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def connect(self) -> PooledConnection:
+        """Borrow a connection from the pool."""
+        deadline = None
+        wait_started = None
+
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    entry = self._pop_idle()
+                    if entry is not None:
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1
+                        break
+                    # Pool exhausted: wait for a checkin
+                    now = time.monotonic()
+                    if wait_started is None:
+                        wait_started = now
+                        deadline = now + self.timeout if self.timeout is not None else None
+                        self._stats['waits'] += 1
+                    remaining = None if deadline is None else deadline - now
+                    if remaining is not None and remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        self._record_wait(wait_started)
+                        raise PoolTimeout(
+                            f"Connection pool exhausted: {self._checked_out} checked out, "
+                            f"limit {self.max_size}, timed out after {self.timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                self._checked_out += 1
+                self._stats['checkouts'] += 1
+                if wait_started is not None:
+                    self._record_wait(wait_started)
+                    wait_started = None
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(self._creator())
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._checked_out -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['connections_created'] += 1
+            elif self.pre_ping and not self._ping(entry):
+                self._discard(entry, checked_out=True)
+                continue
+
+            entry.last_used = time.monotonic()
+            return PooledConnection(self, entry)
+
+    def _pop_idle(self) -> Optional[_PoolEntry]:
+        """Take the most recently used live connection. Caller holds the lock."""
+        while self._idle:
+            entry = self._idle.pop()
+            if self.recycle is not None and time.monotonic() - entry.created_at > self.recycle:
+                self._stats['recycled'] += 1
+                self._close_locked(entry)
+                continue
+            return entry
+        return None
+
+    def _ping(self, entry) -> bool:
+        try:
+            cursor = entry.connection.cursor()
+            try:
+                cursor.execute(self.ping_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed pre-ping, reconnecting: {e}")
+            with self._cond:
+                self._stats['ping_failures'] += 1
+            return False
+
+    def _checkin(self, entry):
+        if self.reset_on_return:
+            try:
+                entry.connection.rollback()
+            except Exception as e:
+                logger.warning(f"Failed to reset pooled connection, discarding it: {e}")
+                self._discard(entry, checked_out=True)
+                return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._checked_out -= 1
+            if len(self._idle) >= self.pool_size:
+                # Overflow connection: close rather than keep
+                self._close_locked(entry)
+            else:
+                self._idle.append(entry)
+                self._prune_idle_locked()
+            self._cond.notify()
+
+    def _discard(self, entry, checked_out=False):
+        with self._cond:
+            if checked_out:
+                self._checked_out -= 1
+            self._stats['invalidated'] += 1
+            self._close_locked(entry)
+            self._cond.notify()
+
+    def _prune_idle_locked(self):
+        """Close connections idle longer than idle_timeout, keeping min_size open."""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        # The left end of the deque holds the least recently used connections
+        while len(self._idle) > self.min_size and now - self._idle[0].last_used > self.idle_timeout:
+            self._stats['recycled'] += 1
+            self._close_locked(self._idle.popleft())
+
+    def _close_locked(self, entry):
+        self._total -= 1
+        self._stats['connections_closed'] += 1
+        try:
+            entry.connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+    def _record_wait(self, wait_started):
+        waited = time.monotonic() - wait_started
+        self._stats['wait_time'] += waited
+        self._stats['max_wait_time'] = max(self._stats['max_wait_time'], waited)
+
+    def prefill(self) -> int:
+        """Open connections until min_size are idle. Returns the number opened."""
+        opened = 0
+        while True:
+            with self._cond:
+                if len(self._idle) >= self.min_size or self._total >= self.max_size:
+                    return opened
+                self._total += 1
+            try:
+                entry = _PoolEntry(self._creator())
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            with self._cond:
+                self._stats['connections_created'] += 1
+                self._idle.append(entry)
+                self._cond.notify()
+            opened += 1
+
+    def dispose(self):
+        """Close all idle connections. Checked-out connections close on return."""
+        with self._cond:
+            while self._idle:
+                self._close_locked(self._idle.popleft())
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of pool sizing and checkout metrics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'size': self._total,
+                'checked_out': self._checked_out,
+                'idle': len(self._idle),
+                'overflow': max(self._total - self.pool_size, 0),
+            })
+        stats['avg_wait_time'] = stats['wait_time'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
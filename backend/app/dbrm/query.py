@@ -1,13 +1,163 @@
-from datetime import datetime
+import json
+import time
+
+from . import instrumentation
+from .cache import statement_cache, result_cache
+from .hydration import model_hydrator, schema_hydrator, row_hydrator
+from .loading import get_relationship, load_selectin, joined_sql, joined_hydrator
+from .schema import Column
+
+
+class Clause:
+    """
+    SQL fragment compiled with ? placeholders plus its ordered bind parameters.
+
+    key identifies the fragment's shape without its values and is what the
+    statement cache fingerprints on; sql is rendered lazily, so a cache hit
+    never builds the text. str() renders the parameters inline as literals;
+    that form is only meant for logging and must never be sent to the database.
+    """
+
+    __slots__ = ('_sql', 'params', 'key')
+
+    def __init__(self, sql, params=(), key=None):
+        self._sql = sql
+        self.params = tuple(params)
+        self.key = sql if key is None else key
+
+    @property
+    def sql(self):
+        if self._sql is None:
+            self._sql = self._render()
+        return self._sql
+
+    def _render(self):
+        raise NotImplementedError
+
+    def __str__(self):
+        return render_literal_sql(self.sql, self.params)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.sql!r}, {self.params!r})"
+
+
+class Comparison(Clause):
+    """column <operator> value, where value is bound unless it is a Column"""
+
+    __slots__ = ('column', 'operator', 'operand')
+
+    def __init__(self, column, operator, value):
+        if isinstance(value, Column):
+            operand, params = value, ()
+        else:
+            operand, params = None, (value,)
+        self.column = column
+        self.operator = operator
+        self.operand = operand
+        column_key = column if isinstance(column, (str, Column)) else str(column)
+        super().__init__(None, params, ('cmp', column_key, operator, operand))
+
+    def _render(self):
+        operand_sql = Condition._column_sql(self.operand) if self.operand is not None else "?"
+        return f"{Condition._column_sql(self.column)} {self.operator} {operand_sql}"
+
+
+class BooleanClause(Clause):
+    """Conditions joined with AND / OR, wrapped in parentheses"""
+
+    __slots__ = ('operator', 'conditions')
+
+    def __init__(self, operator, conditions):
+        params = []
+        keys = []
+        for condition in conditions:
+            if isinstance(condition, Clause):
+                params.extend(condition.params)
+                keys.append(condition.key)
+            else:
+                keys.append(str(condition))
+        self.operator = operator
+        self.conditions = conditions
+        super().__init__(None, params, (operator, tuple(keys)))
+
+    def _render(self):
+        return f"({f' {self.operator} '.join(compile_clause(c)[0] for c in self.conditions)})"
+
+
+def compile_clause(clause):
+    """Return (sql, params) for a Clause or a raw SQL string."""
+    if isinstance(clause, Clause):
+        return clause.sql, clause.params
+    return str(clause), ()
+
+
+def clause_key(clause):
+    """Return (shape key, params) for a Clause or a raw SQL string."""
+    if isinstance(clause, Clause):
+        return clause.key, clause.params
+    return str(clause), ()
+
+
+def bind_value(value):
+    """A parameter as the driver takes it: lists and dicts (JSON columns) go as JSON text"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def bind_params(params):
+    return [bind_value(value) for value in params]
+
+
+def render_literal_sql(sql, params):
+    """Render ? placeholders as SQL literals, for logging only."""
+    if not params:
+        return sql
+    parts = []
+    param_iter = iter(params)
+    in_quote = False
+    for char in sql:
+        if char == "'":
+            in_quote = not in_quote
+        if char == '?' and not in_quote:
+            try:
+                parts.append(Condition._format_value(next(param_iter)))
+                continue
+            except StopIteration:
+                pass
+        parts.append(char)
+    return ''.join(parts)
+
+
+# Dialects that can hand back written rows in the same statement
+RETURNING_DIALECTS = ('mssql', 'sqlite', 'postgresql')
+
+
+def returning_clause(dialect, columns):
+    """
+    Render the clause returning written rows: OUTPUT INSERTED.<col> on SQL
+    Server, RETURNING <col> elsewhere. dialect None means standard RETURNING.
+    """
+    if dialect == 'mysql':
+        raise ValueError("mysql cannot return written rows; re-select them instead")
+    if dialect == 'mssql':
+        return "OUTPUT " + ", ".join(f"INSERTED.{col}" for col in columns)
+    return "RETURNING " + ", ".join(columns)
+
+
+def table_hint_clause(hints):
+    """Render SQL Server table hints: WITH (UPDLOCK, READPAST)"""
+    return f" WITH ({', '.join(hints)})"
+
 
 class Condition:
     
     @staticmethod
     def _format_value(value):
-        """Format a value for SQL queries"""
+        """Format a value as a SQL literal (used for logging only)"""
         from datetime import datetime, date
         if isinstance(value, str):
-            return f"'{value}'"
+            return "'" + value.replace("'", "''") + "'"
         elif isinstance(value, (datetime, date)):
             return f"'{value}'"
         elif value is None:
@@ -15,112 +165,112 @@ class Condition:
         else:
             return str(value)
     
+    @staticmethod
+    def _column_sql(column):
+        """Render a column reference, table-qualified when the column is bound to a model"""
+        if isinstance(column, Column) and getattr(column, 'parent', None) is not None:
+            return f"{column.parent.__tablename__}.{column.name}"
+        return str(column)
+    
+    @staticmethod
+    def _operand(value):
+        """Compile a right-hand operand: columns and expressions are inlined, everything else is bound"""
+        if isinstance(value, Column):
+            return Condition._column_sql(value), ()
+        if isinstance(value, Clause):
+            return value.sql, value.params
+        return "?", (value,)
+    
+    @staticmethod
+    def _compare(column, operator, value):
+        return Comparison(column, operator, value)
+    
     @staticmethod
     def eq(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} = {value_str}"
+        return Condition._compare(column, "=", value)
     
     @staticmethod
     def ne(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} != {value_str}"
+        return Condition._compare(column, "!=", value)
     
     @staticmethod
     def gt(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} > {value_str}"
+        return Condition._compare(column, ">", value)
 
     @staticmethod
     def gte(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} >= {value_str}"
+        return Condition._compare(column, ">=", value)
     
     @staticmethod
     def lt(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} < {value_str}"
+        return Condition._compare(column, "<", value)
 
     @staticmethod
     def lte(column, value):
-        if hasattr(column, 'parent') and hasattr(column.parent, '__tablename__') and hasattr(column, 'name'):
-            column_str = f"{column.parent.__tablename__}.{column.name}"
-        elif hasattr(column, 'name'):
-            column_str = column.name
-        else:
-            column_str = str(column)
-        value_str = Condition._format_value(value)
-        return f"{column_str} <= {value_str}"
+        return Condition._compare(column, "<=", value)
     
     @staticmethod
     def like(column, pattern):
-        column = f"{column.parent.__tablename__}.{column.name}" if hasattr(column, 'parent') else column
-        return f"{column} LIKE '{pattern}'"
+        return Condition._compare(column, "LIKE", pattern)
 
     @staticmethod
     def in_(column, values):
-        formatted_values = []
-        for v in values:
-            if isinstance(v, str):
-                formatted_values.append(f"'{v}'")
-            else:
-                formatted_values.append(str(v))
-        return f"{column} IN ({', '.join(formatted_values)})"
+        values = list(values)
+        if not values:
+            # Empty IN list matches nothing
+            return Clause("1 = 0")
+        placeholders = ", ".join("?" for _ in values)
+        return Clause(f"{Condition._column_sql(column)} IN ({placeholders})", values)
     
     @staticmethod
     def between(column, start, end):
-        return f"{column} BETWEEN {start} AND {end}"
+        return Clause(f"{Condition._column_sql(column)} BETWEEN ? AND ?", (start, end))
     
     @staticmethod
     def is_null(column):
-        return f"{column} IS NULL"
+        return Clause(f"{Condition._column_sql(column)} IS NULL")
     
     @staticmethod
     def not_null(column):
-        return f"{column} IS NOT NULL"
+        return Clause(f"{Condition._column_sql(column)} IS NOT NULL")
+    
+    @staticmethod
+    def case(column, whens, default=None):
+        """
+        CASE column WHEN ? THEN ? ... [ELSE default] END, e.g. to give each row
+        its own value in one UPDATE: set_(worker_id=Condition.case(ServiceOrder.order_id, {...}))
+        """
+        whens = dict(whens)
+        if not whens:
+            raise ValueError("CASE needs at least one WHEN")
+        params = []
+        for key, value in whens.items():
+            params.extend((key, value))
+        sql = f"CASE {Condition._column_sql(column)}" + " WHEN ? THEN ?" * len(whens)
+        if default is not None:
+            default_sql, default_params = Condition._operand(default)
+            sql += f" ELSE {default_sql}"
+            params.extend(default_params)
+        return Clause(sql + " END", params)
+    
+    @staticmethod
+    def increment(column, amount=1):
+        """column + amount, for SET clauses that must not read-modify-write"""
+        return Clause(f"{Condition._column_sql(column)} + ?", (amount,))
     
     @staticmethod
     def or_(*conditions):
-        return f"({' OR '.join(conditions)})"
+        return BooleanClause("OR", conditions)
     
     @staticmethod
     def and_(*conditions):
-        return f"({' AND '.join(conditions)})"
+        return BooleanClause("AND", conditions)
     
     @staticmethod
     def coleq(left_column, right_column):
         left_table = left_column.parent
         right_table = right_column.parent
-        return f"{left_table.__tablename__}.{left_column.name} = {right_table.__tablename__}.{right_column.name}"
+        return Clause(f"{left_table.__tablename__}.{left_column.name} = {right_table.__tablename__}.{right_column.name}")
 
 
 class Select:
@@ -138,6 +288,11 @@ class Select:
         self._params = []
         self._model_class = None
         self._session = session
+        self._yield_per = None
+        self._selectin = []
+        self._joined = []
+        self._cache_ttl = None
+        self.table_hints = ()
     
     def from_(self, table):
         if hasattr(table, '__tablename__'):
@@ -157,6 +312,11 @@ class Select:
             self.where_clauses.append(condition)
         return self
     
+    def with_hint(self, *hints):
+        """SQL Server table hints on the FROM table, e.g. with_hint("READPAST"); none is a no-op"""
+        self.table_hints = self.table_hints + hints
+        return self
+    
     def order_by(self, *columns):
         columns = [f"{col.parent.__tablename__}.{col.name}" for col in columns if hasattr(col, 'parent')]
         self.order_by_columns.extend(columns)
@@ -170,6 +330,102 @@ class Select:
         self.order_by_columns.append(f"{column} DESC")
         return self
     
+    def after(self, cursor_columns, last_values=None, descending=False):
+        """
+        Keyset (seek) pagination.
+        
+        Orders by cursor_columns and, given the last row's values from the
+        previous page, keeps only rows strictly past it. The predicate is the
+        expanded form (a > x) OR (a = x AND b > y) ..., which SQL Server can
+        seek on an index over the cursor columns, so every page costs the same
+        as the first. cursor_columns must be non-null and unique together
+        (end with the primary key); last_values None starts at the first page.
+        """
+        columns = list(cursor_columns)
+        if not columns:
+            raise ValueError("after() needs at least one cursor column")
+        
+        direction = "DESC" if descending else "ASC"
+        for column in columns:
+            self.order_by_columns.append(f"{Condition._column_sql(column)} {direction}")
+        
+        if last_values is not None:
+            last_values = list(last_values)
+            if len(last_values) != len(columns):
+                raise ValueError(f"Expected {len(columns)} cursor values, got {len(last_values)}")
+            operator = "<" if descending else ">"
+            branches = []
+            for i, column in enumerate(columns):
+                terms = [Condition.eq(columns[j], last_values[j]) for j in range(i)]
+                terms.append(Condition._compare(column, operator, last_values[i]))
+                branches.append(terms[0] if len(terms) == 1 else Condition.and_(*terms))
+            self.where_clauses.append(branches[0] if len(branches) == 1 else Condition.or_(*branches))
+        return self
+    
+    def options(self, *loaders):
+        """
+        Eager-load declared relationships of the selected model.
+        
+        selectin(path) issues one IN query per relationship for the whole
+        result; joined(name) adds a LEFT JOIN for a many-to-one relationship.
+        """
+        if self._model_class is None:
+            raise ValueError("options() needs a model selected with from_()")
+        for loader in loaders:
+            if loader.strategy == 'joined':
+                relationship = get_relationship(self._model_class, loader.path[0])
+                if relationship.uselist:
+                    raise ValueError(
+                        f"joined() cannot load collection '{relationship.name}'; use selectin()"
+                    )
+                if relationship not in self._joined:
+                    self._joined.append(relationship)
+            else:
+                get_relationship(self._model_class, loader.path[0])
+                self._selectin.append(loader.path)
+        return self
+    
+    def cached(self, ttl: float = 300):
+        """
+        Serve this query's rows from the shared result cache for up to ttl seconds.
+        
+        Meant for slow-changing reference data. Entries are keyed on the
+        compiled SQL and parameters and dropped as soon as a Session writes to
+        any table the query reads. Raw rows (to_model=False) come back as tuples.
+        """
+        if ttl <= 0:
+            raise ValueError("cache ttl must be positive")
+        self._cache_ttl = ttl
+        return self
+    
+    def _read_tables(self):
+        """Tables this query reads, for result cache invalidation"""
+        tables = [self.from_table]
+        tables.extend(table.split()[0] for _, table, _ in self.join_clauses)
+        tables.extend(relationship.target.__tablename__ for relationship in self._joined)
+        return tables
+    
+    def _fetch(self, session, one=False):
+        """(cursor description, rows), from the result cache when the query is cached()"""
+        if self._cache_ttl is None:
+            cursor = self.execute(session)
+            if one:
+                row = session.fetchone()
+                return cursor.description, [row] if row else []
+            return cursor.description, session.fetchall()
+        
+        # Pending unit-of-work changes are flushed (and invalidate) before the lookup
+        session._before_execute(self)
+        sql, params = self.compile()
+        key = (sql, tuple(params))
+        entry = result_cache.get(key)
+        if entry is None:
+            cursor = self.execute(session)
+            entry = (cursor.description, [tuple(row) for row in session.fetchall()])
+            result_cache.put(key, entry, self._cache_ttl, self._read_tables())
+        description, rows = entry
+        return description, rows[:1] if one else rows
+    
     def limit(self, count):
         self.limit_count = count
         return self
@@ -215,69 +471,329 @@ class Select:
     def full_join(self, table, condition):
         return self.join(table, condition, "FULL")
     
-    def build(self):
-        if not self.from_table:
-            raise ValueError("No FROM table specified")
+    def _shape(self):
+        """
+        Split the query into its structural fingerprint and bound parameters.
+        
+        The fingerprint covers table, joins, columns, condition shapes,
+        grouping, ordering and limit/offset presence, but no values.
+        """
+        params = []
+        
+        joins = []
+        for join_type, table, condition in self.join_clauses:
+            key, condition_params = clause_key(condition)
+            joins.append((join_type, table, key))
+            params.extend(condition_params)
+        
+        where = []
+        for condition in self.where_clauses:
+            key, condition_params = clause_key(condition)
+            where.append(key)
+            params.extend(condition_params)
         
+        having = []
+        for condition in self.having_clauses:
+            key, condition_params = clause_key(condition)
+            having.append(key)
+            params.extend(condition_params)
+        
+        if self.limit_count is not None:
+            params.append(self.limit_count)
+        if self.offset_count is not None:
+            params.append(self.offset_count)
+        
+        # Columns and plain names hash by identity; expressions are rebuilt per query, so key on their text
+        columns = tuple(col if isinstance(col, (str, Column)) else str(col) for col in self.columns)
+        
+        key = (
+            self.from_table,
+            columns,
+            tuple(joins),
+            tuple(where),
+            tuple(self.group_by_columns),
+            tuple(having),
+            tuple(self.order_by_columns),
+            self.limit_count is not None,
+            self.offset_count is not None,
+            tuple(relationship.name for relationship in self._joined),
+            self.table_hints,
+        )
+        return key, params
+    
+    def _bind_params(self):
+        """Bound parameters in placeholder order"""
+        params = []
+        for _, _, condition in self.join_clauses:
+            params.extend(compile_clause(condition)[1])
+        for condition in self.where_clauses:
+            params.extend(compile_clause(condition)[1])
+        for condition in self.having_clauses:
+            params.extend(compile_clause(condition)[1])
+        if self.limit_count is not None:
+            params.append(self.limit_count)
+        if self.offset_count is not None:
+            params.append(self.offset_count)
+        return params
+    
+    def _build_sql(self):
+        """Render the SQL text with ? placeholders"""
         columns = ", ".join(str(col) for col in self.columns)
+        if self._joined:
+            if columns == "*":
+                columns = f"{self.from_table}.*"
+            columns += "".join(f", j_{relationship.name}.*" for relationship in self._joined)
         sql = f"SELECT {columns} FROM {self.from_table}"
+        if self.table_hints:
+            sql += table_hint_clause(self.table_hints)
+        
+        for relationship in self._joined:
+            sql += joined_sql(self.from_table, relationship)
         
         for join_type, table, condition in self.join_clauses:
-            sql += f" {join_type} JOIN {table} ON {condition}"
+            sql += f" {join_type} JOIN {table} ON {compile_clause(condition)[0]}"
         
         if self.where_clauses:
-            sql += " WHERE " + " AND ".join(self.where_clauses)
+            sql += " WHERE " + " AND ".join(compile_clause(c)[0] for c in self.where_clauses)
         
         if self.group_by_columns:
             sql += " GROUP BY " + ", ".join(self.group_by_columns)
         
         if self.having_clauses:
-            sql += " HAVING " + " AND ".join(self.having_clauses)
+            sql += " HAVING " + " AND ".join(compile_clause(c)[0] for c in self.having_clauses)
         
         if self.order_by_columns:
             sql += " ORDER BY " + ", ".join(self.order_by_columns)
         
         if self.limit_count is not None:
-            sql += f" LIMIT {self.limit_count}"
+            sql += " LIMIT ?"
         
         if self.offset_count is not None:
-            sql += f" OFFSET {self.offset_count}"
+            sql += " OFFSET ?"
         
         return sql
     
+    def compile(self):
+        """
+        Compile to (sql, params) with ? placeholders for every bound value.
+        
+        SQL text is cached per query shape, so repeated executions only bind parameters.
+        """
+        if not self.from_table:
+            raise ValueError("No FROM table specified")
+        
+        if not statement_cache.enabled:
+            return self._build_sql(), self._bind_params()
+        
+        key, params = self._shape()
+        sql = statement_cache.get(key)
+        if sql is None:
+            sql = self._build_sql()
+            statement_cache.put(key, sql)
+        return sql, params
+    
+    def build(self):
+        """SQL text with ? placeholders; see compile() for the parameters"""
+        return self.compile()[0]
+    
     def execute(self, session=None):
         session = session or self._session
         if not session:
             raise ValueError("No session provided for query execution")
-        sql = self.build()
-        return session.execute(sql)
+        return session.execute(self)
+    
+    def _primary_key_lookup(self):
+        """Primary key values when the query is a plain equality lookup on the full key"""
+        if (self._model_class is None or self.columns != ["*"] or self.join_clauses
+                or self.group_by_columns or self.offset_count or self._selectin or self._joined):
+            return None
+        values = {}
+        for condition in self.where_clauses:
+            if not isinstance(condition, Comparison) or condition.operator != "=" or condition.operand is not None:
+                return None
+            values[str(condition.column)] = condition.params[0]
+        try:
+            pk_names = self._model_class._get_primary_key_info()
+        except (AttributeError, ValueError):
+            return None
+        if set(values) != set(pk_names):
+            return None
+        return tuple(values[name] for name in pk_names)
+    
+    def _hydrator(self, session, description, schema=None):
+        """
+        Row -> object function for this query's result shape.
         
-    def first(self, session=None, to_model=True):
+        schema hydrates straight into a pydantic model without building ORM
+        objects. Full-row model selects use the cached column map and go through
+        the session's identity map; projections keep the positional _from_row.
+        """
+        if schema is not None:
+            if self._selectin or self._joined:
+                raise ValueError("Relationship loader options need model results, not a schema")
+            return schema_hydrator(schema, description)
+        if self.columns != ["*"] or self.join_clauses:
+            return self._model_class._from_row
+        hydrate = model_hydrator(self._model_class, description)
+        if getattr(session, 'unit_of_work', False):
+            load = session._identity_load
+            base = hydrate
+            hydrate = lambda row: load(base(row))
+        if self._joined:
+            attachers = [joined_hydrator(session, relationship, description) for relationship in self._joined]
+            base_joined = hydrate
+            
+            def hydrate(row):
+                obj = base_joined(row)
+                for attach in attachers:
+                    attach(obj, row)
+                return obj
+        return hydrate
+    
+    def _load_selectin(self, session, objs):
+        """Run the selectin loaders over a batch of hydrated model instances"""
+        if self._selectin and objs:
+            for path in self._selectin:
+                load_selectin(session, objs, path)
+        return objs
+    
+    def _session_or_raise(self, session):
         session = session or self._session
         if not session:
             raise ValueError("No session provided for query execution")
+        return session
+        
+    def first(self, session=None, to_model=True, schema=None):
+        session = self._session_or_raise(session)
+        if to_model and schema is None:
+            pk_values = self._primary_key_lookup()
+            if pk_values is not None:
+                if getattr(session, 'unit_of_work', False):
+                    obj = session.get_identity(self._model_class, pk_values)
+                    if obj is not None:
+                        return obj
+                # Keys queued with session.prefetch() resolve as one batch
+                loader = getattr(session, '_batch_loader', None)
+                if loader is not None:
+                    found, obj = loader.lookup(self._model_class, pk_values)
+                    if found:
+                        return obj
         self.limit(1)
-        self.execute(session)
-        row = session.fetchone()
+        description, rows = self._fetch(session, one=True)
         
-        if not row:
+        if not rows:
             return None
+        row = rows[0]
             
-        if to_model and self._model_class and hasattr(self._model_class, '_from_row'):
-            return self._model_class._from_row(row)
+        if schema is not None or (to_model and self._model_class and hasattr(self._model_class, '_from_row')):
+            started = time.perf_counter()
+            obj = self._hydrator(session, description, schema)(row)
+            instrumentation.record_hydration(time.perf_counter() - started)
+            if schema is None:
+                self._load_selectin(session, [obj])
+            return obj
         return row
         
-    def all(self, session=None, to_model=True):
-        session = session or self._session
-        if not session:
-            raise ValueError("No session provided for query execution")
-        self.execute(session)
-        rows = session.fetchall()
+    def all(self, session=None, to_model=True, schema=None):
+        """
+        Fetch every row: model instances by default, schema instances when a
+        pydantic schema is given, raw rows with to_model=False.
+        """
+        session = self._session_or_raise(session)
+        description, rows = self._fetch(session)
         
-        if to_model and self._model_class and hasattr(self._model_class, '_from_row'):
-            return [self._model_class._from_row(row) for row in rows]
+        if schema is not None or (to_model and self._model_class and hasattr(self._model_class, '_from_row')):
+            started = time.perf_counter()
+            hydrate = self._hydrator(session, description, schema)
+            objs = [hydrate(row) for row in rows]
+            instrumentation.record_hydration(time.perf_counter() - started)
+            if schema is None:
+                self._load_selectin(session, objs)
+            return objs
         return rows
     
+    def rows(self, session=None):
+        """Fetch every row as a compact slotted Row (attribute, index and key access)"""
+        session = self._session_or_raise(session)
+        description, rows = self._fetch(session)
+        started = time.perf_counter()
+        hydrate = row_hydrator(description)
+        result = [hydrate(row) for row in rows]
+        instrumentation.record_hydration(time.perf_counter() - started)
+        return result
+    
+    def _declared_kinds(self):
+        """Column name -> columnar kind for selected model columns with a known dbrm type"""
+        from .columnar import sql_kind
+        
+        if self.columns == ["*"]:
+            columns = self._model_class._columns.values() if self._model_class and not self.join_clauses else ()
+        else:
+            columns = [col for col in self.columns if isinstance(col, Column)]
+        return {col.name: sql_kind(col.type) for col in columns if col.type is not None}
+    
+    def to_columns(self, session=None, batch_size=5000, kinds=None):
+        """
+        Fetch the result as {column name: NumPy array} without per-row objects.
+        
+        Rows are read batch_size at a time and appended to typed arrays
+        (datetime64, int64, float64, bool or object; see dbrm.columnar), with
+        NULLs as masked entries. kinds overrides the inferred kind per column.
+        """
+        from .columnar import ColumnBuilder
+        
+        session = self._session_or_raise(session)
+        kinds = {**self._declared_kinds(), **(kinds or {})}
+        cursor = self.execute(session)
+        names = [column[0] for column in cursor.description]
+        builders = [ColumnBuilder(kinds.get(name)) for name in names]
+        while True:
+            rows = session.fetchmany(batch_size)
+            if not rows:
+                break
+            started = time.perf_counter()
+            for builder, values in zip(builders, zip(*rows)):
+                builder.extend(values)
+            instrumentation.record_hydration(time.perf_counter() - started)
+        return {name: builder.finish() for name, builder in zip(names, builders)}
+    
+    def iter(self, session=None, batch_size=1000, to_model=True, schema=None):
+        """
+        Lazily iterate over results, fetching batch_size rows per round trip.
+        
+        Rows are hydrated one at a time, so memory stays flat regardless of result size.
+        selectin loaders run once per batch, while the stream is still open
+        (SQL Server needs MARS enabled for that).
+        """
+        session = self._session_or_raise(session)
+        
+        hydrate_rows = schema is not None or (to_model and self._model_class and hasattr(self._model_class, '_from_row'))
+        hydrate = None
+        for description, rows in session.stream(self, batch_size=batch_size, describe=True):
+            if not hydrate_rows:
+                yield from rows
+                continue
+            if hydrate is None:
+                hydrate = instrumentation.timed(self._hydrator(session, description, schema))
+            if self._selectin and schema is None:
+                # One IN query per relationship per fetched batch
+                yield from self._load_selectin(session, [hydrate(row) for row in rows])
+                continue
+            for row in rows:
+                yield hydrate(row)
+    
+    def yield_per(self, count):
+        """Stream results in batches of count rows when the query is iterated"""
+        if count < 1:
+            raise ValueError("yield_per count must be at least 1")
+        self._yield_per = count
+        return self
+    
+    def __iter__(self):
+        if self._yield_per is None:
+            return iter(self.all())
+        return self.iter(batch_size=self._yield_per)
+    
     def exists(self, session):
         return self.first(session) is not None
     
@@ -286,22 +802,23 @@ class Select:
         if not session:
             raise ValueError("No session provided for query execution")
         
-        self.execute(session)
-        row = session.fetchone()
+        _, rows = self._fetch(session, one=True)
         
-        if not row:
+        if not rows:
             return None
             
-        return row[0] if row else None
+        return rows[0][0]
     
     def __str__(self):
-        return self.build()
+        sql, params = self.compile()
+        return render_literal_sql(sql, params)
 
 
 class Insert:
     
-    def __init__(self, table=None):
+    def __init__(self, table=None, dialect=None):
         self.table = table.__tablename__ if hasattr(table, '__tablename__') else table
+        self.dialect = dialect
         self.columns = []
         self.values = []
         self.returning = None
@@ -322,7 +839,8 @@ class Insert:
         self.returning = cols
         return self
         
-    def build(self):
+    def compile(self):
+        """Compile to (sql, params) with one ? placeholder per value"""
         if not self.table:
             raise ValueError("No table specified for INSERT")
         if not self.columns:
@@ -332,40 +850,46 @@ class Insert:
             
         cols = ", ".join(self.columns)
         
+        params = []
         all_values = []
         for row in self.values:
-            row_values = []
-            for val in row:
-                if val is None:
-                    row_values.append("NULL")
-                elif isinstance(val, (str, datetime)):
-                    row_values.append(f"'{val}'")
-                else:
-                    row_values.append(str(val))
-            all_values.append(f"({', '.join(row_values)})")
+            if len(row) != len(self.columns):
+                raise ValueError("Number of values does not match number of columns")
+            all_values.append(f"({', '.join('?' for _ in row)})")
+            params.extend(row)
             
         values_str = ", ".join(all_values)
         
-        sql = f"INSERT INTO {self.table} ({cols}) VALUES {values_str}"
-        
-        if self.returning:
-            sql += " RETURNING " + ", ".join(self.returning)
+        if self.returning and self.dialect == 'mssql':
+            # SQL Server places OUTPUT between the column list and VALUES
+            sql = f"INSERT INTO {self.table} ({cols}) {returning_clause(self.dialect, self.returning)} VALUES {values_str}"
+        else:
+            sql = f"INSERT INTO {self.table} ({cols}) VALUES {values_str}"
+            if self.returning:
+                sql += " " + returning_clause(self.dialect, self.returning)
             
-        return sql
+        return sql, params
+    
+    def build(self):
+        return self.compile()[0]
     
     def execute(self, session):
-        return session.execute(self.build())
+        return session.execute(self)
         
     def __str__(self):
-        return self.build()
+        sql, params = self.compile()
+        return render_literal_sql(sql, params)
 
 
 class Update:
     
-    def __init__(self, table=None):
+    def __init__(self, table=None, dialect=None):
         self.table = table.__tablename__ if hasattr(table, '__tablename__') else table
+        self.dialect = dialect
         self.set_clauses = {}
         self.where_clauses = []
+        self.returning = None
+        self.table_hints = ()
         
     def table_(self, table):
         self.table = table.__tablename__ if hasattr(table, '__tablename__') else table
@@ -385,35 +909,60 @@ class Update:
             self.where_clauses.append(condition)
         return self
         
-    def build(self):
+    def returning_(self, *cols):
+        """Return the updated rows (OUTPUT INSERTED on SQL Server)"""
+        self.returning = cols
+        return self
+        
+    def with_hint(self, *hints):
+        """SQL Server table hints on the updated table, e.g. with_hint("UPDLOCK", "READPAST"); none is a no-op"""
+        self.table_hints = self.table_hints + hints
+        return self
+        
+    def compile(self):
+        """Compile to (sql, params): SET values first, then WHERE parameters"""
         if not self.table:
             raise ValueError("No table specified for UPDATE")
         if not self.set_clauses:
             raise ValueError("No SET clauses specified for UPDATE")
             
+        params = []
         set_parts = []
         for col, val in self.set_clauses.items():
-            if val is None:
-                set_parts.append(f"{col} = NULL")
-            elif isinstance(val, (str, datetime)):
-                set_parts.append(f"{col} = '{val}'")
-            else:
-                set_parts.append(f"{col} = {val}")
+            value_sql, value_params = Condition._operand(val)
+            set_parts.append(f"{col} = {value_sql}")
+            params.extend(value_params)
                 
         set_sql = ", ".join(set_parts)
         
-        sql = f"UPDATE {self.table} SET {set_sql}"
+        table = self.table + (table_hint_clause(self.table_hints) if self.table_hints else "")
+        sql = f"UPDATE {table} SET {set_sql}"
+        if self.returning and self.dialect == 'mssql':
+            # SQL Server places OUTPUT between SET and WHERE
+            sql += " " + returning_clause(self.dialect, self.returning)
         
         if self.where_clauses:
-            sql += " WHERE " + " AND ".join(self.where_clauses)
+            where_sql = []
+            for condition in self.where_clauses:
+                condition_sql, condition_params = compile_clause(condition)
+                where_sql.append(condition_sql)
+                params.extend(condition_params)
+            sql += " WHERE " + " AND ".join(where_sql)
+        
+        if self.returning and self.dialect != 'mssql':
+            sql += " " + returning_clause(self.dialect, self.returning)
             
-        return sql
+        return sql, params
+    
+    def build(self):
+        return self.compile()[0]
     
     def execute(self, session):
-        return session.execute(self.build())
+        return session.execute(self)
         
     def __str__(self):
-        return self.build()
+        sql, params = self.compile()
+        return render_literal_sql(sql, params)
 
 
 class Delete:
@@ -436,19 +985,162 @@ class Delete:
             self.where_clauses.append(condition)
         return self
         
-    def build(self):
+    def compile(self):
+        """Compile to (sql, params)"""
         if not self.table:
             raise ValueError("No table specified for DELETE")
             
+        params = []
         sql = f"DELETE FROM {self.table}"
         
         if self.where_clauses:
-            sql += " WHERE " + " AND ".join(self.where_clauses)
+            where_sql = []
+            for condition in self.where_clauses:
+                condition_sql, condition_params = compile_clause(condition)
+                where_sql.append(condition_sql)
+                params.extend(condition_params)
+            sql += " WHERE " + " AND ".join(where_sql)
             
-        return sql
+        return sql, params
+    
+    def build(self):
+        return self.compile()[0]
+    
+    def execute(self, session):
+        return session.execute(self)
+        
+    def __str__(self):
+        sql, params = self.compile()
+        return render_literal_sql(sql, params)
+
+
+class Upsert:
+    """
+    Insert rows, updating the existing row when a conflict key already exists.
+    
+    Compiles to a single statement per dialect: MERGE on SQL Server,
+    INSERT ... ON CONFLICT on SQLite/PostgreSQL and
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL.
+    """
+    
+    DIALECTS = ('mssql', 'sqlite', 'postgresql', 'mysql')
+    
+    def __init__(self, table=None, dialect='mssql'):
+        self.table = table.__tablename__ if hasattr(table, '__tablename__') else table
+        self.dialect = dialect
+        self.columns = []
+        self.values = []
+        self.conflict_keys = []
+        self.update_columns = None
+        self.returning = None
+        
+    def into(self, table):
+        self.table = table.__tablename__ if hasattr(table, '__tablename__') else table
+        return self
+        
+    def columns_(self, *cols):
+        self.columns = cols
+        return self
+        
+    def values_(self, *vals):
+        self.values.append(vals)
+        return self
+        
+    def on_conflict(self, *keys):
+        self.conflict_keys = keys
+        return self
+        
+    def update_(self, *cols):
+        """Columns overwritten on conflict (default: every non-key column)"""
+        self.update_columns = cols
+        return self
+        
+    def returning_(self, *cols):
+        """Return the inserted or updated rows (rows left untouched are not returned)"""
+        self.returning = cols
+        return self
+        
+    def _update_columns(self):
+        if self.update_columns is not None:
+            return list(self.update_columns)
+        return [col for col in self.columns if col not in self.conflict_keys]
+        
+    def compile(self):
+        """Compile to (sql, params) with one ? placeholder per value"""
+        if not self.table:
+            raise ValueError("No table specified for UPSERT")
+        if not self.columns:
+            raise ValueError("No columns specified for UPSERT")
+        if not self.values:
+            raise ValueError("No values specified for UPSERT")
+        if not self.conflict_keys:
+            raise ValueError("No conflict keys specified for UPSERT")
+        missing = [key for key in self.conflict_keys if key not in self.columns]
+        if missing:
+            raise ValueError(f"Conflict keys not among inserted columns: {', '.join(missing)}")
+        if self.dialect not in self.DIALECTS:
+            raise ValueError(f"Unsupported dialect for UPSERT: {self.dialect}")
+            
+        params = []
+        all_values = []
+        for row in self.values:
+            if len(row) != len(self.columns):
+                raise ValueError("Number of values does not match number of columns")
+            all_values.append(f"({', '.join('?' for _ in row)})")
+            params.extend(row)
+            
+        cols = ", ".join(self.columns)
+        values_str = ", ".join(all_values)
+        updates = self._update_columns()
+        
+        if self.dialect == 'mssql':
+            # HOLDLOCK keeps the match-then-insert atomic under concurrent writers
+            on = " AND ".join(f"target.{key} = source.{key}" for key in self.conflict_keys)
+            sql = (
+                f"MERGE INTO {self.table} WITH (HOLDLOCK) AS target "
+                f"USING (VALUES {values_str}) AS source ({cols}) ON {on}"
+            )
+            if updates:
+                sql += " WHEN MATCHED THEN UPDATE SET " + ", ".join(
+                    f"target.{col} = source.{col}" for col in updates
+                )
+            sql += (
+                f" WHEN NOT MATCHED THEN INSERT ({cols}) VALUES "
+                f"({', '.join(f'source.{col}' for col in self.columns)})"
+            )
+            if self.returning:
+                sql += " " + returning_clause(self.dialect, self.returning)
+            sql += ";"
+        elif self.dialect == 'mysql':
+            # Assigning a key to itself turns a duplicate into a no-op
+            assignments = [f"{col} = VALUES({col})" for col in updates] or \
+                [f"{self.conflict_keys[0]} = {self.conflict_keys[0]}"]
+            sql = (
+                f"INSERT INTO {self.table} ({cols}) VALUES {values_str} "
+                f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+            )
+            if self.returning:
+                returning_clause(self.dialect, self.returning)
+        else:
+            sql = (
+                f"INSERT INTO {self.table} ({cols}) VALUES {values_str} "
+                f"ON CONFLICT ({', '.join(self.conflict_keys)}) "
+            )
+            if updates:
+                sql += "DO UPDATE SET " + ", ".join(f"{col} = excluded.{col}" for col in updates)
+            else:
+                sql += "DO NOTHING"
+            if self.returning:
+                sql += " " + returning_clause(self.dialect, self.returning)
+                
+        return sql, params
+    
+    def build(self):
+        return self.compile()[0]
     
     def execute(self, session):
-        return session.execute(self.build())
+        return session.execute(self)
         
     def __str__(self):
-        return self.build()
+        sql, params = self.compile()
+        return render_literal_sql(sql, params)
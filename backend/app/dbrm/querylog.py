@@ -0,0 +1,134 @@
+"""
+SQL statement logging off the request thread.
+
+Sessions hand each statement to record(). Records go through a QueueHandler
+to a QueueListener thread that renders and writes them, so disk I/O never
+adds to query latency:
+
+- logs/sql_queries.log: every statement at DEBUG (sampled by DB_LOG_SAMPLE_RATE)
+  when DB_LOG_LEVEL=DEBUG; nothing for fast statements otherwise.
+- logs/slow_queries.log: statements at or above DB_SLOW_QUERY_MS, with their
+  duration, row count and parameters. Never sampled.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Optional, Sequence
+
+sql_logger = logging.getLogger('SQLQueryLogger')
+slow_query_logger = logging.getLogger('SQLSlowQueryLogger')
+
+logs_dir = Path(__file__).parent.parent.parent / "logs"
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+# Statements at or above this many milliseconds go to the slow-query log
+slow_query_ms = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+# Fraction of fast statements written when DEBUG logging is on
+sample_rate = float(os.getenv("DB_LOG_SAMPLE_RATE", "1.0"))
+
+
+class _Statement:
+    """Renders a statement with its parameters inline, only when the record is written"""
+
+    __slots__ = ('sql', 'params')
+
+    def __init__(self, sql: str, params: Optional[Sequence]):
+        self.sql = sql
+        self.params = params
+
+    def __str__(self):
+        if not self.params:
+            return self.sql
+        from .query import render_literal_sql
+        return render_literal_sql(self.sql, self.params)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def configure(directory: Path = None, level: str = None, slow_ms: float = None, sample: float = None) -> None:
+    """
+    (Re)configure the SQL and slow-query logs and start the background writer.
+
+    Arguments left as None keep their current value (initially taken from
+    DB_LOG_LEVEL, DB_SLOW_QUERY_MS and DB_LOG_SAMPLE_RATE).
+    """
+    global _listener, slow_query_ms, sample_rate
+    if slow_ms is not None:
+        slow_query_ms = float(slow_ms)
+    if sample is not None:
+        sample_rate = min(max(float(sample), 0.0), 1.0)
+    level = (level or os.getenv("DB_LOG_LEVEL", "INFO")).upper()
+    directory = Path(directory) if directory is not None else logs_dir
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        directory.mkdir(parents=True, exist_ok=True)
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+        sql_file = logging.FileHandler(directory / 'sql_queries.log')
+        sql_file.setFormatter(formatter)
+        sql_file.addFilter(lambda record: record.name == sql_logger.name)
+        slow_file = logging.FileHandler(directory / 'slow_queries.log')
+        slow_file.setFormatter(formatter)
+        slow_file.addFilter(lambda record: record.name == slow_query_logger.name)
+
+        records = queue.SimpleQueue()
+        for target, target_level in ((sql_logger, level), (slow_query_logger, "WARNING")):
+            for handler in list(target.handlers):
+                target.removeHandler(handler)
+            target.addHandler(_DeferredQueueHandler(records))
+            target.setLevel(target_level)
+            target.propagate = False
+
+        _listener = QueueListener(records, sql_file, slow_file, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown() -> None:
+    """Flush queued records and stop the background writer"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def record(sql: str, params: Optional[Sequence] = None, elapsed: Optional[float] = None,
+           rowcount: Optional[int] = None) -> None:
+    """
+    Log one statement. elapsed is in seconds (None for informational notes);
+    rowcount is what the driver reported, None or -1 when unknown.
+    """
+    if elapsed is not None and elapsed * 1000 >= slow_query_ms:
+        slow_query_logger.warning(
+            "%.1f ms rows=%s %s params=%r",
+            elapsed * 1000, rowcount if rowcount is not None and rowcount >= 0 else "?",
+            sql, tuple(params) if params else (),
+        )
+        return
+    if sql_logger.isEnabledFor(logging.DEBUG) and (sample_rate >= 1.0 or random.random() < sample_rate):
+        if elapsed is None:
+            sql_logger.debug("%s", _Statement(sql, params))
+        else:
+            sql_logger.debug("%.1f ms %s", elapsed * 1000, _Statement(sql, params))
+
+
+configure()
+atexit.register(shutdown)
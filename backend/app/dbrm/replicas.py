@@ -0,0 +1,158 @@
+"""
+Read-replica selection for read-only sessions.
+
+An Engine built with replicas hands Session(engine, readonly=True) a
+connection from one of them instead of the primary:
+
+- round_robin cycles through the usable replicas; least_loaded picks the one
+  with the fewest connections checked out of its pool.
+- With max_lag set, each replica's replication lag is probed at most every
+  lag_check_interval seconds and replicas further behind are skipped.
+- A replica that fails to connect is skipped for retry_interval seconds.
+- When no replica is usable the read falls back to the primary.
+
+Replicas serve data as of their last replayed commit, so a request that must
+read its own writes should use the primary session.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("round_robin", "least_loaded")
+
+# Seconds the local copy is behind the primary, per dialect
+LAG_QUERIES = {
+    'mssql': (
+        "SELECT DATEDIFF(SECOND, MAX(last_commit_time), GETDATE()) "
+        "FROM sys.dm_hadr_database_replica_states WHERE is_local = 1 AND database_id = DB_ID()"
+    ),
+    'postgresql': "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)",
+}
+
+
+def query_lag(engine) -> Optional[float]:
+    """Replication lag in seconds reported by the replica itself, None when unknown"""
+    sql = LAG_QUERIES.get(engine.dialect)
+    if sql is None:
+        return None
+    conn = engine.connect()
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+class Replica:
+    """One replica engine and its health as last observed"""
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.name = name
+        self.lag: Optional[float] = None
+        self.lag_checked_at = 0.0
+        self.down_until = 0.0
+        self.reads = 0
+
+    def load(self) -> int:
+        return self.engine.pool_status()['checked_out']
+
+    def status(self) -> dict:
+        return {
+            'name': self.name,
+            'lag': self.lag,
+            'available': self.down_until <= time.monotonic(),
+            'reads': self.reads,
+            'checked_out': self.load(),
+        }
+
+
+class ReplicaSet:
+    """Chooses a replica connection for each read-only session"""
+
+    def __init__(self, engines: Sequence, strategy: str = "round_robin", max_lag: Optional[float] = None,
+                 lag_check_interval: float = 5.0, retry_interval: float = 30.0,
+                 lag_probe: Callable = query_lag):
+        """
+        Args:
+            engines: Replica engines, in preference order for round robin
+            strategy: "round_robin" or "least_loaded"
+            max_lag: Skip replicas more than this many seconds behind (None disables the check)
+            lag_check_interval: Seconds a lag measurement is reused before probing again
+            retry_interval: Seconds a replica that failed to connect is skipped
+            lag_probe: Callable(engine) -> lag in seconds or None; defaults to a dialect query
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Replica strategy must be one of: {', '.join(STRATEGIES)}")
+        if not engines:
+            raise ValueError("ReplicaSet needs at least one replica")
+        self.replicas = [Replica(engine, f"replica{i}") for i, engine in enumerate(engines)]
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.retry_interval = retry_interval
+        self.lag_probe = lag_probe
+        self.fallbacks = 0
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def _fresh(self, replica: Replica, now: float) -> bool:
+        if self.max_lag is None:
+            return True
+        if now - replica.lag_checked_at >= self.lag_check_interval:
+            try:
+                replica.lag = self.lag_probe(replica.engine)
+            except Exception as e:
+                # An unreachable replica is caught by connect(); an unknown lag is not held against it
+                logger.warning(f"Lag probe failed on {replica.name}: {e}")
+                replica.lag = None
+            replica.lag_checked_at = now
+        return replica.lag is None or replica.lag <= self.max_lag
+
+    def candidates(self) -> List[Replica]:
+        """Usable replicas, best choice first"""
+        now = time.monotonic()
+        usable = [replica for replica in self.replicas
+                  if replica.down_until <= now and self._fresh(replica, now)]
+        if len(usable) < 2:
+            return usable
+        if self.strategy == "least_loaded":
+            return sorted(usable, key=Replica.load)
+        with self._lock:
+            start = next(self._turn) % len(usable)
+        return usable[start:] + usable[:start]
+
+    def connect(self):
+        """A pooled connection to a chosen replica, or None when none can be used"""
+        for replica in self.candidates():
+            try:
+                conn = replica.engine.connect()
+            except Exception as e:
+                logger.warning(f"Replica {replica.name} unavailable, skipping for {self.retry_interval}s: {e}")
+                replica.down_until = time.monotonic() + self.retry_interval
+                continue
+            replica.reads += 1
+            return conn
+        self.fallbacks += 1
+        return None
+
+    def status(self) -> dict:
+        return {
+            'strategy': self.strategy,
+            'max_lag': self.max_lag,
+            'fallbacks': self.fallbacks,
+            'replicas': [replica.status() for replica in self.replicas],
+        }
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
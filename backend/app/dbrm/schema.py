@@ -1,5 +1,8 @@
+import logging
 from typing import TypeVar
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar('T')
 
 class Column:
@@ -48,6 +51,178 @@ class Column:
         return self.name if self.name else "Column"
 
 
+class Index:
+    """
+    Declares a (possibly composite or covering) index for a model's __indexes__.
+    
+        __indexes__ = (
+            Index('status', 'last_assignment_at'),
+            Index('worker_id', 'distribute_time DESC', include=('amount',)),
+        )
+    """
+    
+    def __init__(self, *columns, include=(), unique=False, name=None, where=None):
+        """
+        Args:
+            *columns: Key columns in order, optionally suffixed with ASC / DESC
+            include: Non-key columns stored in the index leaf (INCLUDE on SQL Server and
+                     PostgreSQL, appended to the key elsewhere)
+            unique: Whether the index enforces uniqueness
+            name: Index name, idx_<table>_<columns> when omitted
+            where: Filter predicate for a filtered / partial index (e.g. "worker_id IS NULL")
+        """
+        if not columns:
+            raise ValueError("Index needs at least one column")
+        self.columns = tuple(columns)
+        self.include = (include,) if isinstance(include, str) else tuple(include)
+        self.unique = unique
+        self.name = name
+        self.where = where
+    
+    @property
+    def column_names(self):
+        """Key column names without sort direction"""
+        return tuple(column.split()[0] for column in self.columns)
+    
+    def bind(self, table: str):
+        if self.name is None:
+            self.name = f"idx_{table}_{'_'.join(self.column_names)}"
+        return self
+    
+    def create_sql(self, table: str, dialect: str = 'mssql') -> str:
+        """CREATE INDEX statement for this index, idempotent where the dialect allows it"""
+        unique = "UNIQUE " if self.unique else ""
+        keys = list(self.columns)
+        include = ""
+        if self.include:
+            if dialect in ('mssql', 'postgresql'):
+                include = f" INCLUDE ({', '.join(self.include)})"
+            else:
+                keys.extend(column for column in self.include if column not in self.column_names)
+        where = f" WHERE {self.where}" if self.where else ""
+        body = f"{self.name} ON {table} ({', '.join(keys)}){include}{where}"
+        if dialect == 'mssql':
+            return (
+                f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{self.name}' "
+                f"AND object_id = OBJECT_ID('{table}')) "
+                f"CREATE {unique}NONCLUSTERED INDEX {body}"
+            )
+        if dialect == 'mysql':
+            return f"CREATE {unique}INDEX {body}"
+        return f"CREATE {unique}INDEX IF NOT EXISTS {body}"
+    
+    def __repr__(self):
+        args = [repr(column) for column in self.columns]
+        if self.include:
+            args.append(f"include={self.include!r}")
+        if self.unique:
+            args.append("unique=True")
+        if self.where:
+            args.append(f"where={self.where!r}")
+        return f"Index({', '.join(args)})"
+
+
+class Relationship:
+    """
+    Declares a related model reached through matching key columns.
+    
+    Related objects are never fetched implicitly: load them for a whole result
+    with Select.options(selectin(name)) or joined(name). Reading a relationship
+    that was not loaded raises AttributeError.
+    """
+    
+    def __init__(self, target, local=None, remote=None, uselist=None, order_by=None):
+        """
+        Args:
+            target: Related model class, or its registered name / table name
+            local: Column name(s) on this model holding the key
+            remote: Matching column name(s) on the target model
+            uselist: Whether the relationship holds a list (one-to-many) or a single object
+            order_by: ORDER BY applied to loaded collections (e.g. "log_time DESC")
+        
+        local, remote and uselist are inferred from foreign keys when omitted:
+        a foreign key on this model to the target gives a many-to-one, one on
+        the target back to this model gives a one-to-many.
+        """
+        self.target = target
+        self.local = (local,) if isinstance(local, str) else tuple(local or ())
+        self.remote = (remote,) if isinstance(remote, str) else tuple(remote or ())
+        self.uselist = uselist
+        self.order_by = order_by
+        self.name = None
+        self.parent = None
+        self._resolved = False
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.parent = owner
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        # Loaded values live in the instance __dict__ and shadow this descriptor
+        raise AttributeError(
+            f"Relationship '{owner.__name__}.{self.name}' is not loaded; "
+            f"use options(selectin('{self.name}')) or joined('{self.name}')"
+        )
+    
+    def resolve(self):
+        """Resolve the target model and key columns; returns self"""
+        if self._resolved:
+            return self
+        if isinstance(self.target, str):
+            from .decorators import get_registered_models
+            models = get_registered_models()
+            target = models.get(self.target)
+            if target is None:
+                target = next((model for model in models.values()
+                               if model.__tablename__ == self.target), None)
+            if target is None:
+                raise ValueError(f"Unknown relationship target '{self.target}' on {self.parent.__name__}.{self.name}")
+            self.target = target
+        
+        if not self.local or not self.remote:
+            self._infer_keys()
+        if len(self.local) != len(self.remote):
+            raise ValueError(f"Relationship {self.parent.__name__}.{self.name} has mismatched key columns")
+        self._resolved = True
+        return self
+    
+    def _infer_keys(self):
+        parent, target = self.parent, self.target
+        for name, column in parent._columns.items():
+            ref = _foreign_key_target(column)
+            if ref and ref[0] == target.__tablename__:
+                self.local, self.remote = (name,), (ref[1],)
+                if self.uselist is None:
+                    self.uselist = False
+                return
+        for name, column in target._columns.items():
+            ref = _foreign_key_target(column)
+            if ref and ref[0] == parent.__tablename__:
+                self.local, self.remote = (ref[1],), (name,)
+                if self.uselist is None:
+                    self.uselist = True
+                return
+        raise ValueError(
+            f"No foreign key links {parent.__name__} and {target.__name__}; "
+            f"give local and remote for relationship '{self.name}'"
+        )
+
+
+def _foreign_key_target(column):
+    """(table, column) referenced by a column's foreign key, or None"""
+    foreign_key = column.foreign_key
+    if not foreign_key:
+        return None
+    if "(" in foreign_key and ")" in foreign_key:
+        table_name, ref_column = foreign_key.split("(")
+        return table_name, ref_column.rstrip(")")
+    if "." in foreign_key:
+        return tuple(foreign_key.split("."))
+    return None
+
+
 class TableBase:
     """Base class for all table definitions."""
     
@@ -61,22 +236,72 @@ class TableBase:
         for name, value in kwargs.items():
             setattr(self, name, value)
     
+    def __setattr__(self, name, value):
+        # Record column changes on persistent instances (see _mark_clean)
+        state = self.__dict__.get('_loaded_state')
+        if state is not None and name in state:
+            if value != state[name]:
+                self.__dict__['_modified'].add(name)
+            else:
+                self.__dict__['_modified'].discard(name)
+        object.__setattr__(self, name, value)
+    
+    def _mark_clean(self):
+        """Snapshot column values as the persisted state; later assignments are tracked against it"""
+        values = self.__dict__
+        self.__dict__['_loaded_state'] = {name: values.get(name) for name in self.__class__._columns}
+        self.__dict__['_modified'] = set()
+    
+    def _apply_row(self, values: dict):
+        """Take column values returned by the database (OUTPUT / RETURNING) as the persisted state"""
+        for name in self.__class__._columns:
+            if name in values:
+                setattr(self, name, values[name])
+        self._mark_clean()
+    
+    def _is_persistent(self) -> bool:
+        return self.__dict__.get('_loaded_state') is not None
+    
+    def _get_changes(self) -> dict:
+        """Columns assigned a different value since the instance was loaded or saved"""
+        modified = self.__dict__.get('_modified')
+        if not modified:
+            return {}
+        return {name: self.__dict__.get(name) for name in self.__class__._columns if name in modified}
+    
     @classmethod
     def __init_subclass__(cls):
         cls.__tablename__ = getattr(cls, '__tablename__', cls.__name__.lower())
         cls._columns = {}
+        cls._relationships = {}
         
         for name, attr in cls.__dict__.items():
             if isinstance(attr, Column):
                 attr.__set_name__(cls, name)
                 cls._columns[name] = attr
+            elif isinstance(attr, Relationship):
+                attr.__set_name__(cls, name)
+                cls._relationships[name] = attr
+        
+        # Declaration order, computed once for positional row hydration
+        cls._column_names = tuple(cls._columns)
+        
+        # Single-column index=True flags and composite __indexes__, emitted by create()
+        indexes = [Index(name) for name, column in cls._columns.items()
+                   if column.index and not column.primary_key]
+        indexes.extend(cls.__dict__.get('__indexes__', ()))
+        for index in indexes:
+            missing = [name for name in index.column_names + index.include if name not in cls._columns]
+            if missing:
+                raise ValueError(f"Index on {cls.__name__} names unknown columns: {', '.join(missing)}")
+            index.bind(cls.__tablename__)
+        cls._indexes = tuple(indexes)
                 
     @classmethod
     def create(cls, session):
         """Create this table in the database."""
         columns = []
         foreign_keys = []
-        indexes = []
         pk_columns = []
         
         for name, column in cls._columns.items():
@@ -115,23 +340,34 @@ class TableBase:
                     fk_def += f" ON UPDATE {column.on_update}"
                     
                 foreign_keys.append(fk_def)
-            
-            if column.index and not column.primary_key:
-                index_def = f"INDEX idx_{cls.__tablename__}_{name} ({name})"
-                indexes.append(index_def)
+
         
         if pk_columns:
             pk_def = f"PRIMARY KEY ({', '.join(pk_columns)})"
             columns.append(pk_def)
         
         # Combine all column definitions and constraints
-        all_defs = columns + foreign_keys + indexes
+        all_defs = columns + foreign_keys
         
         create_sql = f"CREATE TABLE IF NOT EXISTS {cls.__tablename__} (\n  " + ",\n  ".join(all_defs) + "\n)"
         session.execute(create_sql)
+        cls.create_indexes(session)
         session.commit()
         return True
     
+    @classmethod
+    def create_indexes(cls, session):
+        """Create the table's declared indexes (index=True columns and __indexes__)"""
+        created = []
+        for index in cls._indexes:
+            try:
+                session.execute(index.create_sql(cls.__tablename__, session.dialect))
+                created.append(index.name)
+            except Exception as e:
+                # MySQL has no CREATE INDEX IF NOT EXISTS, so re-running create() lands here
+                logger.warning(f"Could not create index {index.name} on {cls.__tablename__}: {e}")
+        return created
+    
     @classmethod
     def drop(cls, session):
         """Drop this table from the database."""
@@ -184,6 +420,18 @@ class TableBase:
         """
         pk_columns = cls._get_primary_key_info()
         
+        # Served from the session's identity map when the object is already loaded
+        if args and len(args) == 1 and len(pk_columns) == 1:
+            pk_values = (args[0],)
+        elif kwargs and set(kwargs) == set(pk_columns):
+            pk_values = tuple(kwargs[name] for name in pk_columns)
+        else:
+            pk_values = None
+        if pk_values is not None and hasattr(session, 'get_identity'):
+            obj = session.get_identity(cls, pk_values)
+            if obj is not None:
+                return obj
+        
         from .query import Select, Condition
         query = Select(session=session).from_(cls)
         
@@ -211,6 +459,13 @@ class TableBase:
             
         return query.all()
     
+    @classmethod
+    def iter_all(cls, session, batch_size=1000):
+        """Iterate over all records, fetching batch_size rows at a time"""
+        from .query import Select
+        
+        return Select(session=session).from_(cls).iter(batch_size=batch_size)
+    
     @classmethod
     def _from_row(cls, row):
         """Create instance from database row"""
@@ -218,10 +473,8 @@ class TableBase:
         
         if isinstance(row, tuple):
             # Handle tuple results
-            column_names = list(cls._columns.keys())
-            for i, column_name in enumerate(column_names):
-                if i < len(row):
-                    setattr(instance, column_name, row[i])
+            for column_name, value in zip(cls._column_names, row):
+                setattr(instance, column_name, value)
         elif hasattr(row, 'items'):
             # Handle dict-like objects with items() method
             for key, value in row.items():
@@ -236,53 +489,79 @@ class TableBase:
         else:
             # Try to handle other types of row objects that support indexing
             try:
-                column_names = list(cls._columns.keys())
-                for i, column_name in enumerate(column_names):
+                for i, column_name in enumerate(cls._column_names):
                     if i < len(row):
                         setattr(instance, column_name, row[i])
             except (IndexError, TypeError):
                 raise TypeError(f"Unsupported row type: {type(row)}")
-                
+        
+        instance._mark_clean()
         return instance
     
     def save(self, session):
-        """Save instance to database (Insert or Update)"""
-        pk_values = self._get_primary_key_value()
+        """
+        Save instance to database.
+        
+        Loaded instances send an UPDATE of only the columns changed since they
+        were loaded (nothing at all when unchanged); new instances are written
+        with a single upsert (or INSERT for database-generated keys) that hands
+        back the stored row, so defaults are picked up without a refresh.
+        """
+        if self._is_persistent():
+            changes = self._get_changes()
+            if not changes:
+                return self
+            
+            from .query import Update, Condition
+            
+            state = self.__dict__['_loaded_state']
+            update_query = Update().table_(self.__class__.__tablename__).set_(**changes)
+            for name in self.__class__._get_primary_key_info():
+                # Match on the key as loaded, in case the key itself was changed
+                update_query.where(Condition.eq(name, state[name]))
+            session.execute(update_query)
+            session.commit()
+            self._mark_clean()
+            return self
+        
         pk_names = self.__class__._get_primary_key_info()
+        missing = [name for name in pk_names if getattr(self, name, None) is None
+                   or isinstance(getattr(self, name), Column)]
         
-        query = session.query(self.__class__)
-        for name, value in pk_values.items():
-            exists_query = query.filter_by(**{name: value})
+        if missing and all(self.__class__._columns[name].autoincrement for name in missing):
+            # The database assigns the key, so there is nothing to conflict with
+            self._insert(session)
+            session.commit()
+            return self
         
-        exists = exists_query.limit(1).exists(session)
+        # Raises for a missing primary key value
+        self._get_primary_key_value()
+        session.upsert(self, returning=True)
+        if not self._is_persistent():
+            self._mark_clean()
+        return self
+    
+    def _insert(self, session):
+        """INSERT the set columns, reading generated values back where the dialect allows"""
+        from .query import Insert
         
         data = {}
-        for name, column in self.__class__._columns.items():
+        for name in self.__class__._columns:
             value = getattr(self, name, None)
             if value is not None and not isinstance(value, Column):
                 data[name] = value
         
-        if exists:
-            from .query import Update, Condition
-            
-            update_data = {k: v for k, v in data.items() if k not in pk_names}
-            
-            if update_data:
-                update_query = Update().table_(self.__class__.__tablename__).set_(**update_data)
-                
-                for name, value in pk_values.items():
-                    update_query.where(Condition.eq(name, value))
-                
-                session.execute(update_query)
-                session.commit()
-        else:
-            from .query import Insert
-            
-            insert_query = Insert().into(self.__class__.__tablename__).columns_(*data.keys()).values_(*data.values())
+        insert_query = Insert().into(self.__class__.__tablename__).columns_(*data.keys()).values_(*data.values())
+        if not getattr(session, 'supports_returning', False):
             session.execute(insert_query)
-            session.commit()
+            return
         
-        return self
+        # Generated key and defaults come back in the same round trip
+        insert_query.returning_("*")
+        cursor = session.execute(insert_query)
+        rows = cursor.fetchall()
+        if rows:
+            self._apply_row(dict(zip([desc[0] for desc in cursor.description], rows[0])))
     
     def delete(self, session):
         """Delete object from database"""
@@ -307,13 +586,15 @@ class TableBase:
         for name, value in pk_values.items():
             query = query.filter_by(**{name: value})
             
-        # Get the latest data
-        result = query.limit(1).first()
+        # Get the latest data, bypassing the session's identity map
+        row = query.limit(1).first(to_model=False)
+        result = self.__class__._from_row(row) if row else None
         
         if result and result != self:
             for name, column in self.__class__._columns.items():
                 if hasattr(result, name):
                     setattr(self, name, getattr(result, name))
+            self._mark_clean()
 
         return self
         
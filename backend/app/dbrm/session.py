@@ -1,91 +1,235 @@
+from collections import deque
 from contextlib import contextmanager
-from typing import Any, List, Dict, Tuple, Optional, TypeVar
+from typing import Any, List, Dict, Tuple, Optional, TypeVar, Iterator
 import logging
-from pathlib import Path # Added Path
+import time
+
+from . import instrumentation, querylog
+from .dataloader import BatchLoader
+from .cache import result_cache, written_table
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from .query import Select, Insert, Update, Delete
+    from .query import Select, Insert, Update, Delete, Upsert
 
 T = TypeVar('T')
 
+# SQL Server caps a statement at 2100 parameters and a VALUES list at 1000 rows
+MAX_BATCH_PARAMETERS = 2100
+MAX_BATCH_ROWS = 1000
+
 logger = logging.getLogger(__name__)
 
-logs_dir = Path(__file__).parent.parent.parent / "logs"
-logs_dir.mkdir(parents=True, exist_ok=True)
+# Statements kept per session for get_query_log()
+QUERY_LOG_SIZE = 100
+
+def _identity_key(obj) -> Optional[Tuple]:
+    """(model class, primary key values), or None when a key value is missing"""
+    from .schema import Column
+    
+    model = type(obj)
+    try:
+        pk_names = model._get_primary_key_info()
+    except (AttributeError, ValueError):
+        return None
+    values = []
+    for name in pk_names:
+        value = getattr(obj, name, None)
+        if value is None or isinstance(value, Column):
+            return None
+        values.append(value)
+    return model, tuple(values)
+
+
+def _dependency_order(models) -> List[type]:
+    """Sort models so tables referenced by foreign keys come before their dependents"""
+    by_table = {model.__tablename__.lower(): model for model in models}
+    
+    def parents(model):
+        for column in model._columns.values():
+            if not column.foreign_key:
+                continue
+            target = column.foreign_key.split('(')[0].split('.')[0].strip().lower()
+            parent = by_table.get(target)
+            if parent is not None and parent is not model:
+                yield parent
+    
+    ordered, visiting = [], set()
+    
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for parent in parents(model):
+            visit(parent)
+        visiting.discard(model)
+        ordered.append(model)
+    
+    for model in models:
+        visit(model)
+    return ordered
 
-sql_query_file_logger = logging.getLogger('SQLQueryLogger')
-if not sql_query_file_logger.hasHandlers():
-    sql_query_file_logger.setLevel(logging.INFO)
-    # Updated file path to use the logs_dir
-    fh = logging.FileHandler(logs_dir / 'sql_queries.log') 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    fh.setFormatter(formatter)
-    sql_query_file_logger.addHandler(fh)
-    sql_query_file_logger.propagate = False 
 
 class Session:
     
-    def __init__(self, engine):
+    def __init__(self, engine, unit_of_work: bool = False, readonly: bool = False):
+        """
+        Args:
+            engine: Engine providing pooled connections
+            unit_of_work: Defer add()/delete() until commit() (or the end of a begin()
+                          block) and keep an identity map of loaded objects
+            readonly: Read from one of the engine's replicas when it has any, and
+                      refuse statements that write
+        """
         self.engine = engine
+        self.unit_of_work = unit_of_work
+        self.readonly = readonly
+        self._identity_map = {}
+        self._new = {}
+        self._dirty = {}
+        self._deleted = {}
+        self._flushing = False
+        self._batch_loader = BatchLoader(self)
+        self._written_tables = set()
         self._connection = None
         self._cursor = None
         self._transaction_level = 0
         self._in_transaction = False
-        self._query_log = []
-        self.sql_query_logger = sql_query_file_logger # Use the module-level configured logger
+        self._query_log = deque(maxlen=QUERY_LOG_SIZE)
+        self.last_bulk_stats = None
+        self.sql_query_logger = querylog.sql_logger
         
     def __enter__(self):
-        self._connection = self.engine.connect()
+        # Borrow a connection from the engine's pool
+        self._connection = self.engine.connect(readonly=True) if self.readonly else self.engine.connect()
         self._cursor = self._connection.cursor()
         return self
-    
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type and self._in_transaction:
             try:
                 self.rollback()
             except Exception as e:
-                logger.error(f"Fail to rollback transaction: {e}") 
+                logger.error(f"Fail to rollback transaction: {e}")
         if self._cursor:
-            self._cursor.close()
+            try:
+                self._cursor.close()
+            except Exception as e:
+                logger.warning(f"Fail to close cursor: {e}")
+            self._cursor = None
         if self._connection:
+            # Return the connection to the pool (reset on return)
             self._connection.close()
             self._connection = None
             
-    def log_query(self, query: str) -> None:
-        self._query_log.append(query)
-        if len(self._query_log) > 100:
-            self._query_log = self._query_log[-100:]
-        self.sql_query_logger.info(query) # Log query to file
+    @property
+    def dialect(self) -> str:
+        return getattr(self.engine, 'dialect', 'mssql')
+    
+    @property
+    def supports_returning(self) -> bool:
+        """Whether written rows can be read back in the same statement"""
+        from .query import RETURNING_DIALECTS
+        return self.dialect in RETURNING_DIALECTS
+    
+    def log_query(self, query: str, params=None, elapsed: Optional[float] = None,
+                  rowcount: Optional[int] = None) -> None:
+        """
+        Remember a statement and hand it to the background SQL logger.
+        
+        Nothing is rendered or written on this thread; statements slower than
+        querylog.slow_query_ms also go to the slow-query log.
+        """
+        self._query_log.append((query, params))
+        querylog.record(query, params, elapsed, rowcount)
+        if elapsed is not None:
+            instrumentation.record_statement(query, elapsed)
             
     def get_query_log(self) -> List[str]:
-        return self._query_log
+        """The session's most recent statements, parameters rendered inline"""
+        from .query import render_literal_sql
+        return [render_literal_sql(query, params) if params else query for query, params in self._query_log]
         
-    def execute(self, query, params=None):
-        from .query import Select, Insert, Update, Delete
+    def _prepare(self, query, params=None) -> Tuple[str, Optional[List]]:
+        from .query import Select, Insert, Update, Delete, Upsert, bind_params
         
-        if isinstance(query, (Select, Insert, Update, Delete)):
-            query_str = str(query)
+        if isinstance(query, (Select, Insert, Update, Delete, Upsert)):
+            if isinstance(query, Insert) and query.dialect is None:
+                # RETURNING vs OUTPUT depends on the database behind this session
+                query.dialect = self.dialect
+            # Bound parameters go straight to the driver so the statement text stays stable
+            query_str, params = query.compile()
         else:
             query_str = query
-            
+        
+        return query_str, bind_params(params) if params else None
+        
+    def execute(self, query, params=None):
+        self._before_execute(query)
+        query_str, params = self._prepare(query, params)
+        started = time.perf_counter()
         try:
-            self.log_query(query_str)
             if params:
                 self._cursor.execute(query_str, params)
             else:
                 self._cursor.execute(query_str)
-            return self._cursor
         except Exception as e:
             logger.error(f"Failed to execute query: {e}")
             logger.error(f"Query: {query_str}")
             raise
+        self.log_query(query_str, params, time.perf_counter() - started, self._cursor.rowcount)
+        return self._cursor
+    
+    def stream(self, query, params=None, batch_size: int = 1000, describe: bool = False) -> Iterator[List[Tuple]]:
+        """
+        Execute a query on a dedicated cursor and yield rows in fetchmany batches.
+        
+        Only one batch is held in memory at a time. The session's own cursor is
+        left untouched, but drivers without multiple active result sets (SQL Server
+        without MARS) cannot run other statements until the stream is exhausted.
+        With describe, each batch is yielded as (cursor.description, rows).
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._before_execute(query)
+        query_str, params = self._prepare(query, params)
+        cursor = self._connection.cursor()
+        try:
+            started = time.perf_counter()
+            try:
+                if params:
+                    cursor.execute(query_str, params)
+                else:
+                    cursor.execute(query_str)
+            except Exception as e:
+                logger.error(f"Failed to execute query: {e}")
+                logger.error(f"Query: {query_str}")
+                raise
+            self.log_query(query_str, params, time.perf_counter() - started)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                instrumentation.record_rows(len(rows))
+                yield (cursor.description, rows) if describe else rows
+        finally:
+            cursor.close()
     
     def fetchall(self) -> List[Tuple]:
-        return self._cursor.fetchall()
+        rows = self._cursor.fetchall()
+        instrumentation.record_rows(len(rows))
+        return rows
     
     def fetchone(self) -> Optional[Tuple]:
-        return self._cursor.fetchone()
+        row = self._cursor.fetchone()
+        if row is not None:
+            instrumentation.record_rows(1)
+        return row
+    
+    def fetchmany(self, size: int) -> List[Tuple]:
+        rows = self._cursor.fetchmany(size)
+        instrumentation.record_rows(len(rows))
+        return rows
         
     def scalar(self) -> Any:
         row = self.fetchone()
@@ -109,15 +253,25 @@ class Session:
     
     def commit(self):
         if self._connection:
+            if self.has_pending():
+                self.flush()
             try:
                 self._connection.commit()
                 self._in_transaction = False
             except Exception as e:
                 logger.error(f"Fail to commit transaction: {e}")
                 raise
+            for table in self._written_tables:
+                result_cache.invalidate(table)
+            self._written_tables.clear()
     
     def rollback(self):
         if self._connection:
+            # Loaded state may reflect the writes being undone
+            self._identity_map.clear()
+            self._batch_loader.clear()
+            self._written_tables.clear()
+            self._discard_pending()
             try:
                 self._connection.rollback()
                 self._in_transaction = False
@@ -145,20 +299,230 @@ class Session:
 
     def query(self, col_or_model_class) -> 'Select':
         from .query import Select
-        if hasattr(col_or_model_class, 'parent'):
+        if hasattr(col_or_model_class, 'parent') and not hasattr(col_or_model_class, '__tablename__'):
             return Select(col_or_model_class, session=self).from_(col_or_model_class.parent)
         return Select(session=self).from_(col_or_model_class)
 
     def add(self, obj):
+        if self.unit_of_work and hasattr(obj, '_columns'):
+            key = _identity_key(obj)
+            self._deleted.pop(id(obj), None)
+            if key is not None and self._identity_map.get(key) is obj:
+                self._dirty[id(obj)] = obj
+            else:
+                self._new[id(obj)] = obj
+                if key is not None:
+                    self._identity_map[key] = obj
+            return self
         if hasattr(obj, 'save'):
             obj.save(self)
         return self
         
     def delete(self, obj):
+        if self.unit_of_work and hasattr(obj, '_columns'):
+            self._new.pop(id(obj), None)
+            self._dirty.pop(id(obj), None)
+            self._deleted[id(obj)] = obj
+            key = _identity_key(obj)
+            if key is not None:
+                self._identity_map.pop(key, None)
+            return self
         if hasattr(obj, 'delete'):
             obj.delete(self)
         return self
     
+    # Unit of work
+    
+    def has_pending(self) -> bool:
+        return bool(self._new or self._dirty or self._deleted)
+    
+    def get_identity(self, model, pk_values) -> Optional[Any]:
+        """Object already loaded in this session for the given primary key values"""
+        if not self.unit_of_work:
+            return None
+        if not isinstance(pk_values, tuple):
+            pk_values = (pk_values,)
+        return self._identity_map.get((model, pk_values))
+    
+    def prefetch(self, model, keys) -> None:
+        """
+        Queue primary keys of model to be fetched together.
+        
+        The next lookup of any queued key (load(), Model.get() or a
+        filter_by(pk=...).first()) fetches all of them in one IN query.
+        Single-column keys are plain values, composite keys tuples.
+        """
+        self._batch_loader.prefetch(model, keys)
+    
+    def load_many(self, model, keys) -> List[Optional[Any]]:
+        """Instances for keys in order (None where missing), fetched in one IN query and cached for the session"""
+        return self._batch_loader.load_many(model, keys)
+    
+    def load(self, model, key) -> Optional[Any]:
+        """Single instance by primary key through the batching loader"""
+        return self._batch_loader.load_many(model, [key])[0]
+    
+    def _identity_load(self, obj):
+        """
+        Register a freshly hydrated object in the identity map.
+        
+        Returns the instance already mapped for that key, if any, updated from
+        the fresh row unless it has unflushed changes.
+        """
+        if not self.unit_of_work:
+            return obj
+        key = _identity_key(obj)
+        if key is None:
+            return obj
+        existing = self._identity_map.get(key)
+        if existing is None:
+            self._identity_map[key] = obj
+            return obj
+        if (id(existing) not in self._new and id(existing) not in self._dirty
+                and not existing.__dict__.get('_modified')):
+            for name in type(obj)._columns:
+                setattr(existing, name, getattr(obj, name, None))
+            existing._mark_clean()
+        return existing
+    
+    def expunge_all(self):
+        """Forget every loaded and pending object"""
+        self._identity_map.clear()
+        self._batch_loader.clear()
+        self._discard_pending()
+    
+    def _discard_pending(self):
+        self._new.clear()
+        self._dirty.clear()
+        self._deleted.clear()
+    
+    def _invalidate_written(self, table: Optional[str]) -> None:
+        """Drop cached reads of a table being written; table None means it could not be told"""
+        # Every write path passes through here before its statement runs
+        if self.readonly and table is not None:
+            raise ValueError(f"Read-only session cannot write to {table}")
+        self._batch_loader.invalidate(table)
+        if table is None:
+            result_cache.clear()
+        else:
+            result_cache.invalidate(table)
+            # Invalidate again at commit: other sessions may re-cache the old rows meanwhile
+            self._written_tables.add(table)
+    
+    def _before_execute(self, query):
+        """Autoflush pending changes and drop identity entries a statement may have changed"""
+        from .query import Insert, Update, Delete, Upsert
+        
+        # Batch-loaded lookups and cached results go stale on any write
+        if isinstance(query, (Insert, Update, Delete, Upsert)):
+            self._invalidate_written(query.table)
+        elif isinstance(query, str) and not query.lstrip().upper().startswith('SELECT'):
+            self._invalidate_written(written_table(query))
+        
+        if not self.unit_of_work or self._flushing:
+            return
+        
+        if self.has_pending():
+            self.flush()
+        if isinstance(query, (Update, Delete, Upsert)):
+            table = (query.table or '').lower()
+            for key in [k for k in self._identity_map if k[0].__tablename__.lower() == table]:
+                del self._identity_map[key]
+        elif isinstance(query, str) and not query.lstrip().upper().startswith('SELECT'):
+            # Raw DML could touch anything
+            self._identity_map.clear()
+    
+    def flush(self):
+        """
+        Write pending changes without committing.
+        
+        Saves run parents-first by foreign key dependency. Per model, new
+        objects go out as one batched upsert (or executemany insert for
+        autoincrement keys) and loaded objects as one executemany UPDATE per
+        set of changed columns; unchanged objects are skipped. Deletes then
+        run children-first, one statement per model.
+        """
+        if self._flushing or not self.has_pending():
+            return
+        from .query import Update, Delete, Condition
+        
+        # Only objects passed to add() are written; loaded objects modified
+        # purely for presentation (e.g. decoded JSON columns) stay untouched
+        saves = {id(obj): obj for obj in self._new.values()}
+        saves.update(self._dirty)
+        deletes = list(self._deleted.values())
+        
+        saves_by_model, deletes_by_model = {}, {}
+        for obj in saves.values():
+            saves_by_model.setdefault(type(obj), []).append(obj)
+        for obj in deletes:
+            deletes_by_model.setdefault(type(obj), []).append(obj)
+        
+        # Objects to mark clean and (re)map once everything is written
+        written = []
+        self._flushing = True
+        try:
+            for model in _dependency_order(list(saves_by_model)):
+                pk_names = model._get_primary_key_info()
+                keyed, generated, updates = [], [], {}
+                for obj in saves_by_model[model]:
+                    if obj._is_persistent():
+                        changes = obj._get_changes()
+                        if changes:
+                            updates.setdefault(tuple(changes), []).append((obj, changes))
+                    elif _identity_key(obj) is not None:
+                        keyed.append(obj)
+                    else:
+                        generated.append(obj)
+                if keyed:
+                    self.upsert(keyed, commit=False, returning=True)
+                    written.extend(keyed)
+                if generated and self.supports_returning:
+                    # Keys assigned by the database: one INSERT ... OUTPUT per row,
+                    # since multi-row OUTPUT order is not guaranteed
+                    for obj in generated:
+                        obj._insert(self)
+                    written.extend(generated)
+                elif generated:
+                    self.bulk_insert(model, generated, commit=False)
+                for columns, entries in updates.items():
+                    statement = Update().table_(model).set_(**{name: None for name in columns})
+                    for name in pk_names:
+                        statement.where(Condition.eq(name, None))
+                    sql = statement.build()
+                    rows = []
+                    for obj, changes in entries:
+                        state = obj.__dict__['_loaded_state']
+                        loaded_key = tuple(state[name] for name in pk_names)
+                        rows.append(tuple(changes[name] for name in columns) + loaded_key)
+                        written.append(obj)
+                        self._identity_map.pop((model, loaded_key), None)
+                    self.executemany(sql, rows)
+            
+            for model in reversed(_dependency_order(list(deletes_by_model))):
+                pk_names = model._get_primary_key_info()
+                keys = [obj._get_primary_key_value() for obj in deletes_by_model[model]]
+                chunk_size = max(1, MAX_BATCH_PARAMETERS // len(pk_names))
+                for offset in range(0, len(keys), chunk_size):
+                    chunk = keys[offset:offset + chunk_size]
+                    if len(pk_names) == 1:
+                        condition = Condition.in_(pk_names[0], [key[pk_names[0]] for key in chunk])
+                    else:
+                        condition = Condition.or_(*[
+                            Condition.and_(*[Condition.eq(name, key[name]) for name in pk_names])
+                            for key in chunk
+                        ])
+                    self.execute(Delete().from_(model).where(condition))
+        finally:
+            self._flushing = False
+        
+        for obj in written:
+            obj._mark_clean()
+            key = _identity_key(obj)
+            if key is not None:
+                self._identity_map[key] = obj
+        self._discard_pending()
+    
     def refresh(self, obj):
         if hasattr(obj, 'refresh'):
             obj.refresh(self)
@@ -169,26 +533,198 @@ class Session:
         self.commit()
         return self.refresh(obj)
         
-    def bulk_insert(self, table, data_list):
+    @staticmethod
+    def _bulk_rows(data_list) -> Tuple[List[str], List[Tuple]]:
+        """Normalize dicts or model instances into (columns, row tuples)"""
+        first = data_list[0]
+        if isinstance(first, dict):
+            columns = list(first.keys())
+            return columns, [tuple(data.get(col) for col in columns) for data in data_list]
+        
+        # Model instances: every column set on at least one row, in declaration order,
+        # so omitted defaults (e.g. autoincrement keys) are left to the database
+        from .schema import Column
+        
+        def value_of(obj, name):
+            # Unset attributes fall through to the class-level Column
+            value = getattr(obj, name, None)
+            return None if isinstance(value, Column) else value
+        
+        model_columns = list(type(first)._columns.keys())
+        columns = [
+            name for name in model_columns
+            if any(value_of(obj, name) is not None for obj in data_list)
+        ]
+        return columns, [tuple(value_of(obj, col) for col in columns) for obj in data_list]
+        
+    @contextmanager
+    def batch(self, rowcounts: bool = True):
+        """
+        Collect write statements and send them in as few round trips as possible
+        when the block exits (see dbrm.batch). Per-statement row counts are on
+        each added statement and in batch.rowcounts afterwards.
+        """
+        from .batch import StatementBatch
+        
+        batch = StatementBatch(self, rowcounts=rowcounts)
+        yield batch
+        batch.flush()
+    
+    def executemany(self, sql: str, rows: List[Tuple]) -> int:
+        """Execute one parameterized statement for many rows, using fast_executemany when available"""
+        from .query import bind_params
+        self._invalidate_written(written_table(sql))
+        rows = [bind_params(row) for row in rows]
+        if hasattr(self._cursor, 'fast_executemany'):
+            self._cursor.fast_executemany = True
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, rows)
+        except Exception as e:
+            logger.error(f"Failed to execute batch: {e}")
+            logger.error(f"Query: {sql}")
+            raise
+        # Plain SQL so every run logs as the same statement shape; the size goes in rowcount
+        self.log_query(sql, None, time.perf_counter() - started, len(rows))
+        return len(rows)
+        
+    def bulk_insert(self, table, data_list, batch_size: int = 1000, commit: bool = True) -> int:
+        """
+        Insert many rows with parameterized executemany.
+        
+        Rows are chunked so no batch exceeds batch_size, MAX_BATCH_ROWS or
+        MAX_BATCH_PARAMETERS, and all chunks run in a single transaction that
+        is rolled back as a whole on failure. Inside a begin() block the commit
+        is left to the block. data_list may hold dicts or model instances.
+        """
         if not data_list:
             return 0
             
         table_name = table.__tablename__ if hasattr(table, '__tablename__') else table
-        
-        columns = list(data_list[0].keys())
+        columns, rows = self._bulk_rows(data_list)
+        if not columns:
+            raise ValueError("No columns to insert")
         
         from .query import Insert
-        query = Insert().into(table_name).columns_(*columns)
+        sql = Insert().into(table_name).columns_(*columns).values_(*([None] * len(columns))).build()
         
-        for data in data_list:
-            values = [data.get(col) for col in columns]
-            query.values_(*values)
-            
-        self.execute(query)
-        self.commit()
+        chunk_size = max(1, min(batch_size, MAX_BATCH_ROWS, MAX_BATCH_PARAMETERS // len(columns)))
         
-        return len(data_list)
+        started = time.perf_counter()
+        try:
+            for offset in range(0, len(rows), chunk_size):
+                self.executemany(sql, rows[offset:offset + chunk_size])
+            if commit and self._transaction_level == 0:
+                self.commit()
+        except Exception:
+            if self._transaction_level == 0:
+                self.rollback()
+            raise
         
+        elapsed = time.perf_counter() - started
+        self.last_bulk_stats = {
+            'table': table_name,
+            'rows': len(rows),
+            'batches': (len(rows) + chunk_size - 1) // chunk_size,
+            'seconds': elapsed,
+            'rows_per_second': len(rows) / elapsed if elapsed > 0 else float('inf'),
+        }
+        logger.info(
+            f"Bulk inserted {len(rows)} rows into {table_name} in {elapsed:.3f}s "
+            f"({self.last_bulk_stats['rows_per_second']:.0f} rows/s)"
+        )
+        return len(rows)
+
+    def upsert(self, model_or_rows, conflict_keys=None, table=None, update_columns=None,
+               commit: bool = True, returning: bool = False) -> int:
+        """
+        Insert or update rows in one statement per batch (MERGE / ON CONFLICT).
+
+        model_or_rows is a model instance, a list of model instances, or a list
+        of dicts (which requires table). conflict_keys default to the model's
+        primary key. Model instances write only their non-None columns, so rows
+        are grouped by the columns they set and each group is sent as
+        multi-row statements within the parameter limits. With returning, the
+        written rows come back in the same statement (OUTPUT / RETURNING) and
+        are copied onto the matching model instances, picking up database
+        defaults. Returns the number of rows sent.
+        """
+        from .query import Upsert
+        from .schema import Column
+
+        rows = model_or_rows if isinstance(model_or_rows, (list, tuple)) else [model_or_rows]
+        if not rows:
+            return 0
+
+        # Group rows by the columns they set so each group shares one statement shape;
+        # each entry keeps its source object so returned rows can be matched back
+        groups = {}
+        if isinstance(rows[0], dict):
+            if table is None:
+                raise ValueError("table is required when upserting dicts")
+            returning = False
+            for data in rows:
+                groups.setdefault(tuple(data.keys()), []).append((tuple(data.values()), None))
+        else:
+            model = type(rows[0])
+            table = table or model
+            for obj in rows:
+                data = {}
+                for name in model._columns:
+                    value = getattr(obj, name, None)
+                    if value is not None and not isinstance(value, Column):
+                        data[name] = value
+                groups.setdefault(tuple(data.keys()), []).append((tuple(data.values()), obj))
+
+        if conflict_keys is None:
+            if not hasattr(table, '_get_primary_key_info'):
+                raise ValueError("conflict_keys are required when table is not a model")
+            conflict_keys = table._get_primary_key_info()
+        conflict_keys = list(conflict_keys)
+        returning = returning and self.supports_returning
+
+        dialect = self.dialect
+        sent = 0
+        try:
+            for columns, entries in groups.items():
+                chunk_size = max(1, min(MAX_BATCH_ROWS, MAX_BATCH_PARAMETERS // len(columns)))
+                for offset in range(0, len(entries), chunk_size):
+                    chunk = entries[offset:offset + chunk_size]
+                    statement = Upsert(table, dialect=dialect).columns_(*columns).on_conflict(*conflict_keys)
+                    if update_columns is not None:
+                        statement.update_(*update_columns)
+                    if returning:
+                        statement.returning_("*")
+                    for values, _ in chunk:
+                        statement.values_(*values)
+                    cursor = self.execute(statement)
+                    if returning:
+                        self._apply_returned(cursor, chunk, columns, conflict_keys)
+                    sent += len(chunk)
+            if commit and self._transaction_level == 0:
+                self.commit()
+        except Exception:
+            if self._transaction_level == 0:
+                self.rollback()
+            raise
+        return sent
+
+    @staticmethod
+    def _apply_returned(cursor, entries, columns, conflict_keys):
+        """Copy OUTPUT/RETURNING rows onto the objects they were written from, matched by key"""
+        def normalize(value):
+            # CHAR keys come back blank-padded on SQL Server
+            return value.rstrip() if isinstance(value, str) else value
+        
+        names = [desc[0] for desc in cursor.description]
+        key_positions = [columns.index(key) for key in conflict_keys]
+        by_key = {tuple(normalize(values[i]) for i in key_positions): obj for values, obj in entries}
+        for row in cursor.fetchall():
+            returned = dict(zip(names, row))
+            obj = by_key.get(tuple(normalize(returned.get(key)) for key in conflict_keys))
+            if obj is not None:
+                obj._apply_row(returned)
+
     def create_all(self, models):
         for model in models:
             if hasattr(model, 'create'):
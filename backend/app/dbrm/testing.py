@@ -0,0 +1,98 @@
+"""
+pyodbc-compatible stand-in backed by sqlite3, for exercising dbrm locally.
+
+Usage:
+    engine = Engine(creator=sqlite_creator("local.db"), dialect="sqlite")
+"""
+import sqlite3
+from decimal import Decimal
+from typing import Callable
+
+# pyodbc binds Decimal natively; sqlite3 needs an adapter
+sqlite3.register_adapter(Decimal, str)
+
+
+class SQLiteCursor:
+    """Cursor exposing the subset of the pyodbc cursor API used by dbrm."""
+
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+        self.fast_executemany = False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, *params):
+        # pyodbc accepts both execute(sql, [a, b]) and execute(sql, a, b)
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self._cursor.execute(sql, tuple(params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql, [tuple(p) for p in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def nextset(self):
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class SQLiteConnection:
+    """Connection exposing the subset of the pyodbc connection API used by dbrm."""
+
+    def __init__(self, database, **kwargs):
+        self._conn = sqlite3.connect(database, check_same_thread=False, **kwargs)
+        self.autocommit = False
+        self.closed = False
+
+    def cursor(self):
+        return SQLiteCursor(self._conn)
+
+    def execute(self, sql, *params):
+        cursor = self.cursor()
+        return cursor.execute(sql, *params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+    def setdecoding(self, *args, **kwargs):
+        pass
+
+    def setencoding(self, *args, **kwargs):
+        pass
+
+
+def sqlite_creator(database: str = ":memory:", **kwargs) -> Callable[[], SQLiteConnection]:
+    """Return an Engine creator opening SQLite connections to the given database file."""
+    def creator():
+        return SQLiteConnection(database, **kwargs)
+    return creator
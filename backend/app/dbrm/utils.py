@@ -6,7 +6,7 @@ import json
 import csv
 import datetime
 import os
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -132,6 +132,56 @@ def export_to_csv(data: List[Dict], filepath: str, encoding='utf-8') -> Dict[str
         }
 
 
+def export_query_to_csv(session, query, filepath: str, batch_size: int = 1000,
+                        fieldnames: Optional[List[str]] = None, encoding='utf-8') -> Dict[str, Any]:
+    """
+    Stream the results of a query to a CSV file.
+    
+    Rows are fetched batch_size at a time and written as they arrive, so the
+    full result set is never held in memory.
+    
+    Args:
+        session: Database session
+        query: Select query to export
+        filepath: Output file path
+        batch_size: Rows fetched per round trip
+        fieldnames: Header names (defaults to the model columns or selected columns)
+        encoding: File encoding
+        
+    Returns:
+        Dict: Result with success status, metadata and error message if any
+    """
+    if fieldnames is None:
+        if list(query.columns) == ["*"] and getattr(query, '_model_class', None) is not None:
+            fieldnames = list(query._model_class._columns.keys())
+        else:
+            fieldnames = [getattr(col, 'name', None) or str(col) for col in query.columns]
+    
+    try:
+        rows_exported = 0
+        with open(filepath, 'w', newline='', encoding=encoding) as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            for rows in session.stream(query, batch_size=batch_size):
+                writer.writerows(rows)
+                rows_exported += len(rows)
+        
+        return {
+            'success': True,
+            'filepath': filepath,
+            'rows_exported': rows_exported,
+            'columns': fieldnames
+        }
+    except Exception as e:
+        error_msg = f"Failed to export query to CSV: {e}"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'filepath': filepath
+        }
+
+
 def import_from_csv(filepath: str, encoding='utf-8') -> Dict[str, Any]:
     """
     Import data from a CSV file.
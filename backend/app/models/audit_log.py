@@ -1,8 +1,12 @@
-from app.dbrm import Table, Column, Char, Timestamp, JSON, model_register
+from app.dbrm import Table, Column, Index, Char, Timestamp, JSON, model_register
 
 @model_register
 class AuditLog(Table):
     __tablename__ = "AuditLog"
+    __indexes__ = (
+        # Change history of one record in time order
+        Index('record_id', 'timestamp'),
+    )
     
     audit_id = Column(Char(10), nullable=False, primary_key=True)
     table_name = Column(Char(50), nullable=False)          # Which table was changed
@@ -1,8 +1,12 @@
-from app.dbrm import Table, Column, Integer, Char, Timestamp, Decimal, model_register
+from app.dbrm import Table, Column, Index, Integer, Char, Timestamp, Decimal, model_register
 
 @model_register(dependencies=["Worker"])
 class Distribute(Table):
     __tablename__ = "Distribute"
+    __indexes__ = (
+        # A worker's payments by time, covering the amount for earnings totals
+        Index('worker_id', 'distribute_time', include=('amount',)),
+    )
     
     distribute_id = Column(Integer, nullable=False, primary_key=True, autoincrement=True)
     distribute_time = Column(Timestamp, nullable=False)
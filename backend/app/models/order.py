@@ -1,9 +1,15 @@
-from app.dbrm import Table, Column, Char, Text, Integer, Timestamp, Text, Decimal, Boolean, model_register
+from app.dbrm import Table, Column, Relationship, Index, Char, Text, Integer, Timestamp, Text, Decimal, Boolean, model_register
 from app.core.enum import OrderStatus
 
 @model_register(dependencies=["Car", "Customer", "Worker"])
 class ServiceOrder(Table):
     __tablename__ = "ServiceOrder"
+    __indexes__ = (
+        # Assignment queue: pending orders by last attempt
+        Index('status', 'last_assignment_at'),
+        # Worker dashboards and earnings: a worker's orders by status and completion time
+        Index('worker_id', 'status', 'end_time', include=('total_cost',)),
+    )
 
     order_id = Column(Char(10), nullable=False, primary_key=True)
     start_time = Column(Timestamp, nullable=False)
@@ -21,4 +27,9 @@ class ServiceOrder(Table):
 
     worker_id = Column(Char(10), foreign_key='Worker.user_id', nullable=True, on_delete="SET NULL", on_update="CASCADE", index=True)
     car_id = Column(Char(10), foreign_key='Car.car_id', nullable=False, on_delete="CASCADE", on_update="CASCADE", index=True)
-    customer_id = Column(Char(10), foreign_key='Customer.user_id', nullable=False, on_delete="CASCADE", on_update="CASCADE", index=True)
\ No newline at end of file
+    customer_id = Column(Char(10), foreign_key='Customer.user_id', nullable=False, on_delete="CASCADE", on_update="CASCADE", index=True)
+
+    car = Relationship("Car")
+    worker = Relationship("Worker")
+    logs = Relationship("Log", order_by="log_time DESC")
+    procedures = Relationship("ServiceProcedure", order_by="procedure_id")
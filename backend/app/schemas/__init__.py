@@ -32,7 +32,7 @@ __all__ = [
     # Admin Analytics Schemas
     "PeriodCostBreakdown", "VehicleFailurePattern", "CostAnalysisByPeriod", "LowRatedOrderData", "WorkerPerformanceSummary", 
     "NegativeFeedbackAnalysis", "WorkerProductivityAnalysis", "WorkerStatistics", "CarTypeStatistics", 
-    "IncompleteOrderStatistics",
+    "IncompleteOrderStatistics", "RoutePerformance",
     
     # Earnings Schemas
     "EarningsPeriod", "WorkSummary", "EarningsBreakdown", "OrderDetail", "WorkerMonthlyEarnings",
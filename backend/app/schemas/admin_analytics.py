@@ -130,4 +130,21 @@ class IncompleteOrderStatistics(BaseModel):
     completed_procedures: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class RoutePerformance(BaseModel):
+    """Schema for rolling per-route request and database statistics"""
+    route: str
+    requests: int
+    window: int
+    avg_ms: float
+    p95_ms: float
+    avg_db_ms: float
+    p95_db_ms: float
+    total_db_ms: float
+    avg_statements: float
+    max_statements: int
+    avg_rows: float
+    avg_hydration_ms: float
+    n_plus_one_requests: int
+    error_requests: int
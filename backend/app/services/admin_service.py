@@ -1,10 +1,13 @@
 from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime, timedelta
+
+import numpy as np
+
 from app.dbrm import Session
 
-from app.crud import car, order, log, procedure, distribute, worker, wage
-from app.core.enum import OrderStatus
+from app.crud import car, order, log, distribute, worker, wage
+from app.core.enum import OrderStatus, ProcedureStatus
 from app.schemas import (
     Distribute, Order, DistributeCreate,
     PeriodCostBreakdown,
@@ -16,16 +19,20 @@ from app.schemas import (
     WorkerStatistics,
     CarTypeStatistics,
     IncompleteOrderStatistics,
+    RoutePerformance,
 )
+from app.core.middleware import route_stats
 
 
 class AdminService:
     """Service for admin functions"""
 
+    cursor_fields = order.cursor_fields
+
     @staticmethod
-    def get_all_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Order]:
+    def get_all_orders(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Order]:
         """Get all orders (admin function)"""
-        orders = order.get_multi(db, skip=skip, limit=limit)
+        orders = order.get_multi(db, skip=skip, limit=limit, cursor=cursor)
         return orders
 
     @staticmethod
@@ -141,14 +148,14 @@ class AdminService:
         """
         Analyze orders with low ratings and associated workers
         """
-        low_rated_orders = order.get_orders_by_rating_threshold(db, rating_threshold)
+        # Workers are joined into the order query instead of fetched per order
+        low_rated_orders = order.get_low_rated_orders_with_workers(db, rating_threshold)
         
         low_rated_order_data = []
         worker_feedback_summary = {}
         
         for order_item in low_rated_orders:
-            # Get worker info
-            worker_obj = worker.get_by_id(db, worker_id=order_item.worker_id) if order_item.worker_id else None
+            worker_obj = order_item.worker
             
             order_data = LowRatedOrderData(
                 order_id=order_item.order_id,
@@ -219,32 +226,32 @@ class AdminService:
         
         worker_types = worker.get_all_worker_types(db)
         
+        # Every order of the period in one query, as columns rather than Order objects
+        columns = order.get_order_columns_by_period(db, start_dt, end_dt)
+        order_types = np.ma.getdata(columns["worker_type"])
+        completed = np.ma.getdata(columns["status"]) == OrderStatus.COMPLETED
+        # Completed orders with both timestamps, and their duration in hours
+        timed = completed & ~np.ma.getmaskarray(columns["start_time"]) & ~np.ma.getmaskarray(columns["end_time"])
+        hours = (np.ma.getdata(columns["end_time"]) - np.ma.getdata(columns["start_time"])) / np.timedelta64(1, "h")
+        rated = timed & ~np.ma.getmaskarray(columns["rating"])
+        ratings = np.ma.getdata(columns["rating"])
+        
         result = []
         for worker_type in worker_types:
-            # Get all orders for this worker type in one efficient query
-            orders = order.get_orders_by_worker_type_period(db, worker_type, start_dt, end_dt)
-            
-            # Calculate all metrics from the single dataset
-            total_tasks = len(orders)
-            completed_tasks = sum(1 for o in orders if o.status == OrderStatus.COMPLETED)
+            of_type = order_types == worker_type
+            total_tasks = int(of_type.sum())
+            completed_tasks = int((of_type & completed).sum())
             
             # Calculate completion rate
             completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
             
-            # Calculate average completion time for completed orders
-            completed_orders = [o for o in orders if o.status == OrderStatus.COMPLETED and o.end_time and o.start_time]
-            if completed_orders:
-                total_completion_time = sum(
-                    (o.end_time - o.start_time).total_seconds() / 3600  # Convert to hours
-                    for o in completed_orders
-                )
-                avg_completion_time = total_completion_time / len(completed_orders)
-            else:
-                avg_completion_time = 0
+            # Average completion time of completed orders
+            of_type_timed = of_type & timed
+            avg_completion_time = float(hours[of_type_timed].mean()) if of_type_timed.any() else 0
             
-            # Calculate average customer rating for completed orders with ratings
-            rated_orders = [o for o in completed_orders if o.rating is not None]
-            customer_satisfaction = sum(o.rating for o in rated_orders) / len(rated_orders) if rated_orders else 0
+            # Average customer rating of completed orders with ratings
+            of_type_rated = of_type & rated
+            customer_satisfaction = float(ratings[of_type_rated].mean()) if of_type_rated.any() else 0
             
             productivity = WorkerProductivityAnalysis(
                 worker_type=worker_type,
@@ -266,6 +273,7 @@ class AdminService:
         Get statistics about worker types, their tasks, and productivity
         """
         worker_types = worker.get_all_worker_types(db)
+        wage.prefetch(db, worker_types)
 
         result = []
         for worker_type in worker_types:
@@ -293,15 +301,16 @@ class AdminService:
         """
         Get all incomplete orders and their details
         """
-        in_progress_orders = order.get_incomplete_orders(db)
+        # Cars are joined and procedures batch-loaded rather than queried per order
+        in_progress_orders = order.get_incomplete_orders_with_progress(db)
 
         result = []
         for order_item in in_progress_orders:
-            car_obj = car.get_by_car_id(db, car_id=order_item.car_id)
+            car_obj = order_item.car
 
-            progress_info = procedure.get_procedure_progress(db, order_id=order_item.order_id)
-            completed_procedures = progress_info["completed"]
-            total_procedures = progress_info["total"]
+            procedures = order_item.procedures
+            completed_procedures = sum(1 for p in procedures if p.current_status == ProcedureStatus.COMPLETED)
+            total_procedures = len(procedures)
             
             stats = IncompleteOrderStatistics(
                 order_id=order_item.order_id,
@@ -319,6 +328,11 @@ class AdminService:
         return result
 
 
+    @staticmethod
+    def get_route_performance(limit: int = 10, order_by: str = "total_db_ms") -> List[RoutePerformance]:
+        """Routes with the worst rolling database statistics"""
+        return [RoutePerformance(**item) for item in route_stats.worst(limit=limit, order_by=order_by)]
+
     @staticmethod
     def distribute_payment(db: Session, worker_id: str, amount: Decimal) -> Distribute:
         """Record a payment distribution to a worker"""
@@ -23,13 +23,8 @@ class AutoAssignmentService:
         # Random selection
         selected_worker = random.choice(available_workers)
         
-        # Update order: assign worker, set status to assigned
-        order.update_order_assignment(db, order_id=order_id, worker_id=selected_worker.user_id, status=OrderStatus.ASSIGNED)
-        
-        # Update worker's availability status
-        worker.update_availability(db, worker_id=selected_worker.user_id, status=WorkerAvailabilityStatus.BUSY)
-        
-        return True
+        # Assign the order and mark the worker busy, unless another process claimed either first
+        return bool(order.assign_batch(db, {order_id: selected_worker.user_id}))
     
     @staticmethod
     def handle_rejection(db: Session, order_id: str) -> bool:
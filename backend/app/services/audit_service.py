@@ -15,6 +15,8 @@ from app.schemas.audit_log import ChangeTrackingContext, AuditLogSummary, AuditL
 
 class AuditService:
     """Core audit service for audit trail management"""
+
+    cursor_fields = audit_log.cursor_fields
     
     @staticmethod
     def _get_record_for_audit(db: Session, table_name: str, record_id: str):
@@ -85,10 +87,10 @@ class AuditService:
     
     @staticmethod
     def get_audit_trail(
-        db: Session, record_id: str, skip: int = 0, limit: int = 100
+        db: Session, record_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[AuditLog]:
         """Get audit trail for a specific record"""
-        audit_entries = audit_log.get_audit_trail_for_record(db, record_id, skip, limit)
+        audit_entries = audit_log.get_audit_trail_for_record(db, record_id, skip, limit, cursor)
         return audit_entries
     
     @staticmethod
@@ -108,8 +110,8 @@ class AuditService:
     
     @staticmethod
     def get_recent_changes(
-        db: Session, hours: int = 24, skip: int = 0, limit: int = 100
+        db: Session, hours: int = 24, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[AuditLog]:
         """Get recent changes within specified hours"""
-        audit_entries = audit_log.get_recent_changes(db, hours, skip, limit)
+        audit_entries = audit_log.get_recent_changes(db, hours, skip, limit, cursor)
         return audit_entries
\ No newline at end of file
@@ -1,14 +1,16 @@
 from typing import Optional, List, Dict, Any
 from app.dbrm import Session
 
-from app.crud import car, order, log
-from app.schemas import CarCreate, CarUpdate, Car, CarType
+from app.crud import car, order
+from app.schemas import CarCreate, CarUpdate, Car, CarType, Log
 from app.core.audit_decorators import audit
 
 
 class CarService:
     """Service for car operations"""
 
+    cursor_fields = car.cursor_fields
+
     @staticmethod
     def get_valid_car_types(db: Session) -> List[str]:
         """Get all car types"""
@@ -47,9 +49,11 @@ class CarService:
 
 
     @staticmethod
-    def get_customer_cars(db: Session, customer_id: str, skip: int = 0, limit: int = 100) -> List[Car]:
+    def get_customer_cars(
+        db: Session, customer_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> List[Car]:
         """Get all cars owned by a customer with pagination"""
-        cars = car.get_cars_by_customer(db, customer_id=customer_id, skip=skip, limit=limit)
+        cars = car.get_cars_by_customer(db, customer_id=customer_id, skip=skip, limit=limit, cursor=cursor)
         return cars
 
 
@@ -109,9 +113,9 @@ class CarService:
 
 
     @staticmethod
-    def get_all_cars(db: Session, skip: int = 0, limit: int = 100) -> List[Car]:
+    def get_all_cars(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Car]:
         """Get all cars (admin function)"""
-        cars = car.get_multi(db, skip=skip, limit=limit)
+        cars = car.get_multi(db, skip=skip, limit=limit, cursor=cursor)
         return cars
 
 
@@ -122,12 +126,12 @@ class CarService:
         
         Returns a list of maintenance entries with order details and associated logs
         """
-        orders = order.get_orders_by_car(db, car_id=car_id, skip=skip, limit=limit)
+        # Logs for every order on the page come back in a single query
+        orders = order.get_orders_with_logs_by_car(db, car_id=car_id, skip=skip, limit=limit)
         
         maintenance_history = []
         for order_obj in orders:
-            # Get all logs associated with this order
-            logs = log.get_logs_by_order(db, order_id=order_obj.order_id)
+            logs = [Log.model_validate(log_obj) for log_obj in order_obj.logs]
             
             # Calculate costs
             material_cost = sum(log.cost for log in logs)
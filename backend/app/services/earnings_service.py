@@ -118,6 +118,10 @@ class EarningsService:
         # Get all active workers
         all_workers = worker.get_all_workers(db)
         
+        # Per-worker get_by_id / get_by_type lookups below resolve in one query each
+        worker.prefetch(db, [worker_obj.user_id for worker_obj in all_workers])
+        wage.prefetch(db, {worker_obj.worker_type for worker_obj in all_workers})
+        
         earnings_results = []
         for worker_obj in all_workers:
             try:
@@ -210,6 +214,13 @@ class EarningsService:
         failed_distributions = 0
         total_amount_distributed = Decimal('0')
         
+        start_date = datetime(year, month, 1)
+        _, last_day = monthrange(year, month)
+        end_date = datetime(year, month, last_day, 23, 59, 59)
+        
+        # Distributions to record in one batched insert
+        pending = []
+        
         for earnings in earnings_results:
             if isinstance(earnings, FailedEarningsCalculation):
                 # Skip workers with calculation errors
@@ -226,11 +237,12 @@ class EarningsService:
             
             # Only distribute if there are earnings
             if total_earnings > 0:
-                success = EarningsService.distribute_worker_earnings(
-                    db, worker_id, total_earnings, year, month, audit_context
+                existing_distributions = distribute.get_distributions_by_worker_period(
+                    db, worker_id, start_date, end_date
                 )
-                
-                if success:
+                if existing_distributions:
+                    # Consider it successful since distribution already exists
+                    logger.warning(f"Distribution already exists for worker {worker_id} in {year}-{month:02d}")
                     successful_distributions += 1
                     total_amount_distributed += total_earnings
                     distribution_details.append(DistributionDetail(
@@ -240,12 +252,7 @@ class EarningsService:
                         orders_completed=earnings.work_summary.total_orders
                     ))
                 else:
-                    failed_distributions += 1
-                    errors.append(DistributionError(
-                        worker_id=worker_id,
-                        error="Distribution failed",
-                        type="distribution_error"
-                    ))
+                    pending.append((earnings, total_earnings))
             else:
                 # Worker had no earnings this period
                 distribution_details.append(DistributionDetail(
@@ -256,6 +263,32 @@ class EarningsService:
                     note="No earnings this period"
                 ))
         
+        if pending:
+            try:
+                distribute.create_distributions(db, obj_in_list=[
+                    DistributeCreate(amount=total_earnings, worker_id=earnings.worker_id)
+                    for earnings, total_earnings in pending
+                ])
+                for earnings, total_earnings in pending:
+                    successful_distributions += 1
+                    total_amount_distributed += total_earnings
+                    distribution_details.append(DistributionDetail(
+                        worker_id=earnings.worker_id,
+                        amount=float(total_earnings),
+                        hours_worked=earnings.work_summary.total_hours,
+                        orders_completed=earnings.work_summary.total_orders
+                    ))
+            except Exception as e:
+                # The batch runs in one transaction, so nothing was recorded
+                logger.error(f"Failed to record {len(pending)} distributions for {year}-{month:02d}: {e}")
+                for earnings, _ in pending:
+                    failed_distributions += 1
+                    errors.append(DistributionError(
+                        worker_id=earnings.worker_id,
+                        error="Distribution failed",
+                        type="distribution_error"
+                    ))
+        
         logger.info(
             f"Monthly distribution complete: {successful_distributions} "
             f"successful, {failed_distributions} failed, "
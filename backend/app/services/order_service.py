@@ -5,18 +5,21 @@ from app.crud import order, user, car
 from app.schemas import OrderCreate, Order
 from app.core.audit_decorators import audit
 from app.core.enum import OrderStatus
-from app.background.assignment_processor import trigger_assignment
+from app.background.events import publish_order_created, publish_order_updated
 
 
 class OrderService:
     """Service for order operations"""
 
+    cursor_fields = order.cursor_fields
+
     @staticmethod
     @audit("Order", "CREATE")
     def create_order(db: Session, obj_in: OrderCreate, customer_id: str, audit_context=None) -> Order:
         """Create a new service order"""
         order_obj = order.create_order_for_customer(db=db, obj_in=obj_in, customer_id=customer_id)
-        trigger_assignment(db, order_obj.order_id)
+        # The assignment processor matches it off the request path
+        publish_order_created(order_obj.order_id)
         return order_obj
 
 
@@ -28,16 +31,26 @@ class OrderService:
 
 
     @staticmethod
-    def get_customer_orders(db: Session, customer_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None) -> List[Order]:
+    def get_customer_orders(
+        db: Session, customer_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
         """Get all orders for a customer with pagination"""
-        orders = order.get_orders_by_customer(db, customer_id=customer_id, skip=skip, limit=limit, status=status)
+        orders = order.get_orders_by_customer(
+            db, customer_id=customer_id, skip=skip, limit=limit, status=status, cursor=cursor
+        )
         return orders
 
 
     @staticmethod
-    def get_worker_orders(db: Session, worker_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None) -> List[Order]:
+    def get_worker_orders(
+        db: Session, worker_id: str, skip: int = 0, limit: int = 100, status: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
         """Get all orders assigned to a worker with pagination"""
-        orders = order.get_orders_by_worker(db, worker_id=worker_id, skip=skip, limit=limit, status=status)
+        orders = order.get_orders_by_worker(
+            db, worker_id=worker_id, skip=skip, limit=limit, status=status, cursor=cursor
+        )
         return orders
 
 
@@ -58,9 +71,9 @@ class OrderService:
 
 
     @staticmethod
-    def get_all_orders(db: Session, skip: int = 0, limit: int = 100) -> List[Order]:
+    def get_all_orders(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Order]:
         """Get all orders (admin function)"""
-        orders = order.get_multi(db, skip=skip, limit=limit)
+        orders = order.get_multi(db, skip=skip, limit=limit, cursor=cursor)
         return orders
 
 
@@ -75,6 +88,9 @@ class OrderService:
         if not order_obj:
             return None
         
+        # Customer and worker resolve in one query
+        user.prefetch(db, [order_obj.customer_id, order_obj.worker_id])
+        
         # Get car information
         car_obj = car.get_by_car_id(db, car_id=order_obj.car_id)
         car_data = car_obj.__dict__ if car_obj else None
@@ -141,13 +157,8 @@ class OrderService:
         # Set expedite flag
         updated_order = order.set_expedite_flag(db, order_id=order_id)
         
-        # Optionally trigger re-assignment for better worker matching
-        # This could be enhanced to notify available workers immediately
-        try:
-            if order_obj.status == OrderStatus.PENDING_ASSIGNMENT:
-                trigger_assignment(db, order_id=order_id)
-        except Exception as e:
-            # Log error but don't fail the expedite request
-            print(f"Priority assignment failed for expedited order {order_id}: {e}")
+        # Move it to the front of the assignment queue
+        if order_obj.status == OrderStatus.PENDING_ASSIGNMENT:
+            publish_order_updated(order_id)
         
         return updated_order
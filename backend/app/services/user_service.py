@@ -8,6 +8,8 @@ from app.core.audit_decorators import audit
 class UserService:
     """Service for user operations with audit trail"""
 
+    cursor_fields = user_crud.cursor_fields
+
     @staticmethod
     @audit("User", "CREATE")
     def create_user(db: Session, obj_in: UserCreate, audit_context=None) -> User:
@@ -66,9 +68,9 @@ class UserService:
         return True
 
     @staticmethod
-    def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    def get_all_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
         """Get all users with pagination (admin function)"""
-        users = user_crud.get_multi(db, skip=skip, limit=limit)
+        users = user_crud.get_multi(db, skip=skip, limit=limit, cursor=cursor)
         return users
 
     @staticmethod
@@ -5,14 +5,17 @@ from app.dbrm import Session
 
 from app.crud import order, log, wage, worker, procedure
 from app.schemas import LogCreate, Log, Order
-from app.core.enum import OrderStatus, ProcedureStatus
+from app.core.enum import OrderStatus, ProcedureStatus, WorkerAvailabilityStatus
 from app.core.audit_decorators import audit
-from app.background.assignment_processor import trigger_assignment, process_pending_assignments
+from app.background.events import publish_order_rejected
 
 
 class WorkerService:
     """Service for worker operations"""
 
+    log_cursor_fields = log.cursor_fields
+    order_cursor_fields = order.cursor_fields
+
     @staticmethod
     @audit("Log", "CREATE")
     def create_maintenance_log(
@@ -29,10 +32,10 @@ class WorkerService:
 
     @staticmethod
     def get_worker_logs(
-        db: Session, worker_id: str, skip: int = 0, limit: int = 100
+        db: Session, worker_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Log]:
         """Get all maintenance logs for a worker"""
-        logs = log.get_logs_by_worker(db, worker_id=worker_id, skip=skip, limit=limit)
+        logs = log.get_logs_by_worker(db, worker_id=worker_id, skip=skip, limit=limit, cursor=cursor)
         return logs
     
 
@@ -76,34 +79,32 @@ class WorkerService:
         if order_obj.status != OrderStatus.ASSIGNED:
             raise ValueError("Order is not in assigned state")
         
-        # Reset order to pending assignment
+        # Reset order to pending assignment and free the worker (which publishes worker_freed)
         order.update_order_assignment(db, order_id=order_id, worker_id=None, status=OrderStatus.PENDING_ASSIGNMENT)
+        worker.update_availability(db, worker_id=worker_id, status=WorkerAvailabilityStatus.AVAILABLE)
         
-        # Try to reassign to another worker
-        assigned = trigger_assignment(db, order_id)
-        
-        # If assignment failed, process other pending assignments
-        # The rejected order will be processed in the next cycle
-        if not assigned:
-            process_pending_assignments(db)
+        # The assignment processor offers the order to another worker first
+        publish_order_rejected(order_id, worker_id=worker_id)
         
         return {"message": "Order rejected successfully", "order_id": order_id}
 
 
     @staticmethod
     def get_assigned_orders(
-        db: Session, worker_id: str, skip: int = 0, limit: int = 100
+        db: Session, worker_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Order]:
         """Get orders assigned to a specific worker"""
-        return order.get_orders_by_worker(db, worker_id=worker_id, skip=skip, limit=limit, status=OrderStatus.ASSIGNED)
+        return order.get_orders_by_worker(
+            db, worker_id=worker_id, skip=skip, limit=limit, status=OrderStatus.ASSIGNED, cursor=cursor
+        )
     
 
     @staticmethod
     def get_all_orders(
-        db: Session, worker_id: str, skip: int = 0, limit: int = 100
+        db: Session, worker_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Order]:
         """Get all orders for a specific worker"""
-        return order.get_orders_by_worker(db, worker_id=worker_id, skip=skip, limit=limit)
+        return order.get_orders_by_worker(db, worker_id=worker_id, skip=skip, limit=limit, cursor=cursor)
     
 
     @staticmethod
@@ -120,7 +121,9 @@ class WorkerService:
             if procedure_obj.current_status != ProcedureStatus.COMPLETED:
                 raise ValueError(f"Procedure {procedure_obj.procedure_id} is not in completed state")
         total_cost = log.get_total_cost_by_order(db, order_id=order_id)
-        return order.complete_order(db, order_id=order_id, total_cost=total_cost)
+        completed = order.complete_order(db, order_id=order_id, total_cost=total_cost)
+        worker.update_availability(db, worker_id=worker_id, status=WorkerAvailabilityStatus.AVAILABLE)
+        return completed
 
 
     @staticmethod
@@ -0,0 +1,58 @@
+"""
+Microbenchmark for hydrating a page of ServiceOrder rows.
+
+Compares the per-row _from_row + model_validate path with the cached
+column-map hydrators. Run from the backend directory:
+    python -m benchmarks.bench_hydration
+"""
+import sys
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.dbrm.hydration import model_hydrator, schema_hydrator, row_hydrator
+from app.models import ServiceOrder
+from app.schemas import Order
+
+ROWS = 500
+REPEAT = 7
+NUMBER = 20
+
+DESCRIPTION = [(name, None, None, None, None, None, None) for name in ServiceOrder._columns]
+PAGE = [
+    (
+        f"O{i:09d}", datetime(2025, 1, 1, 9), None, "Replace brake pads " * 20, None, None,
+        1, Decimal("120.50"), False, 0, None, f"W{i % 50:09d}", f"V{i:09d}", f"C{i % 200:09d}",
+    )
+    for i in range(ROWS)
+]
+
+
+def legacy():
+    return [Order.model_validate(ServiceOrder._from_row(row)) for row in PAGE]
+
+
+def model_then_schema():
+    hydrate = model_hydrator(ServiceOrder, DESCRIPTION)
+    return [Order.model_validate(hydrate(row)) for row in PAGE]
+
+
+def schema_direct():
+    hydrate = schema_hydrator(Order, DESCRIPTION)
+    return [hydrate(row) for row in PAGE]
+
+
+def slotted_rows():
+    hydrate = row_hydrator(DESCRIPTION)
+    return [hydrate(row) for row in PAGE]
+
+
+if __name__ == "__main__":
+    baseline = None
+    for bench in (legacy, model_then_schema, schema_direct, slotted_rows):
+        best = min(timeit.repeat(bench, number=NUMBER, repeat=REPEAT)) / NUMBER
+        baseline = baseline or best
+        print(f"{bench.__name__:<18} {best * 1e3:7.2f} ms / {ROWS} rows  speedup {baseline / best:5.2f}x")
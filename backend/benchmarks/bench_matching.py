@@ -0,0 +1,117 @@
+"""
+Benchmark for the optimal matching strategy's cost matrix and solver.
+
+Builds the cost matrix for synthetic orders and workers and solves it: one
+default batch (200 orders) against 1k workers, a full 1k x 1k, and orders
+outnumbering workers (1k x 200). The objective is compared with the greedy
+priority pairing. Before timing, the solver is checked against brute force on
+small typed instances, where orders can have no worker of their type and
+FORBIDDEN pairs are common. Run from the backend directory:
+    python -m benchmarks.bench_matching
+"""
+import itertools
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.background.assignment_index import IndexedOrder
+from app.background.matching import CostMatrixMatching, FORBIDDEN, linear_assignment
+
+WORKERS = 1000
+# (orders, workers)
+CASES = ((200, 1000), (1000, 1000), (1000, 200))
+REPEAT = 3
+BRUTE_FORCE_CASES = 3000
+NOW = datetime(2025, 1, 1, 12)
+TYPES = ("mechanic", "painter", "electrician")
+
+rng = np.random.default_rng(42)
+strategy = CostMatrixMatching()
+WORKER_LIST = [(f"W{i:09d}", TYPES[i % len(TYPES)]) for i in range(WORKERS)]
+WORKER_IDS = [worker_id for worker_id, _ in WORKER_LIST]
+RATINGS = {worker_id: float(rng.uniform(1, 5)) for worker_id in WORKER_IDS if rng.random() < 0.8}
+LOADS = {worker_id: int(rng.integers(0, 12)) for worker_id in WORKER_IDS}
+for worker_id in WORKER_IDS[::7]:
+    for _ in range(int(rng.integers(1, 5))):
+        strategy.rejections.record_offer(worker_id)
+    strategy.rejections.record_rejection(worker_id)
+
+
+def make_orders(count):
+    orders = []
+    for i in range(count):
+        start = NOW - timedelta(minutes=int(rng.integers(0, 600)))
+        expedited = rng.random() < 0.1
+        # A quarter of the orders need a specific worker type
+        worker_type = TYPES[i % len(TYPES)] if rng.random() < 0.25 else None
+        orders.append(IndexedOrder(f"O{i:09d}", (not expedited, start, int(rng.integers(0, 3))), worker_type))
+    return orders
+
+
+def build(orders, workers):
+    worker_costs = strategy.worker_costs([worker_id for worker_id, _ in workers], RATINGS, LOADS)
+    return strategy.cost_matrix(orders, workers, worker_costs, now=NOW)
+
+
+def greedy_total(orders, cost):
+    """Objective of the priority strategy: orders by priority, each takes the first free fitting worker"""
+    taken = np.zeros(cost.shape[1], dtype=bool)
+    total = 0.0
+    for row in sorted(range(len(orders)), key=lambda r: orders[r].key):
+        free = np.nonzero(~taken & (cost[row] < FORBIDDEN))[0]
+        if free.size:
+            taken[free[0]] = True
+            total += cost[row, free[0]]
+    return total
+
+
+def brute_force_total(cost):
+    """Exact minimum over every assignment of min(n_rows, n_cols) pairs"""
+    n_rows, n_cols = cost.shape
+    if n_rows <= n_cols:
+        return min(cost[range(n_rows), list(cols)].sum() for cols in itertools.permutations(range(n_cols), n_rows))
+    return min(cost[list(rows), range(n_cols)].sum() for rows in itertools.permutations(range(n_rows), n_cols))
+
+
+def check_against_brute_force(cases=BRUTE_FORCE_CASES):
+    """Number of small typed instances where linear_assignment misses the optimum"""
+    check_rng = np.random.default_rng(7)
+    suboptimal = 0
+    for _ in range(cases):
+        n_orders, n_workers = (int(size) for size in check_rng.integers(1, 6, size=2))
+        cost = check_rng.random(n_workers) * 3 - (check_rng.random(n_orders) * 3)[:, None]
+        worker_types = check_rng.integers(0, 3, n_workers)
+        order_types = check_rng.integers(0, 3, n_orders)
+        typed = check_rng.random(n_orders) < 0.5
+        cost[typed[:, None] & (order_types[:, None] != worker_types[None, :])] = FORBIDDEN
+        rows, cols = linear_assignment(cost)
+        best = brute_force_total(cost)
+        # Sums that include FORBIDDEN entries are only exact to about 1e-7
+        if cost[rows, cols].sum() > best + 1e-12 * abs(best) + 1e-9:
+            suboptimal += 1
+    return suboptimal
+
+
+if __name__ == "__main__":
+    suboptimal = check_against_brute_force()
+    print(f"brute-force check: {suboptimal} of {BRUTE_FORCE_CASES} typed instances suboptimal")
+    if suboptimal:
+        sys.exit(1)
+    for size, workers in CASES:
+        orders = make_orders(size)
+        worker_list = WORKER_LIST[:workers]
+        cost = build(orders, worker_list)
+        rows, cols = linear_assignment(cost)
+        feasible = cost[rows, cols] < FORBIDDEN
+        build_time = min(timeit.repeat(lambda: build(orders, worker_list), number=1, repeat=REPEAT))
+        solve_time = min(timeit.repeat(lambda: linear_assignment(cost), number=1, repeat=REPEAT))
+        optimal = cost[rows, cols][feasible].sum()
+        greedy = greedy_total(orders, cost)
+        print(f"{size:>5} orders x {workers:>4} workers  build {build_time * 1e3:8.2f} ms  "
+              f"solve {solve_time * 1e3:8.2f} ms  assigned {int(feasible.sum()):>4}  "
+              f"objective optimal {optimal:10.2f} vs greedy {greedy:10.2f}")
@@ -0,0 +1,57 @@
+"""
+Microbenchmark for Select compilation with and without the statement cache.
+
+Run from the backend directory:
+    python -m benchmarks.bench_select_build
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.dbrm import Select, Condition
+from app.dbrm.cache import statement_cache
+from app.models import ServiceOrder, User, Car
+
+ITERATIONS = 50_000
+
+
+def get_by_id():
+    return Select().from_(User).filter_by(user_id="C123456ABC").limit(1).compile()
+
+
+def get_by_order_id():
+    return Select().from_(ServiceOrder).filter_by(order_id="O250101ABC").limit(1).compile()
+
+
+def orders_by_car_type():
+    return Select(ServiceOrder.order_id).from_(ServiceOrder).join(
+        Car, on=(Car.car_id, ServiceOrder.car_id)
+    ).filter(
+        Condition.eq(Car.car_type, "SUV"),
+        Condition.gte(ServiceOrder.start_time, "2025-01-01"),
+        Condition.lte(ServiceOrder.start_time, "2025-12-31"),
+    ).order_by(ServiceOrder.start_time).offset(40).limit(20).compile()
+
+
+def run(func):
+    statement_cache.clear()
+    statement_cache.enabled = False
+    uncached = min(timeit.repeat(func, number=ITERATIONS, repeat=7))
+
+    statement_cache.enabled = True
+    func()  # warm the cache
+    cached = min(timeit.repeat(func, number=ITERATIONS, repeat=7))
+
+    per_call = lambda total: total / ITERATIONS * 1e6
+    print(
+        f"{func.__name__:<22} uncached {per_call(uncached):7.2f} us  "
+        f"cached {per_call(cached):7.2f} us  speedup {uncached / cached:5.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    for bench in (get_by_id, get_by_order_id, orders_by_car_type):
+        run(bench)
+    print(statement_cache.stats())
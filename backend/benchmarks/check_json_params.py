@@ -0,0 +1,36 @@
+"""
+Check that list and dict values (JSON columns such as AuditLog.changed_fields)
+reach the driver as JSON text, through single statements and executemany
+alike, using the SQLite stand-in. Run from the backend directory:
+    python -m benchmarks.check_json_params
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.dbrm import Engine, Session, Insert, Update
+from app.dbrm.testing import sqlite_creator
+
+EXPECTED = {1: ["status", "état"], 2: ["worker_id"]}
+
+
+def stored_values():
+    engine = Engine(creator=sqlite_creator(":memory:"), dialect="sqlite")
+    with Session(engine) as db:
+        db.execute("CREATE TABLE JsonCheck (check_id INTEGER PRIMARY KEY, changed_fields TEXT)")
+        db.execute(Insert("JsonCheck").columns_("check_id", "changed_fields").values_(1, ["status", "état"]))
+        db.bulk_insert("JsonCheck", [{"check_id": 2, "changed_fields": {"rating": [4, 5]}}])
+        db.execute(Update("JsonCheck").set_(changed_fields=["worker_id"]).filter_by(check_id=2))
+        db.commit()
+        rows = db.execute("SELECT check_id, changed_fields FROM JsonCheck ORDER BY check_id").fetchall()
+    return {check_id: json.loads(value) for check_id, value in rows}
+
+
+if __name__ == "__main__":
+    stored = stored_values()
+    print(f"JSON parameters stored as {stored}")
+    if stored != EXPECTED:
+        print(f"expected {EXPECTED}")
+        sys.exit(1)
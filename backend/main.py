@@ -11,9 +11,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.exceptions import add_exception_handlers
+from app.core.middleware import QueryStatsMiddleware
 
-from app.dbrm import Engine, Session
+from app.dbrm import Session
 from app.dbrm.decorators import create_all_tables
+from app.core.database import engine
 from app.core.startup import startup_background_services, shutdown_background_services
 
 # Configure logging
@@ -33,7 +35,6 @@ logger = logging.getLogger(__name__)
 
 def init_db():
     try:
-        engine = Engine.from_env()       
         with Session(engine) as session:
             created_tables = create_all_tables(session)
             return created_tables
@@ -66,6 +67,7 @@ async def startup_db_client(app: FastAPI):
         logger.info("Stopping background services...")
         shutdown_background_services()
         logger.info("Background services stopped")
+        engine.dispose()
 
 app = FastAPI(
     title="Automobile Maintenance System API",
@@ -84,8 +86,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Per-request statement counts and DB time (Server-Timing header, /admin/performance/routes)
+app.add_middleware(QueryStatsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 